@@ -18,7 +18,37 @@ class UploadedData(db.Model):
     file_size = db.Column(db.Integer, nullable=False)  # in bytes
     upload_date =  db.Column(db.DateTime, default=datetime.utcnow)  # file creation time
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    content_hash = db.Column(db.String(64))  # SHA-256 of the stored file
+    row_count = db.Column(db.Integer)  # data rows, header excluded
+    column_schema = db.Column(db.Text)  # JSON [[column, dtype], ...] inferred at upload
+    columnar_path = db.Column(db.String(255))  # Arrow copy of the CSV used for training
+    suggestion_status = db.Column(db.String(16))  # target column suggestion: 'pending', 'ready' or 'failed'
+    suggested_target = db.Column(db.Integer)  # suggested target column index, set once the suggestion is ready
+    suggestion_source = db.Column(db.String(16))  # 'local' (TargetSuggester) or 'gpt'
+    suggestion_confidence = db.Column(db.Float)  # confidence of the local suggestion, 0 to 1
+    processing_status = db.Column(db.String(16))  # Arrow copy and profile after the upload: 'processing', 'ready' or 'failed'
+    processing_error = db.Column(db.Text)  # why processing failed
 
+    profiles = db.relationship('DatasetProfile', backref='dataset', cascade='all, delete-orphan')
+
+
+class DatasetProfile(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey('uploaded_data.id'), nullable=False)
+    has_header = db.Column(db.Boolean, default=True)  # profiles differ when the first row is data
+    row_count = db.Column(db.Integer, nullable=False)
+    columns_json = db.Column(db.Text, nullable=False)  # JSON list of per-column stats from DatasetProfiler
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class UploadSession(db.Model):
+    # A resumable upload in progress; the staged file size is the acknowledged offset
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex handed to the client
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(120), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)  # declared size in bytes
+    staging_path = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
 
 
 class ModelRun(db.Model):
@@ -32,6 +62,8 @@ class ModelRun(db.Model):
     created_at = db.Column(db.DateTime, nullable=False)  # file creation time
     result_json = db.Column(db.Text)  # Store output metrics as JSON (if needed)
     graph_path = db.Column(db.String(255))  # Path to the saved chart image (if any)
+    washing_json = db.Column(db.Text)  # fitted DataWasher state, cleans new rows like the training data
+    washing_report = db.Column(db.Text)  # DataWasher.report: per-column time and type, dropped rows and columns, memory
 
 
 class SharedResult(db.Model):
@@ -50,3 +82,26 @@ class SharedResult(db.Model):
     modelrun = db.relationship('ModelRun', backref='shared_records')
 
 
+
+
+class TrainingJob(db.Model):
+    # A model run requested in select_model, trained by the worker pool (app/worker.py)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)  # CSV file selected
+    file_path = db.Column(db.String(255), nullable=False)
+    model_type = db.Column(db.String(50), nullable=False)
+    precision_mode = db.Column(db.String(50), nullable=False)
+    target_index = db.Column(db.Integer, nullable=False)
+    has_header = db.Column(db.Boolean, default=True)
+    status = db.Column(db.String(16), nullable=False, default='queued', index=True)  # 'queued', 'running', 'succeeded', 'failed' or 'cancelled'
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    worker_pid = db.Column(db.Integer)  # process training the job while it runs
+    error = db.Column(db.Text)  # why a failed job failed
+    progress_json = db.Column(db.Text)  # JSON progress of the hyperparameter search, see training.job_state
+    cancel_requested = db.Column(db.Boolean, default=False)  # set by the cancel button, the worker pool stops the job
+    modelrun_id = db.Column(db.Integer, db.ForeignKey('model_run.id'))  # the run a succeeded job produced
+
+    modelrun = db.relationship('ModelRun')
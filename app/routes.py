@@ -1,27 +1,44 @@
 import json
 import os
+import time
+import uuid
 from datetime import datetime
 
-import pandas as pd
-from flask import (Blueprint, flash, jsonify, redirect, render_template,
-                   request, url_for)
+from flask import (Blueprint, Response, abort, current_app, flash, jsonify,
+                   redirect, render_template, request, stream_with_context,
+                   url_for)
 from flask_login import current_user, login_required, login_user, logout_user
+from werkzeug.exceptions import ClientDisconnected
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 
 from app import db
 from app.forms import SelectModelForm
-from app.models import ModelRun, SharedResult, UploadedData, User
-from app.static.ml_model.DataWashing import DataWashing
+from app.models import (DatasetProfile, ModelRun, SharedResult, TrainingJob,
+                        UploadedData, UploadSession, User)
+from app.static.ml_model.ColumnarCache import (build_columnar_cache,
+                                               remove_columnar_cache)
+from app.static.ml_model.DataIngestion import (UPLOAD_CHUNK_BYTES,
+                                               append_chunk, ingest_csv_file,
+                                               is_supported_upload,
+                                               save_upload, staged_size)
+from app.static.ml_model.DatasetProfiler import profile_dataset
+from app.static.ml_model.DataWashing import profile_kept_columns
 from app.static.ml_model.GPT_result_analysation import (
     kmeans_assistant, linear_regression_assistant, svm_classifier_assistant)
 from app.static.ml_model.GPTassistant import GPT_column_suggestion
-from app.static.ml_model.K_means import kmeans_function
-from app.static.ml_model.LinearRegression import LinearRegressionTraining
-from app.static.ml_model.SVM_classifier import SVMClassifier
+from app.static.ml_model.TargetSuggester import (CONFIDENCE_THRESHOLD,
+                                                 position_to_training_index,
+                                                 suggest_for_upload)
+from app.tasks import run_in_background
+from app.training import (FINISHED_STATUSES, cancel_job, dataset_profile,
+                          enqueue_training, job_state)
 
 main = Blueprint('main', __name__)#flask blueprint definied and stored
 
+RECENT_JOBS = 20  # unfinished and failed training jobs listed on the results page
+JOB_EVENTS_POLL_SECONDS = 1.0  # how often a job event stream checks the job, unless set in the config
+
 @main.route('/')
 def index():
     # login to dashboard
@@ -126,45 +143,24 @@ def upload():
         if not file:
             flash("No file selected.", "danger")
             return redirect(url_for('main.upload'))
+        if not is_supported_upload(file.filename):
+            flash("Please upload a CSV file (.csv, .csv.gz, .csv.zst or a .zip with one CSV).", "danger")
+            return redirect(url_for('main.upload'))
 
-        # Save file securely
+        # Stream the file to disk; hash, row count, schema and GPT sample come from the same pass
         filename = secure_filename(file.filename)
-        upload_folder = os.path.join('data', 'uploads', str(current_user.id))
-        os.makedirs(upload_folder, exist_ok=True)
+        upload_folder = _upload_folder(current_user.id)
         filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
-
-        df = pd.read_csv(filepath)
-
-        # Slice the dataset and prepare JSON
-        data_slice = df.head(10).values.tolist()  # Only send top 10 rows to GPT
-        gpt_input = {
-            "data": data_slice,
-            "label_column": -1  # Dummy label column, GPT will analyze all
-        }
+        try:
+            ingestion = save_upload(file.stream, filepath)
+        except ValueError as e:
+            _remove_upload_files(filepath)
+            flash(str(e), "danger")
+            return redirect(url_for('main.upload'))
+        uploaded_data = _register_upload(filename, filepath, ingestion['file_size'], ingestion)
 
-        # Use your GPT_column_suggestion function
-        suggested_target_col = GPT_column_suggestion(json.dumps(gpt_input))
-
-
-        # Get file stats
-        file_stats = os.stat(filepath)
-        file_size = file_stats.st_size  # in bytes
-        upload_date = datetime.fromtimestamp(file_stats.st_ctime)
-
-        # Save upload info to database
-        uploaded_data = UploadedData(
-            filename=filename,
-            file_path=filepath,
-            file_size=file_size,
-            user_id=current_user.id,
-            upload_date=datetime.now()
-        )
-        db.session.add(uploaded_data)
-        db.session.commit()
         flash(f" The {filename} is successfully uploaded.", "success")
-        flash(f"The suggested target index from AI is {suggested_target_col}", "info")
-        return redirect(url_for('main.select_model', data_id=uploaded_data.id ,suggested_col=suggested_target_col, column_names=list(df.columns), filename=filename ))
+        return redirect(url_for('main.select_model', data_id=uploaded_data.id, column_names=ingestion['columns'], filename=filename ))
 
     return render_template(
         'upload.html',
@@ -172,6 +168,254 @@ def upload():
         heading='Upload File and Content Display'
     )
 
+def _upload_folder(user_id):
+    upload_folder = os.path.join('data', 'uploads', str(user_id))
+    os.makedirs(upload_folder, exist_ok=True)
+    return upload_folder
+
+
+def _remove_upload_files(filepath):
+    if os.path.exists(filepath):
+        os.remove(filepath)
+    remove_columnar_cache(filepath)
+
+
+def _register_upload(filename, filepath, file_size, ingestion=None):
+    # Shared by the single-request and the chunked upload once the bytes are on disk.
+    # The dataset is saved right away; the Arrow copy, the profile and the target
+    # suggestion each read the whole file, so they run in the background and
+    # select_model polls processing_status and suggestion_status for them.
+    # <ingestion> holds the save_upload statistics, None when they are still to compute.
+    uploaded_data = UploadedData(
+        filename=filename,
+        file_path=filepath,
+        file_size=file_size,
+        user_id=current_user.id,
+        upload_date=datetime.now(),
+        processing_status='processing',
+        suggestion_status='pending'
+    )
+    if ingestion is not None:
+        _set_ingestion_stats(uploaded_data, ingestion)
+    db.session.add(uploaded_data)
+    db.session.commit()
+    run_in_background(_process_upload, uploaded_data.id, ingestion['sample'] if ingestion else None)
+    return uploaded_data
+
+
+def _set_ingestion_stats(dataset, ingestion):
+    dataset.content_hash = ingestion['content_hash']
+    dataset.row_count = ingestion['row_count']
+    dataset.column_schema = json.dumps(ingestion['schema'])
+
+
+def _process_upload(dataset_id, sample=None):
+    # Background task: ingestion statistics when the upload did not compute them
+    # (<sample> is None), then the Arrow copy training reads from, the column
+    # profile and the target suggestion, asking GPT when the local one is unsure
+    dataset = db.session.get(UploadedData, dataset_id)
+    if dataset is None:
+        return  # deleted before processing started
+    filepath = dataset.file_path
+    try:
+        if sample is None:
+            # One streaming pass over the assembled file for hash, rows, schema and sample
+            ingestion = ingest_csv_file(filepath)
+            _set_ingestion_stats(dataset, ingestion)
+            db.session.commit()
+            sample = ingestion['sample']
+        # Convert once to the columnar copy that training reads from
+        arrow_path = build_columnar_cache(filepath)
+        # Profile every column once, later runs read the profile instead of rescanning
+        profile = profile_dataset(filepath)
+        # Statistical target guess on a row sample, it takes milliseconds
+        local_target, confidence = suggest_for_upload(filepath, profile)
+    except Exception as e:
+        print(f"Processing failed for dataset {dataset_id}: {e}")
+        db.session.rollback()
+        dataset = db.session.get(UploadedData, dataset_id)
+        if dataset is not None:
+            dataset.processing_status = 'failed'
+            dataset.processing_error = str(e)
+            dataset.suggestion_status = 'failed'
+            db.session.commit()
+        return
+
+    db.session.expire_all()
+    dataset = db.session.get(UploadedData, dataset_id)
+    if dataset is None:
+        remove_columnar_cache(filepath)  # deleted while processing
+        return
+    confident = local_target is not None and confidence >= CONFIDENCE_THRESHOLD
+    dataset.columnar_path = arrow_path
+    if DatasetProfile.query.filter_by(dataset_id=dataset_id, has_header=True).first() is None:
+        db.session.add(DatasetProfile(
+            dataset_id=dataset_id,
+            has_header=True,
+            row_count=dataset.row_count,
+            columns_json=json.dumps(profile)
+        ))
+    dataset.processing_status = 'ready'
+    dataset.suggestion_confidence = confidence
+    if confident:
+        dataset.suggestion_status = 'ready'
+        dataset.suggested_target = local_target
+        dataset.suggestion_source = 'local'
+    db.session.commit()
+
+    if not confident:
+        # Only the top 10 rows are sent to GPT, with the column profile for context
+        gpt_input = {
+            "data": sample,
+            "label_column": -1,  # Dummy label column, GPT will analyze all
+            "columns": _profile_summary(profile)
+        }
+        _suggest_target_column(dataset_id, json.dumps(gpt_input), profile, local_target)
+
+
+def _suggest_target_column(dataset_id, gpt_input, profile, local_target=None):
+    # Background task: store GPT's target column suggestion on the dataset,
+    # keeping the unsure local guess when GPT gives no answer. GPT answers
+    # with a position in the uploaded file, stored as the training index
+    try:
+        suggested_target_col = position_to_training_index(profile, GPT_column_suggestion(gpt_input))
+    except Exception as e:
+        print(f"Target column suggestion failed for dataset {dataset_id}: {e}")
+        suggested_target_col = None
+
+    dataset = db.session.get(UploadedData, dataset_id)
+    if dataset is None:
+        return  # deleted while GPT was thinking
+    if suggested_target_col is not None:
+        dataset.suggested_target = suggested_target_col
+        dataset.suggestion_source = 'gpt'
+    elif local_target is not None:
+        dataset.suggested_target = local_target
+        dataset.suggestion_source = 'local'
+    dataset.suggestion_status = 'ready' if dataset.suggested_target is not None else 'failed'
+    db.session.commit()
+
+
+@main.route('/datasets/<int:data_id>/suggestion', methods=['GET'])
+@login_required
+def target_suggestion(data_id):
+    # Polled by select_model until the background suggestion is no longer pending
+    dataset = UploadedData.query.get_or_404(data_id)
+    if dataset.user_id != current_user.id:
+        abort(404)
+    return jsonify(data_id=dataset.id, status=dataset.suggestion_status, suggested_col=dataset.suggested_target,
+                   source=dataset.suggestion_source, confidence=dataset.suggestion_confidence,
+                   processing=dataset.processing_status, processing_error=dataset.processing_error)
+
+
+@main.route('/upload/chunked', methods=['POST'])
+@login_required
+def chunked_upload_init():
+    # Start a resumable upload: the client then PUTs the file in chunks and calls complete
+    payload = request.get_json(silent=True) or {}
+    filename = secure_filename(payload.get('filename') or '')
+    total_size = payload.get('size')
+    if not is_supported_upload(filename):
+        return jsonify(error="Only CSV files (.csv, .csv.gz, .csv.zst or a .zip with one CSV) can be uploaded."), 400
+    # JSON true/false load as bool, a subclass of int
+    if not isinstance(total_size, int) or isinstance(total_size, bool) or total_size <= 0:
+        return jsonify(error="The file size must be a positive number of bytes."), 400
+
+    staging_folder = os.path.join(_upload_folder(current_user.id), '.staging')
+    os.makedirs(staging_folder, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    upload_session = UploadSession(
+        id=upload_id,
+        user_id=current_user.id,
+        filename=filename,
+        total_size=total_size,
+        staging_path=os.path.join(staging_folder, upload_id + '.part'),
+        created_at=datetime.now()
+    )
+    open(upload_session.staging_path, 'wb').close()
+    db.session.add(upload_session)
+    db.session.commit()
+    return jsonify(upload_id=upload_id, offset=0, chunk_size=UPLOAD_CHUNK_BYTES), 201
+
+
+def _get_upload_session(upload_id):
+    upload_session = UploadSession.query.get_or_404(upload_id)
+    if upload_session.user_id != current_user.id:
+        abort(404)
+    return upload_session
+
+
+@main.route('/upload/chunked/<upload_id>', methods=['GET'])
+@login_required
+def chunked_upload_status(upload_id):
+    # The acknowledged offset is the size of the staging file, the client resumes from there
+    upload_session = _get_upload_session(upload_id)
+    return jsonify(upload_id=upload_id, offset=staged_size(upload_session.staging_path),
+                   size=upload_session.total_size, chunk_size=UPLOAD_CHUNK_BYTES)
+
+
+@main.route('/upload/chunked/<upload_id>', methods=['PUT'])
+@login_required
+def chunked_upload_put(upload_id):
+    upload_session = _get_upload_session(upload_id)
+    offset = request.args.get('offset', type=int)
+    current_offset = staged_size(upload_session.staging_path)
+    if offset != current_offset:
+        return jsonify(error="The chunk does not start at the acknowledged offset.", offset=current_offset), 409
+
+    try:
+        # request.stream is read piece by piece, the chunk is never held in memory
+        new_offset = append_chunk(request.stream, upload_session.staging_path, offset, upload_session.total_size)
+    except ValueError as e:
+        return jsonify(error=str(e), offset=current_offset), 413
+    except (ClientDisconnected, OSError):
+        # The connection dropped mid-chunk: the partial chunk was cut off, the client resumes from the offset
+        return jsonify(error="The chunk was interrupted before it was complete.", offset=current_offset), 400
+    return jsonify(offset=new_offset)
+
+
+@main.route('/upload/chunked/<upload_id>', methods=['DELETE'])
+@login_required
+def chunked_upload_abort(upload_id):
+    upload_session = _get_upload_session(upload_id)
+    if os.path.exists(upload_session.staging_path):
+        os.remove(upload_session.staging_path)
+    db.session.delete(upload_session)
+    db.session.commit()
+    return jsonify(upload_id=upload_id, aborted=True)
+
+
+@main.route('/upload/chunked/<upload_id>/complete', methods=['POST'])
+@login_required
+def chunked_upload_complete(upload_id):
+    upload_session = _get_upload_session(upload_id)
+    offset = staged_size(upload_session.staging_path)
+    if offset != upload_session.total_size:
+        return jsonify(error="The upload is not complete yet.", offset=offset), 409
+
+    filename = upload_session.filename
+    filepath = os.path.join(_upload_folder(current_user.id), filename)
+    os.replace(upload_session.staging_path, filepath)
+    db.session.delete(upload_session)
+    # The chunks were never parsed, the background processing reads the assembled file
+    uploaded_data = _register_upload(filename, filepath, offset)
+
+    flash(f" The {filename} is successfully uploaded.", "success")
+    return jsonify(redirect=url_for('main.select_model', data_id=uploaded_data.id, filename=filename))
+
+def _profile_summary(profile):
+    # Compact per-column view of the profile for the GPT prompt
+    return [{
+        'name': str(column['name']),
+        'dtype_guess': column['dtype_guess'],
+        'null_ratio': round(column['null_ratio'], 3),
+        'cardinality': column['cardinality'],
+        'min': column['min'],
+        'max': column['max'],
+        'mean': column['mean']
+    } for column in profile]
+
+
 @main.route('/delete/<int:file_id>', methods=['POST'])
 @login_required
 def delete_file(file_id):
@@ -181,8 +425,7 @@ def delete_file(file_id):
         flash("Unauthorized action.", "danger")
         return redirect(url_for('main.dashboard', user_id=current_user.id))
 
-    if os.path.exists(dataset.file_path):
-        os.remove(dataset.file_path)
+    _remove_upload_files(dataset.file_path)
 
     db.session.delete(dataset)
     db.session.commit()
@@ -201,7 +444,7 @@ def select_model():
     upload_path = os.path.join('data', 'uploads', str(user_id))#fl stored in the data/uploads/<user_id>/csv we ar joining t
     try:
         file_list = os.listdir(upload_path)
-        file_list = [f for f in file_list if f.endswith('.csv')] #csv only check
+        file_list = [f for f in file_list if is_supported_upload(f)] #csv only check, compressed csv included
     except FileNotFoundError:
         file_list = []
 
@@ -218,63 +461,135 @@ def select_model():
 
         
         filepath = os.path.join(upload_path, selected_file)
-        raw_df = pd.read_csv(filepath, header=0 if has_header else None)
-        cleaned_df = DataWashing(raw_df)
-
-        if model_type == 'SVM':
-            result, success = SVMClassifier(cleaned_df, target_index, precision_mode)
-        elif model_type == 'linear_regression':
-            result, success = LinearRegressionTraining(cleaned_df, target_index, precision_mode)
-        elif model_type == 'KMeans':
-            result, success = kmeans_function(cleaned_df, precision_mode)
+        # Training runs on the worker pool, the results page follows the job
+        job = enqueue_training(user_id, selected_file, filepath, model_type, precision_mode, target_index,
+                               has_header)
+        if job.status == 'failed':
+            flash("Model execution failed: " + job.error, "danger")
         else:
-            result, success = {'error': 'Unsupported model type'}, False
-
-        if success:
-            # Save result to DB (optional)
-            model_run = ModelRun(
-                user_id=user_id,
-                filename=selected_file,
-                model_type=model_type,
-                precision_mode=precision_mode,
-                target_index=target_index,
-                has_header=has_header,
-                graph_path=result.get('plot_path'),
-                
-                result_json=json.dumps(result),
-                created_at=datetime.now()
-            )
-            db.session.add(model_run)
-            db.session.commit()
-            flash("Model execution success: " + str(result), "success")
-            return redirect(url_for('main.results'))
-
-        else:
-            flash("Model execution failed: " + str(result), "danger")
-
-        return redirect(url_for(
-            'main.dashboard',
-            filename=selected_file,
-            user_id=user_id,
-            model_type=model_type,
-            precision_mode=precision_mode,
-            target_index=target_index,
-            has_header=int(has_header)
-        ))
+            flash(f"Training job {job.id} ({model_type}): {job.status}.", "success")
+        return redirect(url_for('main.results'))
+
+    # Show the stored profile of the dataset that was just uploaded
+    dataset = None
+    profile_columns = []
+    data_id = request.args.get('data_id', type=int)
+    if data_id:
+        dataset = UploadedData.query.filter_by(id=data_id, user_id=user_id).first()
+        # Still being profiled in the background, target_suggestion.js reloads the page once done
+        processing = dataset is not None and dataset.processing_status in ('processing', 'failed')
+        profile = None if processing else dataset_profile(dataset, True)
+        if profile:
+            kept = profile_kept_columns(profile)
+            for column in profile:
+                column = dict(column)
+                column['training_index'] = kept.index(column['name']) if column['name'] in kept else None
+                profile_columns.append(column)
 
     return render_template('select_model.html',
                            heading='Select Model Parameters', 
                            form=form,
-                           file_list=file_list)
+                           file_list=file_list,
+                           selected_file=dataset.filename if dataset else None,
+                           dataset=dataset,
+                           profile_columns=profile_columns)
 
 @main.route('/results', methods=['GET'])
 @login_required
 def results():
     user_id = current_user.id
     results = ModelRun.query.filter_by(user_id=user_id).order_by(ModelRun.created_at.desc()).all()
+    # Jobs still training or failed; succeeded ones are listed as their runs
+    jobs = TrainingJob.query.filter(TrainingJob.user_id == user_id, TrainingJob.status != 'succeeded') \
+        .order_by(TrainingJob.created_at.desc()).limit(RECENT_JOBS).all()
     return render_template('results.html',
                            heading='Your Model Insights',
-                           results=results)
+                           results=results,
+                           jobs=jobs)
+
+
+@main.route('/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def training_job_status(job_id):
+    # The job's current state, see job_events for updates as they happen
+    return jsonify(**job_state(_get_training_job(job_id)))
+
+
+def _get_training_job(job_id):
+    job = TrainingJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        abort(404)
+    return job
+
+
+def _job_event_stream(job_ids):
+    # Server-sent events with the state of every job of <job_ids> whenever it
+    # changes (status, grid search progress), until they are all finished
+    poll_seconds = current_app.config.get('JOB_EVENTS_POLL_SECONDS', JOB_EVENTS_POLL_SECONDS)
+
+    def events():
+        sent = {}
+        following = list(job_ids)
+        while following:
+            db.session.expire_all()
+            changed = False
+            for job_id in list(following):
+                job = db.session.get(TrainingJob, job_id)
+                state = json.dumps(job_state(job)) if job is not None else None
+                if state is not None and state != sent.get(job_id):
+                    yield f"data: {state}\n\n"
+                    sent[job_id] = state
+                    changed = True
+                if job is None or job.status in FINISHED_STATUSES:
+                    following.remove(job_id)
+            if not following:
+                return
+            if not changed:
+                yield ": \n\n"  # keeps the connection open, and notices a client that left
+            db.session.remove()  # do not hold a connection while waiting
+            time.sleep(poll_seconds)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@main.route('/jobs/events', methods=['GET'])
+@login_required
+def active_job_events():
+    # Events of several of the user's jobs on one connection, the ones given
+    # as job_id arguments or else all queued and running ones, so the results
+    # page follows them all without using up the browser's few connections
+    # per host. A job that finished meanwhile still sends its state once.
+    query = TrainingJob.query.filter(TrainingJob.user_id == current_user.id)
+    job_ids = request.args.getlist('job_id', type=int)
+    if job_ids:
+        query = query.filter(TrainingJob.id.in_(job_ids))
+    else:
+        query = query.filter(TrainingJob.status.in_(('queued', 'running')))
+    jobs = query.order_by(TrainingJob.created_at.desc()).limit(RECENT_JOBS).all()
+    return _job_event_stream([job.id for job in jobs])
+
+
+@main.route('/jobs/<int:job_id>/events', methods=['GET'])
+@login_required
+def job_events(job_id):
+    # Events of one job, see _job_event_stream
+    return _job_event_stream([_get_training_job(job_id).id])
+
+
+@main.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_training_job(job_id):
+    job = _get_training_job(job_id)
+    if job.status in FINISHED_STATUSES:
+        flash(f"Training job {job.id} is {job.status} already.", "warning")
+    else:
+        job = cancel_job(job)
+        if job.status == 'cancelled':
+            flash(f"Training job {job.id} cancelled.", "success")
+        else:
+            flash(f"Training job {job.id} is being stopped.", "info")
+    return redirect(url_for('main.results'))
 
 @main.route('/share_result/<int:run_id>', methods=['POST'])
 @login_required
@@ -324,6 +639,7 @@ def view_result(run_id):
             metrics = json.loads(run.result_json)
         except:
             pass
+    washing_report = json.loads(run.washing_report) if run.washing_report else None
      # Use model-specific GPT assistant to interpret the results
     if run.model_type=='linear_regression':
         gpr_answer=linear_regression_assistant(run.result_json)
@@ -336,7 +652,8 @@ def view_result(run_id):
         flash("model name not found")
         gpr_answer = "N/A"
 
-    return render_template('view.html', run=run, metrics=metrics,gpr_answer=gpr_answer)
+    return render_template('view.html', run=run, metrics=metrics,gpr_answer=gpr_answer,
+                           washing_report=washing_report)
 
 @main.route('/shared_with_me')
 @login_required
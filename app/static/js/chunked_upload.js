@@ -0,0 +1,124 @@
+// Resumable upload for large CSV files.
+// Files above the form's threshold are sent in chunks (init / put-chunk / complete)
+// instead of one multipart POST, so a network hiccup only repeats the current chunk.
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.querySelector('form[data-chunked-url]');
+    if (!form) {
+        return;
+    }
+    const fileInput = form.querySelector('input[type="file"]');
+    const alertBox = document.getElementById('alertBox');
+    const progress = document.getElementById('uploadProgress');
+    const progressBar = progress.querySelector('.progress-bar');
+    const initUrl = form.dataset.chunkedUrl;
+    const threshold = parseInt(form.dataset.chunkedThreshold, 10);
+    const csrfToken = form.querySelector('input[name="csrf_token"]').value;
+    const maxRetries = 5;
+
+    function showAlert(type, message) {
+        alertBox.classList.remove('d-none', 'alert-success', 'alert-danger', 'alert-warning');
+        alertBox.classList.add('alert-' + type);
+        alertBox.textContent = message;
+    }
+
+    function setProgress(offset, size) {
+        const percent = size ? Math.floor(offset * 100 / size) : 0;
+        progressBar.style.width = percent + '%';
+        progressBar.textContent = percent + '%';
+    }
+
+    async function request(method, url, body, contentType) {
+        const headers = {'X-CSRFToken': csrfToken};
+        if (contentType) {
+            headers['Content-Type'] = contentType;
+        }
+        const response = await fetch(url, {method: method, headers: headers, body: body, credentials: 'same-origin'});
+        const data = await response.json().catch(() => ({}));
+        return {status: response.status, ok: response.ok, data: data};
+    }
+
+    // Remember the upload id per file so a reload of the page can resume it
+    function storageKey(file) {
+        return 'chunked-upload:' + [file.name, file.size, file.lastModified].join(':');
+    }
+
+    async function startOrResume(file) {
+        const saved = localStorage.getItem(storageKey(file));
+        if (saved) {
+            const status = await request('GET', initUrl + '/' + saved);
+            if (status.ok) {
+                return status.data;
+            }
+            localStorage.removeItem(storageKey(file));
+        }
+        const init = await request('POST', initUrl, JSON.stringify({filename: file.name, size: file.size}),
+                                   'application/json');
+        if (!init.ok) {
+            throw new Error(init.data.error || 'The upload could not be started.');
+        }
+        localStorage.setItem(storageKey(file), init.data.upload_id);
+        return init.data;
+    }
+
+    async function uploadFile(file) {
+        const session = await startOrResume(file);
+        const sessionUrl = initUrl + '/' + session.upload_id;
+        let offset = session.offset;
+        let retries = 0;
+        setProgress(offset, file.size);
+
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + session.chunk_size);
+            let result;
+            try {
+                result = await request('PUT', sessionUrl + '?offset=' + offset, chunk, 'application/octet-stream');
+            } catch (networkError) {
+                result = {ok: false, status: 0, data: {}};
+            }
+
+            if (result.ok) {
+                offset = result.data.offset;
+                retries = 0;
+                setProgress(offset, file.size);
+                continue;
+            }
+            if (result.status === 409 && typeof result.data.offset === 'number') {
+                // The server is ahead or behind us: continue from its acknowledged offset
+                offset = result.data.offset;
+                continue;
+            }
+            if (result.status !== 0 || ++retries > maxRetries) {
+                throw new Error(result.data.error || 'The upload was interrupted, please try again to resume it.');
+            }
+            // Network hiccup: wait, ask the server where we are and resume from there
+            await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+            const status = await request('GET', sessionUrl).catch(() => null);
+            if (status && status.ok) {
+                offset = status.data.offset;
+            }
+        }
+
+        const complete = await request('POST', sessionUrl + '/complete');
+        localStorage.removeItem(storageKey(file));
+        if (!complete.ok) {
+            throw new Error(complete.data.error || 'The upload could not be completed.');
+        }
+        return complete.data.redirect;
+    }
+
+    form.addEventListener('submit', async function(event) {
+        const file = fileInput.files[0];
+        if (!file || file.size < threshold) {
+            return; // Small files keep using the regular form post
+        }
+        event.preventDefault();
+        form.querySelectorAll('button').forEach(button => button.disabled = true);
+        progress.classList.remove('d-none');
+        try {
+            window.location = await uploadFile(file);
+        } catch (error) {
+            showAlert('danger', error.message);
+            form.querySelectorAll('button').forEach(button => button.disabled = false);
+        }
+    });
+});
@@ -53,7 +53,13 @@ document.getElementById('fileUpload').addEventListener('change', function(event)
             alertBox.textContent = 'The file content preview is as below.';
             alertBox.classList.remove('d-none');
         };
-        reader.readAsText(file);
+        // Only the start of the file is needed for the preview, large files are never read whole
+        reader.readAsText(file.slice(0, 64 * 1024));
+    } else if (file && /\.(csv\.gz|csv\.zst|zip)$/i.test(file.name)) {
+        // Compressed CSVs are accepted as they are, the server decompresses them on the fly
+        alertBox.classList.add('alert-success');
+        alertBox.textContent = 'Compressed CSV selected, no preview is available.';
+        alertBox.classList.remove('d-none');
     } else if (file) {
         // If not a valid CSV
         alertBox.classList.add('alert-warning');
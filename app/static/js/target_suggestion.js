@@ -0,0 +1,52 @@
+// The target column suggestion comes from column statistics or, when they are unsure,
+// from GPT in the background after the upload.
+// Poll its JSON endpoint until it is ready and prefill the target index with it.
+// The column profile is computed in the background too: reload the page once it is done.
+document.addEventListener('DOMContentLoaded', function() {
+    const box = document.getElementById('targetSuggestion');
+    if (!box) {
+        return;
+    }
+    const targetInput = document.getElementById('target_index');
+    const pollInterval = 1500;
+    const maxPolls = 120; // give up after about three minutes
+
+    function show(status, suggestedCol, source) {
+        if (status === 'ready') {
+            const origin = source === 'local' ? 'column statistics' : 'AI';
+            box.textContent = 'The suggested target index from ' + origin + ' is ' + suggestedCol + '.';
+            if (targetInput && !targetInput.value) {
+                targetInput.value = suggestedCol;
+            }
+        } else if (status === 'failed') {
+            box.textContent = 'No target column suggestion is available for this file.';
+        }
+    }
+
+    async function poll(attempt) {
+        let data;
+        try {
+            const response = await fetch(box.dataset.url, {credentials: 'same-origin'});
+            data = await response.json();
+        } catch (error) {
+            data = {status: 'pending'};
+        }
+        if (box.dataset.processing === 'processing' && data.processing && data.processing !== 'processing') {
+            window.location.reload();
+            return;
+        }
+        if (data.status !== 'pending') {
+            show(data.status, data.suggested_col, data.source);
+        } else if (attempt < maxPolls) {
+            setTimeout(() => poll(attempt + 1), pollInterval);
+        } else {
+            show('failed');
+        }
+    }
+
+    if (box.dataset.status === 'pending' || box.dataset.processing === 'processing') {
+        poll(0);
+    } else {
+        show(box.dataset.status, box.dataset.suggestedCol, box.dataset.source);
+    }
+});
@@ -0,0 +1,153 @@
+"""
+ClusterSelection.py
+
+Choosing the number of clusters for KMeans.
+
+A grid search over n_clusters refits every k from scratch, several times
+per cross-validation fold, and scores by negative inertia, which always
+favours more clusters. select_k sweeps k instead:
+
+- The candidate ks (K_SELECTION_MODES) are split in contiguous runs, one
+  per worker, and the runs advance one k at a time in parallel.
+- Each k after the first of a run starts from the centroids of the
+  previous k plus one new centroid drawn the k-means++ way, so it
+  converges in a few iterations with a single init.
+- Each k is scored by the silhouette of a stratified sample of the rows
+  (Silhouette, higher is better), or all are compared at the end by the
+  elbow of their inertia curve (the k farthest below the line from the
+  first to the last).
+
+The chosen k is then refitted with the precision mode's number of inits,
+keeping the warm-started model when the refits do no better.
+"""
+import math
+import time
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.cluster import KMeans
+from sklearn.metrics import pairwise_distances_argmin_min
+
+from app.static.ml_model.Silhouette import silhouette
+
+K_SELECTION_RANDOM_STATE = 42  # inits and silhouette samples drawn the same way every run
+
+# Precision mode -> candidate ks, how they are compared, rows the
+# silhouette is computed on and inits the chosen k is refitted with
+K_SELECTION_MODES = {
+    'Fast': {'k_values': range(2, 12), 'method': 'elbow', 'silhouette_rows': 2_000, 'refit_n_init': 1},
+    'Balance': {'k_values': range(2, 21), 'method': 'silhouette', 'silhouette_rows': 5_000, 'refit_n_init': 5},
+    'High Precision': {'k_values': range(2, 51), 'method': 'silhouette', 'silhouette_rows': 10_000,
+                       'refit_n_init': 10},
+}
+
+
+def _add_centroid(X, centers, rng):
+    # <centers> and one row of <X> drawn with probability proportional to its
+    # squared distance to the nearest of them (one k-means++ step)
+    _, distances = pairwise_distances_argmin_min(X, centers)
+    weights = distances ** 2
+    total = weights.sum()
+    row = rng.choice(len(X), p=weights / total) if total > 0 else rng.integers(len(X))
+    return np.vstack([centers, X[row]])
+
+
+def _fit_k(X, k, centers, seed, max_iter, silhouette_rows):
+    # Fit <k> clusters warm-started from the centroids of k - 1 (k-means++
+    # when there are none); returns the centroids, the inertia and the
+    # sampled silhouette (None when not asked for or undefined)
+    init = 'k-means++' if centers is None else _add_centroid(X, centers, np.random.default_rng(seed))
+    model = KMeans(n_clusters=k, init=init, n_init=1, max_iter=max_iter, random_state=seed).fit(X)
+    score = silhouette(X, model.labels_, silhouette_rows, K_SELECTION_RANDOM_STATE)[0] if silhouette_rows else None
+    return model.cluster_centers_, model.inertia_, score
+
+
+def elbow_k(k_values, inertias):
+    """
+    The k at the elbow of the inertia curve: the one farthest below the
+    straight line from the first to the last point, both axes scaled to
+    [0, 1]. The first k when there are fewer than three.
+    """
+    k = np.asarray(k_values, dtype=float)
+    inertia = np.asarray(inertias, dtype=float)
+    if len(k) < 3 or inertia[0] == inertia[-1]:
+        return int(k[0])
+    x = (k - k[0]) / (k[-1] - k[0])
+    y = (inertia - inertia[-1]) / (inertia[0] - inertia[-1])
+    return int(k[np.argmax(1 - x - y)])
+
+
+def _k_runs(k_values, n_jobs):
+    # Split the ks into one contiguous run per worker
+    runs = min(effective_n_jobs(n_jobs), len(k_values))
+    size = math.ceil(len(k_values) / runs)
+    return [k_values[start:start + size] for start in range(0, len(k_values), size)]
+
+
+def select_k(X, precision_mode, n_jobs=-1, progress=None, time_budget=None, max_iter=300):
+    """
+    Choose and fit the KMeans model of <precision_mode> (see
+    K_SELECTION_MODES) for the rows of <X>. <progress> is called like a
+    ModelSearch progress callback after every round of ks, and no new
+    round starts once <time_budget> seconds are spent; the best k fitted
+    so far is used then.
+
+    Returns (model, info): info holds the keys recorded in result_json,
+    the ModelSearch summary ones and k_selection_method and selected_k.
+    """
+    mode = K_SELECTION_MODES[precision_mode]
+    k_values = [k for k in mode['k_values'] if k < len(X)] or [min(2, len(X))]
+    started = time.perf_counter()
+
+    runs = _k_runs(k_values, n_jobs)
+    silhouette_rows = mode['silhouette_rows'] if mode['method'] == 'silhouette' else None
+    run_centers = [None] * len(runs)
+    centers, inertias, scores = {}, {}, {}
+    stopped_early = False
+    with Parallel(n_jobs=len(runs)) as parallel:
+        for step in range(max(len(run) for run in runs)):
+            if centers and time_budget is not None and time.perf_counter() - started >= time_budget:
+                stopped_early = True
+                break
+            tasks = [(index, run[step]) for index, run in enumerate(runs) if step < len(run)]
+            fitted = parallel(delayed(_fit_k)(X, k, run_centers[index], K_SELECTION_RANDOM_STATE + k, max_iter,
+                                              silhouette_rows)
+                              for index, k in tasks)
+            for (index, k), (k_centers, inertia, score) in zip(tasks, fitted):
+                run_centers[index] = centers[k] = k_centers
+                inertias[k] = inertia
+                if score is not None:
+                    scores[k] = score
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                eta = elapsed / len(centers) * (len(k_values) - len(centers))
+                if time_budget is not None:
+                    eta = max(min(eta, time_budget - elapsed), 0.0)
+                progress(len(centers), len(k_values), max(scores.values()) if scores else None, eta)
+
+    fitted_ks = sorted(centers)
+    if scores:
+        method, best_k = 'silhouette', max(scores, key=scores.get)
+    else:
+        method, best_k = 'elbow', elbow_k(fitted_ks, [inertias[k] for k in fitted_ks])
+    # The sweep only kept centroids, from which the model converges at once
+    model = KMeans(n_clusters=best_k, init=centers[best_k], n_init=1, max_iter=max_iter,
+                   random_state=K_SELECTION_RANDOM_STATE).fit(X)
+    refits = 1
+    if mode['refit_n_init'] > 1:
+        refit = KMeans(n_clusters=best_k, n_init=mode['refit_n_init'], max_iter=max_iter,
+                       random_state=K_SELECTION_RANDOM_STATE).fit(X)
+        refits += mode['refit_n_init']
+        if refit.inertia_ < model.inertia_:
+            model = refit
+
+    return model, {
+        'search_strategy': 'k_sweep',
+        'search_candidates': len(fitted_ks),
+        'search_fits': len(fitted_ks) + refits,
+        'search_seconds': round(time.perf_counter() - started, 1),
+        'search_time_budget': time_budget,
+        'search_stopped_early': stopped_early,
+        'k_selection_method': method,
+        'selected_k': best_k,
+    }
@@ -0,0 +1,301 @@
+"""
+ColumnarCache.py
+
+Columnar, memory-mappable copy of every uploaded CSV.
+
+Each upload is converted once into an Arrow IPC file (Feather v2) stored
+next to the CSV. Training then loads from that file through a memory map:
+only the requested columns are touched and numeric columns without missing
+values are handed to pandas without a copy, so repeat runs on the same
+dataset never pay the CSV parsing cost again.
+
+The copy of a compressed upload is itself compressed (ARROW_COMPRESSION),
+so it does not undo the disk and page cache savings of the upload. Its
+record batches are decompressed as they are read, which costs a copy of
+the columns loaded instead of the zero-copy load of an uncompressed copy.
+
+The conversion streams the CSV in chunks and never holds the whole file
+(compressed uploads are decompressed on the fly through open_csv):
+a first pass works out the dtype pd.read_csv would infer for the full
+file, a second pass parses every chunk with those dtypes and appends it
+to the Arrow file as a record batch.
+
+load_compact_dataset loads the same data in the smallest dtypes the
+stored column profile allows (float32, small integers, categoricals),
+iter_dataset streams it in chunks for files that do not fit in memory.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import feather
+
+from app.static.ml_model.DataIngestion import compression_of, open_csv
+
+READ_CHUNK_ROWS = 100_000  # CSV rows parsed per chunk while converting
+CATEGORY_RATIO = 0.5       # strings with at most this share of distinct values load as categorical
+FLOAT32_EXACT_INT = 2 ** 24  # largest integer float32 still stores exactly
+PYTHON_STR_BYTES = 49      # size of a Python str object besides its characters
+ARROW_COMPRESSION = 'zstd'  # codec of the Arrow copy of compressed uploads
+
+_EMPTY = 'empty'  # per-chunk dtype of a column chunk without any value
+_BOOLEAN = pd.BooleanDtype()  # booleans with missing values
+_WITH_MISSING = {
+    'empty': pd.api.types.pandas_dtype('float64'),
+    'int64': pd.api.types.pandas_dtype('float64'),
+    'bool': _BOOLEAN,
+}  # dtype of a column once missing values join it
+
+_ARROW_TYPES = {
+    'int64': pa.int64(),
+    'float64': pa.float64(),
+    'bool': pa.bool_(),
+    'boolean': pa.bool_(),
+    'object': pa.string(),
+}
+
+
+def columnar_path(csv_path, has_header=True) -> str:
+    """
+    Location of the Arrow copy of <csv_path>. Files read without a header
+    parse differently, so they get their own copy.
+    """
+    return csv_path + ('.arrow' if has_header else '.noheader.arrow')
+
+
+def _chunk_dtype(series):
+    # dtype of one chunk of a column, with two cases pandas reads otherwise:
+    # _EMPTY for a chunk without any value (float64 to pandas) and _BOOLEAN
+    # for booleans with missing values (object holding True/False to pandas)
+    if series.isna().all():
+        return _EMPTY
+    if series.dtype == object and series.dropna().map(type).eq(bool).all():
+        return _BOOLEAN
+    return series.dtype
+
+
+def _merge_dtype(current, new):
+    # Reproduce pandas' whole-file inference from per-chunk dtypes
+    if current is None or current == new:
+        return new
+    if new == _EMPTY:
+        current, new = new, current
+    if current == _EMPTY:
+        # Missing values turn integers into floats and booleans into nullable booleans
+        return _WITH_MISSING.get(str(new), new)
+    if pd.api.types.is_bool_dtype(current) and pd.api.types.is_bool_dtype(new):
+        return _BOOLEAN
+    if (pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new)
+            and not pd.api.types.is_bool_dtype(current) and not pd.api.types.is_bool_dtype(new)):
+        return pd.api.types.pandas_dtype('float64')
+    return pd.api.types.pandas_dtype('object')
+
+
+def _resolve_dtypes(csv_path, header, chunk_rows) -> dict:
+    dtypes = {}
+    with open_csv(csv_path) as f:
+        for chunk in pd.read_csv(f, header=header, chunksize=chunk_rows):
+            for column in chunk.columns:
+                dtypes[column] = _merge_dtype(dtypes.get(column), _chunk_dtype(chunk[column]))
+    # Columns without any value are parsed as floats, like pandas does
+    return {column: _WITH_MISSING['empty'] if dtype == _EMPTY else dtype for column, dtype in dtypes.items()}
+
+
+def _arrow_schema(dtypes) -> pa.Schema:
+    fields = []
+    for column, dtype in dtypes.items():
+        arrow_type = _ARROW_TYPES.get(str(dtype)) or pa.from_numpy_dtype(dtype)
+        fields.append(pa.field(str(column), arrow_type))
+    return pa.schema(fields)
+
+
+def build_columnar_cache(csv_path, has_header=True, chunk_rows=READ_CHUNK_ROWS) -> str:
+    """
+    Convert <csv_path> into its Arrow copy and return the copy's path. The
+    copy of a compressed upload is compressed with ARROW_COMPRESSION.
+    """
+    header = 0 if has_header else None
+    dtypes = _resolve_dtypes(csv_path, header, chunk_rows)
+    schema = _arrow_schema(dtypes)
+    compression = ARROW_COMPRESSION if compression_of(csv_path) else None
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+
+    path = columnar_path(csv_path, has_header)
+    # A partial file of its own: the upload's background processing and a
+    # training worker may both build the copy, the last one replacing the other
+    fd, partial_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.part',
+                                        dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    try:
+        with open_csv(csv_path) as f, pa.OSFile(partial_path, 'wb') as sink, \
+                pa.ipc.new_file(sink, schema, options=options) as writer:
+            for chunk in pd.read_csv(f, header=header, chunksize=chunk_rows, dtype=dtypes):
+                chunk.columns = schema.names
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        os.replace(partial_path, path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return path
+
+
+def _is_fresh(path, csv_path) -> bool:
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+
+def _read_table(csv_path, has_header, columns, rows) -> pa.Table:
+    path = columnar_path(csv_path, has_header)
+    if not _is_fresh(path, csv_path):
+        build_columnar_cache(csv_path, has_header)
+
+    if columns is not None:
+        columns = [str(column) for column in columns]
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    if rows is not None:
+        table = table.take(pa.array(rows, type=pa.int64()))
+    return table
+
+
+def _to_frame(table, has_header) -> pd.DataFrame:
+    df = table.to_pandas(split_blocks=True)
+    for field in table.schema:
+        # Arrow hands missing strings and booleans back as None, pd.read_csv uses NaN
+        if (pa.types.is_string(field.type) or pa.types.is_boolean(field.type)) and table.column(field.name).null_count:
+            df[field.name] = df[field.name].where(df[field.name].notna(), np.nan)
+    if not has_header:
+        # Headerless CSVs are named by position, like pd.read_csv(header=None)
+        df.columns = [int(column) for column in df.columns]
+    return df
+
+
+def load_dataset(csv_path, has_header=True, columns=None, rows=None) -> pd.DataFrame:
+    """
+    Load <csv_path> from its Arrow copy, building the copy first if it is
+    missing or older than the CSV. <columns> restricts the load to the given
+    column names (or positions when the file has no header) and <rows> to
+    the given row positions, so a sample never materialises the whole file.
+
+    The result matches pd.read_csv on the decompressed CSV with
+    header=0 if has_header else None.
+    Columns loaded without a copy are backed by the read-only memory map, so
+    callers must copy before modifying values in place.
+    """
+    return _to_frame(_read_table(csv_path, has_header, columns, rows), has_header)
+
+
+def iter_dataset(csv_path, has_header=True, columns=None, chunk_rows=READ_CHUNK_ROWS):
+    """
+    load_dataset in frames of <chunk_rows> rows, indexed by their row
+    positions in the file. The Arrow copy is read a record batch at a time,
+    so at most one chunk is materialised, decompressed, at a time.
+    """
+    path = columnar_path(csv_path, has_header)
+    if not _is_fresh(path, csv_path):
+        build_columnar_cache(csv_path, has_header)
+    if columns is not None:
+        columns = [str(column) for column in columns]
+
+    start = 0
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        for table in _rechunk(batches, columns, chunk_rows):
+            df = _to_frame(table, has_header)
+            df.index = pd.RangeIndex(start, start + len(df))
+            start += len(df)
+            yield df
+
+
+def _rechunk(batches, columns, chunk_rows):
+    # Tables of <chunk_rows> rows (fewer for the last one) of <columns> out of
+    # record batches of any size, holding about one chunk and one batch
+    table = None
+    for batch in batches:
+        batch = pa.Table.from_batches([batch.select(columns) if columns is not None else batch])
+        table = batch if table is None else pa.concat_tables([table, batch])
+        while table.num_rows >= chunk_rows:
+            yield table.slice(0, chunk_rows)
+            table = table.slice(chunk_rows)
+    if table is not None and table.num_rows:
+        yield table
+
+
+def _compact_type(field, column_profile):
+    # Smallest Arrow type that holds the column as profiled, 'category' for
+    # repetitive strings, None to keep the stored type
+    if column_profile is None:
+        return None
+    low, high = column_profile['min'], column_profile['max']
+    if pa.types.is_integer(field.type) and low is not None:
+        if column_profile['null_ratio'] == 0:
+            for arrow_type in (pa.int8(), pa.int16(), pa.int32()):
+                info = np.iinfo(arrow_type.to_pandas_dtype())
+                if info.min <= low and high <= info.max:
+                    return arrow_type
+            return None
+        # pandas turns integers with missing values into floats anyway
+        return pa.float32() if max(abs(low), abs(high)) <= FLOAT32_EXACT_INT else None
+    if pa.types.is_floating(field.type) and low is not None:
+        return pa.float32() if max(abs(low), abs(high)) < np.finfo(np.float32).max else None
+    if pa.types.is_string(field.type) and column_profile['dtype_guess'] == 'string':
+        non_null = column_profile['count'] * (1 - column_profile['null_ratio'])
+        if not column_profile['cardinality_capped'] and column_profile['cardinality'] <= CATEGORY_RATIO * non_null:
+            return 'category'
+    return None
+
+
+def _default_nbytes(column) -> int:
+    # Memory pandas needs for <column> in its stored type: 8 or 1 bytes per
+    # number, and for strings a pointer plus a Python str object per value
+    if pa.types.is_string(column.type):
+        characters = pc.sum(pc.binary_length(column)).as_py() or 0
+        non_null = len(column) - column.null_count
+        return 8 * len(column) + PYTHON_STR_BYTES * non_null + characters
+    return len(column) * np.dtype(column.type.to_pandas_dtype()).itemsize
+
+
+def load_compact_dataset(csv_path, has_header, profile, columns=None, rows=None):
+    """
+    load_dataset with every column in the smallest dtype its DatasetProfile
+    allows: float32 for floats, the smallest integer type that holds the
+    column's range, and categorical for strings with few distinct values.
+    The casts happen on the Arrow side, so the wide columns are never built.
+
+    Returns (df, report) where report holds memory_bytes, the estimated
+    memory of the frame, and memory_saved_bytes, the difference with the
+    plain load_dataset frame.
+    """
+    table = _read_table(csv_path, has_header, columns, rows)
+    column_profiles = {str(column['name']): column for column in profile or []}
+
+    arrays = []
+    cast_names = []
+    default_bytes = kept_bytes = 0
+    for field, column in zip(table.schema, table.columns):
+        target = _compact_type(field, column_profiles.get(field.name))
+        nbytes = _default_nbytes(column)
+        default_bytes += nbytes
+        if target is None:
+            kept_bytes += nbytes
+        else:
+            column = pc.dictionary_encode(column) if target == 'category' else column.cast(target, safe=False)
+            cast_names.append(field.name)
+        arrays.append(column)
+    df = _to_frame(pa.Table.from_arrays(arrays, names=table.schema.names), has_header)
+
+    # Cast columns are numbers or categories, measuring them exactly is cheap
+    positions = [table.schema.names.index(name) for name in cast_names]
+    cast_bytes = sum(int(df.iloc[:, position].memory_usage(deep=True, index=False)) for position in positions)
+    memory_bytes = kept_bytes + cast_bytes
+    return df, {'memory_bytes': memory_bytes, 'memory_saved_bytes': default_bytes - memory_bytes}
+
+
+def remove_columnar_cache(csv_path):
+    for has_header in (True, False):
+        path = columnar_path(csv_path, has_header)
+        if os.path.exists(path):
+            os.remove(path)
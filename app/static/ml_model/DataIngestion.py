@@ -0,0 +1,294 @@
+"""
+DataIngestion.py
+
+Streaming ingestion for uploaded CSV files.
+
+The upload stream is copied to disk in fixed-size chunks while the same
+bytes are hashed and fed to an incremental CSV reader, so a single pass
+gives us the file hash, the row count, the column schema and the small
+row sample that is sent to GPT. No full DataFrame is built, memory use is
+bounded by CHUNK_SIZE whatever the size of the upload.
+
+Very large files go through the resumable upload API instead: the client
+sends them in chunks that are appended to a staging file, and the same
+ingestion pass runs once the staging file is complete.
+
+Uploads may be compressed (.csv.gz, .csv.zst or a .zip holding one CSV).
+They are stored as uploaded and decompressed on the fly by open_csv
+whenever the content is read; the hash and file size always describe the
+stored, compressed bytes.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import os
+import sys
+import zipfile
+
+import pandas as pd
+
+CHUNK_SIZE = 1024 * 1024  # bytes pulled from the upload stream per read
+SAMPLE_ROWS = 10          # rows kept for the GPT column suggestion
+UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024  # chunk size suggested to resumable upload clients
+
+# Accepted upload names and the compression each one implies
+UPLOAD_SUFFIXES = {
+    '.csv': None,
+    '.csv.gz': 'gzip',
+    '.csv.zst': 'zstd',
+    '.zip': 'zip',
+}
+
+# Very wide text cells must not abort the ingestion pass
+csv.field_size_limit(sys.maxsize)
+
+
+class _HashingTee(io.RawIOBase):
+    """
+    Read-through wrapper: every chunk read from <source> is hashed and,
+    when a <sink> is given, written to it before being handed to the reader.
+    """
+
+    def __init__(self, source, sink=None, chunk_size=CHUNK_SIZE):
+        self.source = source
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.source.read(min(len(buffer), self.chunk_size))
+        if not data:
+            return 0
+        size = len(data)
+        buffer[:size] = data
+        self.sha256.update(data)
+        self.bytes_read += size
+        if self.sink is not None:
+            self.sink.write(data)
+        return size
+
+    def drain(self):
+        # Consume whatever the CSV reader left behind so the copy is complete
+        buffer = bytearray(self.chunk_size)
+        while self.readinto(buffer):
+            pass
+
+
+def is_supported_upload(filename) -> bool:
+    return any(filename.lower().endswith(suffix) for suffix in UPLOAD_SUFFIXES)
+
+
+def compression_of(filename):
+    """
+    Compression of an upload from its name: None, 'gzip', 'zstd' or 'zip'.
+    """
+    for suffix, compression in UPLOAD_SUFFIXES.items():
+        if filename.lower().endswith(suffix):
+            return compression
+    return None
+
+
+def _zip_member(archive) -> str:
+    # The single CSV inside a zip upload, ignoring folders and macOS metadata
+    members = [info.filename for info in archive.infolist()
+               if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+    if len(members) != 1:
+        raise ValueError("A zip upload must contain exactly one CSV file.")
+    return members[0]
+
+
+def _decompressing_reader(raw, compression):
+    # Wrap a binary stream so reads return the decompressed CSV bytes
+    if compression is None:
+        return raw
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if compression == 'zstd':
+        import zstandard  # only needed for .zst uploads
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    if compression == 'zip':
+        archive = zipfile.ZipFile(raw)
+        return archive.open(_zip_member(archive))
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def open_csv(path):
+    """
+    Open a stored upload for reading, decompressing it on the fly. Returns a
+    binary file object with the plain CSV bytes; close it when done.
+    """
+    raw = open(path, 'rb')
+    try:
+        return _decompressing_reader(raw, compression_of(path))
+    except Exception:
+        raw.close()
+        raise
+
+
+def _sample_frame(header, rows) -> pd.DataFrame:
+    # Re-parse the handful of sampled rows with pandas so the sample and the
+    # schema get exactly the dtypes a full pd.read_csv would infer for them
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def _decode_errors(compression):
+    # Exceptions meaning the content is not what its name says
+    errors = (csv.Error, OSError, EOFError, zipfile.BadZipFile)
+    if compression == 'zstd':
+        import zstandard
+        errors += (zstandard.ZstdError,)
+    return errors
+
+
+def _parse_csv(binary, sample_rows):
+    # Incremental csv reader over a binary stream: header, sampled rows and row count
+    text = io.TextIOWrapper(binary, encoding='utf-8', errors='replace', newline='')
+    header = None
+    sampled = []
+    row_count = 0
+    for row in csv.reader(text):
+        if not row:
+            continue  # pandas skips blank lines as well
+        if header is None:
+            header = row
+            continue
+        if len(sampled) < sample_rows:
+            sampled.append(row)
+        row_count += 1
+    return header, sampled, row_count
+
+
+def ingest_csv_stream(stream, destination=None, chunk_size=CHUNK_SIZE, sample_rows=SAMPLE_ROWS,
+                      compression=None) -> dict:
+    """
+    Copy <stream> to <destination> (if given) chunk by chunk and, in the
+    same pass, collect the statistics we need about the CSV content.
+    <compression> ('gzip', 'zstd', 'zip' or None) describes the stream; the
+    bytes are copied and hashed as they are and only decompressed for parsing.
+
+    Returns a dict with:
+        file_size     : bytes read from the stream
+        content_hash  : hex SHA-256 of the raw bytes
+        row_count     : number of data rows (header and blank lines excluded)
+        columns       : column names as pandas would name them
+        schema        : [[column, dtype], ...] inferred from the sample
+        sample        : first <sample_rows> rows as a list of lists
+    """
+    sink = open(destination, 'wb') if destination is not None else None
+    try:
+        tee = _HashingTee(stream, sink, chunk_size)
+        try:
+            if compression == 'zip':
+                # A zip's directory sits at its end, so copy first and read the member afterwards
+                tee.drain()
+                parsed = None
+            else:
+                raw = io.BufferedReader(tee, buffer_size=chunk_size)
+                parsed = _parse_csv(_decompressing_reader(raw, compression), sample_rows)
+        except _decode_errors(compression) as e:
+            tee.drain()
+            raise ValueError(f"The uploaded file is not a valid CSV file: {e}") from e
+        tee.drain()
+        if sink is not None:
+            # The copy is on disk before the upload is reported as stored
+            sink.flush()
+            os.fsync(sink.fileno())
+    finally:
+        if sink is not None:
+            sink.close()
+
+    if parsed is None:
+        if destination is None:
+            stream.seek(0)
+        try:
+            with zipfile.ZipFile(destination if destination is not None else stream) as archive:
+                with archive.open(_zip_member(archive)) as member:
+                    parsed = _parse_csv(member, sample_rows)
+        except _decode_errors(compression) as e:
+            raise ValueError(f"The uploaded file is not a valid zip file: {e}") from e
+
+    header, sampled, row_count = parsed
+    if header is None:
+        raise ValueError("The uploaded file is empty.")
+
+    sample_df = _sample_frame(header, sampled)
+    return {
+        'file_size': tee.bytes_read,
+        'content_hash': tee.sha256.hexdigest(),
+        'row_count': row_count,
+        'columns': list(sample_df.columns),
+        'schema': [[str(column), str(dtype)] for column, dtype in sample_df.dtypes.items()],
+        'sample': sample_df.values.tolist(),
+    }
+
+
+def ingest_csv_file(filepath, chunk_size=CHUNK_SIZE, sample_rows=SAMPLE_ROWS) -> dict:
+    """
+    Same statistics as ingest_csv_stream for a file that is already on disk.
+    """
+    with open(filepath, 'rb') as f:
+        return ingest_csv_stream(f, None, chunk_size, sample_rows, compression_of(filepath))
+
+
+def save_upload(stream, filepath, chunk_size=CHUNK_SIZE, sample_rows=SAMPLE_ROWS) -> dict:
+    """
+    Stream an upload to <filepath> through the ingestion pass. The bytes go to
+    a temporary ".part" file that is only renamed once the copy is complete,
+    so a crashed upload never leaves a truncated CSV behind.
+    """
+    partial_path = filepath + '.part'
+    try:
+        stats = ingest_csv_stream(stream, partial_path, chunk_size, sample_rows, compression_of(filepath))
+        os.replace(partial_path, filepath)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return stats
+
+
+def staged_size(staging_path) -> int:
+    """
+    Bytes already staged for a resumable upload, i.e. the acknowledged offset.
+    """
+    return os.path.getsize(staging_path) if os.path.exists(staging_path) else 0
+
+
+def append_chunk(stream, staging_path, offset, total_size, chunk_size=CHUNK_SIZE) -> int:
+    """
+    Append one chunk of a resumable upload to its staging file, reading
+    <stream> piece by piece so memory stays flat whatever the chunk size.
+    The chunk must start at <offset> and must not go past <total_size>;
+    a rejected or interrupted chunk (the stream raising, e.g. on a client
+    disconnect) leaves the staging file as it was. The data is synced
+    to disk before the new offset is returned, so an acknowledged offset
+    survives a crash.
+    """
+    with open(staging_path, 'r+b') as staging:
+        staging.seek(offset)
+        written = offset
+        try:
+            while True:
+                data = stream.read(chunk_size)
+                if not data:
+                    break
+                if written + len(data) > total_size:
+                    raise ValueError("The chunk goes past the declared file size.")
+                staging.write(data)
+                written += len(data)
+        except Exception:
+            staging.truncate(offset)
+            raise
+        staging.flush()
+        os.fsync(staging.fileno())
+    return written
@@ -1,50 +1,571 @@
-import pandas as pd
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
 import numpy as np
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import LabelEncoder
+import pandas as pd
+import pyarrow as pa
+
+WASHING_VERSION = 1  # bump whenever the washing rules change their output
+WASHING_WORKERS = min(4, os.cpu_count() or 1)  # processes washing the columns of wide frames
+PARALLEL_MIN_COLUMNS = 200  # narrower frames are washed serially
+BLOCKS_PER_WORKER = 4       # column blocks per worker, so uneven columns balance out
+
+
+def profile_kept_columns(profile) -> list:
+    # Columns DataWashing keeps when it follows <profile>: mostly-missing and date columns go
+    return [column['name'] for column in profile if column['dtype_guess'] not in ('empty', 'datetime')]
+
+
+# Kind of every value, as the washing rules see it
+_OTHER, _NUMBER, _TEXT, _TIMESTAMP = 0, 1, 2, 3
+
+
+def _kind_of(value):
+    # Python-level fallback for object columns holding mixed value types
+    if isinstance(value, (int, float)):
+        return _OTHER if pd.isna(value) else _NUMBER
+    if isinstance(value, str):
+        return _TEXT if value.strip() != '' else _OTHER
+    if isinstance(value, pd.Timestamp):
+        return _TIMESTAMP
+    return _OTHER
+
+
+def _value_kinds(series) -> np.ndarray:
+    """
+    Kind code of every value of <series>: a number (int, float or bool, NaN
+    excluded), a non-blank string, a timestamp or anything else. Decided
+    from the dtype where possible, so only object columns mixing several
+    value types fall back to one Python-level pass.
+    """
+    not_null = series.notna().to_numpy()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Classify the categories once and spread them through the codes
+        category_kinds = _value_kinds(pd.Series(series.cat.categories))
+        codes = series.cat.codes.to_numpy()
+        return np.where(codes >= 0, category_kinds[codes], _OTHER).astype(np.int8)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return np.where(not_null, _TIMESTAMP, _OTHER).astype(np.int8)
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return np.where(not_null, _NUMBER, _OTHER).astype(np.int8)
+
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred == 'empty':
+        return np.full(len(series), _OTHER, dtype=np.int8)
+    if inferred == 'string':
+        # Only the distinct strings are stripped, the codes spread the result
+        codes, uniques = pd.factorize(series)
+        text = pd.Index(uniques).str.strip().to_numpy() != ''
+        return np.where(codes >= 0, np.where(text, _TEXT, _OTHER)[codes], _OTHER).astype(np.int8)
+    return np.fromiter((_kind_of(value) for value in series.to_numpy(dtype=object)),
+                       dtype=np.int8, count=len(series))
+
+
+def _imputed_dtype(dtype):
+    # Compact columns stay compact: float32 and small integers (exact in float32)
+    # come out of the imputer as float32, everything else as float64
+    if dtype == np.float32 or (np.issubdtype(dtype, np.integer) and dtype.itemsize <= 2):
+        return np.float32
+    return np.float64
+
+
+def _ratio(mask, rows, total):
+    # Share of the rows still in play that satisfy <mask>, nan when none are left
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.int64((mask & rows).sum()) / total
+
+
+def _profile_kind(column_profile):
+    # How washing treats a column, from its DatasetProfiler stats: 'numeric',
+    # 'string', 'keep' or None to drop it
+    if column_profile['null_ratio'] > 0.5:
+        return None
+    if column_profile['numeric_ratio'] > 0.5:
+        return 'numeric'
+    if column_profile['string_ratio'] > 0.5:
+        return 'string'
+    if column_profile['datetime_ratio'] > 0.5:
+        return None
+    return 'keep'
+
+
+def _data_kind(missing, kinds, rows):
+    # _profile_kind with the shares measured on the rows still in play, from
+    # the column's missing mask and value kinds
+    total = np.int64(rows.sum())
+    # Check for too much missing values (over 50%)
+    if _ratio(missing, rows, total) > 0.5:
+        return None
+    if _ratio(kinds == _NUMBER, rows, total) > 0.5:
+        return 'numeric'
+    if _ratio(kinds == _TEXT, rows, total) > 0.5:
+        return 'string'
+    # Date feature handling (drop column)
+    if _ratio(kinds == _TIMESTAMP, rows, total) > 0.5:
+        return None
+    return 'keep'
+
+
+def _numeric_dtype(series):
+    # dtype a numeric column is washed to
+    if isinstance(series.dtype, np.dtype) and pd.api.types.is_numeric_dtype(series):
+        return _imputed_dtype(series.dtype)
+    return np.float64
+
+
+def _numeric_values(series, dtype):
+    # The column as numbers in <dtype>, values that are not numbers become NaN
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=dtype, na_value=np.nan)
+
+
+def _column_facts(series, kind=None, kinds=None) -> dict:
+    """
+    Everything washing needs from one column that does not depend on the
+    other columns, for a column of <kind> ('numeric' or 'string'), or for
+    all kinds it could still become when <kind> is None (no profile: the
+    decision depends on the rows earlier columns keep). <kinds> are the
+    value kinds when already known.
+
+    Holds 'missing' and 'kinds' when undecided, 'dtype' and 'values' for a
+    numeric column, and for a string column 'codes' (rank of every
+    non-blank string among the column's sorted distinct ones, -1 elsewhere)
+    and 'classes'.
+    """
+    facts = {}
+    if kind is None:
+        facts['missing'] = series.isna().to_numpy()
+        kinds = facts['kinds'] = _value_kinds(series)
+    if kind == 'numeric' or (kind is None and (kinds == _NUMBER).any()):
+        facts['dtype'] = _numeric_dtype(series)
+        facts['values'] = _numeric_values(series, facts['dtype'])
+    if kind == 'string' or (kind is None and (kinds == _TEXT).any()):
+        text = (kinds if kinds is not None else _value_kinds(series)) == _TEXT
+        codes = np.full(len(series), -1, dtype=np.int64)
+        codes[text], classes = pd.factorize(series.to_numpy(dtype=object)[text], sort=True)
+        facts['codes'], facts['classes'] = codes, classes
+    return facts
+
+
+def _block_facts(block, kinds) -> list:
+    # _column_facts of every column of the frame <block>, run in a washing
+    # worker, each with the 'seconds' it took. <kinds> holds the profiled kind
+    # per column, None when undecided.
+    all_facts = []
+    for position, kind in enumerate(kinds):
+        started = time.perf_counter()
+        facts = _column_facts(block.iloc[:, position], kind)
+        facts['seconds'] = time.perf_counter() - started
+        all_facts.append(facts)
+    return all_facts
+
+
+def _shared_block_facts(name, kinds) -> list:
+    # _block_facts of the column block the parent wrote to the shared memory
+    # segment <name> as an Arrow IPC stream; only the parent unlinks it
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        block = pa.ipc.open_stream(pa.py_buffer(shm.buf)).read_all().to_pandas()
+        facts = _block_facts(block, kinds)
+        del block
+        for column_facts in facts:
+            # Numeric values can be views into the segment, copy them out before it closes
+            if 'values' in column_facts:
+                column_facts['values'] = column_facts['values'].copy()
+        return facts
+    finally:
+        shm.close()
+
+
+def _share_block(block):
+    # Write <block> to a new shared memory segment as an Arrow IPC stream.
+    # None when Arrow cannot type its columns (mixed object columns), the
+    # block is then pickled to the worker instead.
+    try:
+        table = pa.Table.from_pandas(block, preserve_index=False)
+    except (pa.ArrowException, ValueError):
+        return None
+    size_probe = pa.MockOutputStream()
+    with pa.ipc.new_stream(size_probe, table.schema) as writer:
+        writer.write_table(table)
+    shm = shared_memory.SharedMemory(create=True, size=max(size_probe.size(), 1))
+    with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)), table.schema) as writer:
+        writer.write_table(table)
+    return shm
+
+
+_pools = {}
+_pools_lock = threading.Lock()  # background tasks wash from several threads
+
+
+def _washing_pool(workers) -> ProcessPoolExecutor:
+    # Long-lived pool per worker count; spawned, since forking a threaded web worker is unsafe
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                  mp_context=multiprocessing.get_context('spawn'))
+        return _pools[workers]
 
-def DataWashing(df) -> pd.DataFrame:
-    if isinstance(df, pd.DataFrame):
-        clean_data_set = df.copy()
-    else:
+
+def _parallel_facts(df, kinds, workers):
+    # _column_facts of every column of <df>, computed by <workers> processes on
+    # blocks of adjacent columns handed over in shared memory ({} for columns
+    # a profile already keeps or drops). None when the pool broke or a block
+    # could not be handed over (shared memory full, Arrow or pickling
+    # errors), washing then stays serial.
+    positions = [position for position, kind in enumerate(kinds) if kind in ('numeric', 'string', None)]
+    blocks = [block for block in np.array_split(positions, workers * BLOCKS_PER_WORKER) if len(block)]
+    segments = []
+    futures = []
+    try:
+        pool = _washing_pool(workers)
+        for block in blocks:
+            frame = df.iloc[:, block]
+            block_kinds = [kinds[position] for position in block]
+            shm = _share_block(frame)
+            if shm is None:
+                futures.append(pool.submit(_block_facts, frame, block_kinds))
+            else:
+                segments.append(shm)
+                futures.append(pool.submit(_shared_block_facts, shm.name, block_kinds))
+            del frame
+        all_facts = [{} for _ in kinds]
+        for block, future in zip(blocks, futures):
+            for position, facts in zip(block, future.result()):
+                all_facts[position] = facts
+        return all_facts
+    except (BrokenProcessPool, OSError, pa.ArrowException, pickle.PicklingError) as e:
+        for future in futures:
+            future.cancel()
+        if isinstance(e, BrokenProcessPool):
+            with _pools_lock:
+                _pools.pop(workers, None)
+        return None
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+
+def _memory_bytes(df) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+class _WashingReport:
+    # Collects DataWasher.report while a fit runs
+
+    RULES = {'numeric': 'non_numeric', 'string': 'non_text'}  # row filter of each column type
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.columns = []
+        self.rows_in = 0
+        self.rows_out = 0
+        self.memory_before = 0
+
+    def column(self, name, kind, seconds, rows_dropped=0, reason=None):
+        self.columns.append({
+            'name': name,
+            'type': kind or 'dropped',
+            'seconds': round(seconds, 6),
+            'rows_dropped': int(rows_dropped),
+            'drop_reason': reason,
+        })
+
+    def to_dict(self) -> dict:
+        rows_dropped = dict.fromkeys(self.RULES.values(), 0)
+        columns_dropped = {'mostly_missing': [], 'datetime': []}
+        for column in self.columns:
+            if column['type'] in self.RULES:
+                rows_dropped[self.RULES[column['type']]] += column['rows_dropped']
+            elif column['type'] == 'dropped':
+                columns_dropped.setdefault(column['drop_reason'], []).append(column['name'])
+        return {
+            'rows_in': int(self.rows_in),
+            'rows_out': int(self.rows_out),
+            'rows_dropped': rows_dropped,
+            'columns_in': len(self.columns),
+            'columns_out': sum(column['type'] != 'dropped' for column in self.columns),
+            'columns_dropped': columns_dropped,
+            'memory_before_bytes': int(self.memory_before),
+            'memory_after_bytes': None,  # set once the washed data exists
+            'seconds': round(time.perf_counter() - self.started, 6),
+            'columns': self.columns,
+        }
+
+
+def _drop_reason(column_profile=None, missing=None, rows=None) -> str:
+    # Why a column is dropped, from its profile or its missing mask on <rows>
+    if column_profile is not None:
+        return 'mostly_missing' if column_profile['null_ratio'] > 0.5 else 'datetime'
+    return 'mostly_missing' if _ratio(missing, rows, np.int64(rows.sum())) > 0.5 else 'datetime'
+
+
+class DataWasher:
+    """
+    The washing rules as a fitted transformer. fit() decides per column
+    whether it is numeric, string encoded, kept as is or dropped, and keeps
+    what transform() needs to clean other rows the same way: the mean of
+    each numeric column and the classes of each encoded string column.
+
+    transform() keeps every row by default, filling missing numbers with
+    the fitted mean and encoding unseen or missing strings as -1. With
+    drop_invalid=True it drops those rows instead, as washing the training
+    data does, so fit(df).transform(df, drop_invalid=True) equals
+    fit_transform(df). fit_chunks() fits on a stream of chunks instead, for
+    data that does not fit in memory.
+
+    The fitted state is plain JSON (to_json / from_json) and is stored with
+    every ModelRun, as is the report of the last fit: the time, detected
+    type and rows dropped of every column, rows dropped per rule, dropped
+    columns with the reason, and memory before and after washing.
+    """
+
+    def __init__(self, profile=None):
+        # <profile> is the per-column list from DatasetProfiler, see fit()
+        self.profile = profile
+        self.steps = None   # one dict per kept column, in output order, once fitted
+        self.report = None  # washing report of the last fit
+
+    def fit(self, df, workers=WASHING_WORKERS):
+        self._fit(df, workers)
+        return self
+
+    def fit_transform(self, df, workers=WASHING_WORKERS) -> pd.DataFrame:
+        started = time.perf_counter()
+        rows, kept, washed = self._fit(df, workers)
+        clean_data_set = _assemble(df, rows, kept, washed)
+        self.report['memory_after_bytes'] = _memory_bytes(clean_data_set)
+        self.report['seconds'] = round(time.perf_counter() - started, 6)
+        return clean_data_set
+
+    def _fit(self, df, workers=WASHING_WORKERS):
+        # When a profile is given, the missing ratio and type shares are read from
+        # it instead of being recomputed, so they describe the whole file rather
+        # than the rows left by earlier columns.
+        #
+        # Columns are decided one after the other, each on the rows that earlier
+        # columns kept, but rows are tracked in a boolean mask instead of re-slicing
+        # the frame, values are typed per column with vectorised checks, and the
+        # input is only read: the output is assembled once from the final mask.
+        #
+        # The per-column work (_column_facts) does not depend on the row mask, so
+        # on wide frames it runs on <workers> processes first; only the cheap mask
+        # updates stay sequential and the output is the same as serial washing.
+        report = _WashingReport()
+        report.rows_in, report.memory_before = len(df), _memory_bytes(df)
+        column_profiles = {column['name']: column for column in self.profile} if self.profile else {}
+        profiled = [_profile_kind(column_profiles[column]) if column in column_profiles else None
+                    for column in df.columns]
+        all_facts = None
+        if workers > 1 and df.shape[1] >= PARALLEL_MIN_COLUMNS:
+            # Profiled columns that are dropped are marked, None leaves a column undecided
+            block_kinds = [('drop' if kind is None else kind) if column in column_profiles else None
+                           for column, kind in zip(df.columns, profiled)]
+            all_facts = _parallel_facts(df, block_kinds, workers)
+
+        rows = np.ones(len(df), dtype=bool)
+        kept = []        # positions of the columns in the output
+        washed = {}      # position -> full-length array replacing the raw column
+        steps = []
+        for position, column in enumerate(df.columns):
+            started = time.perf_counter()
+            rows_before = np.int64(rows.sum())
+            missing = None
+            if all_facts is not None:
+                facts = all_facts[position]
+                missing = facts.get('missing')
+                kind = profiled[position] if column in column_profiles \
+                    else _data_kind(missing, facts['kinds'], rows)
+            elif column in column_profiles:
+                kind = profiled[position]
+                facts = _column_facts(df.iloc[:, position], kind) if kind in ('numeric', 'string') else {}
+            else:
+                series = df.iloc[:, position]
+                kinds = _value_kinds(series)
+                missing = series.isna().to_numpy()
+                kind = _data_kind(missing, kinds, rows)
+                facts = _column_facts(series, kind, kinds) if kind in ('numeric', 'string') else {}
+            if kind is None:
+                report.column(column, None, facts.get('seconds', 0) + time.perf_counter() - started,
+                              reason=_drop_reason(column_profiles.get(column), missing, rows))
+                continue
+
+            # Numeric feature handling
+            if kind == 'numeric':
+                # Rows with non-numeric values are dropped, so the mean is only
+                # needed to fill the gaps of rows transformed later
+                values = facts['values']
+                rows &= ~np.isnan(values)
+                washed[position] = values
+                mean = float(values[rows].mean(dtype=np.float64)) if rows.any() else float('nan')
+                steps.append({'name': column, 'kind': 'numeric', 'dtype': np.dtype(facts['dtype']).name,
+                              'mean': mean})
+
+            # String feature handling
+            elif kind == 'string':
+                # Drop rows with non-string values, then encode on the rows left at this
+                # point: only the classes still present are kept and the ranks renumbered
+                codes = facts['codes']
+                rows &= codes >= 0
+                present = np.zeros(len(facts['classes']), dtype=bool)
+                present[codes[rows]] = True
+                ranks = np.cumsum(present) - 1
+                washed[position] = np.where(rows, ranks[codes], 0)
+                steps.append({'name': column, 'kind': 'string', 'classes': list(facts['classes'][present])})
+
+            else:
+                steps.append({'name': column, 'kind': 'keep'})
+
+            kept.append(position)
+            report.column(column, kind, facts.get('seconds', 0) + time.perf_counter() - started,
+                          rows_before - rows.sum())
+
+        self.steps = steps
+        report.rows_out = rows.sum()
+        self.report = report.to_dict()
+        return rows, kept, washed
+
+    def fit_chunks(self, chunks):
+        """
+        Fit on the frames in <chunks> as if they were one frame, holding one
+        chunk at a time. The columns are decided from the profile, which the
+        chunked mode therefore needs; means and class vocabularies are
+        accumulated chunk by chunk.
+        """
+        if not self.profile:
+            raise ValueError("Fitting in chunks needs the dataset profile")
+        column_profiles = {column['name']: column for column in self.profile}
+
+        report = _WashingReport()
+        steps = None
+        for chunk in chunks:
+            report.rows_in += len(chunk)
+            report.memory_before += _memory_bytes(chunk)
+            if steps is None:
+                steps = []
+                for position, column in enumerate(chunk.columns):
+                    column_profile = column_profiles.get(column)
+                    kind = _profile_kind(column_profile) if column_profile is not None else None
+                    reason = None
+                    if kind is None:
+                        reason = _drop_reason(column_profile) if column_profile is not None else 'not_profiled'
+                    # Time and dropped rows are summed over the chunks into the report entry
+                    report.column(column, kind, 0.0, reason=reason)
+                    entry = report.columns[-1]
+                    if kind == 'numeric':
+                        dtype = np.dtype(_numeric_dtype(chunk.iloc[:, position])).name
+                        steps.append({'name': column, 'kind': kind, 'dtype': dtype, 'total': 0.0, 'count': 0,
+                                      'entry': entry})
+                    elif kind == 'string':
+                        steps.append({'name': column, 'kind': kind, 'vocabulary': set(), 'entry': entry})
+                    elif kind == 'keep':
+                        steps.append({'name': column, 'kind': kind, 'entry': entry})
+
+            # Same row filtering as _fit, restricted to this chunk
+            rows = np.ones(len(chunk), dtype=bool)
+            for step in steps:
+                started = time.perf_counter()
+                rows_before = rows.sum()
+                series = chunk[step['name']]
+                if step['kind'] == 'numeric':
+                    values = _numeric_values(series, np.dtype(step['dtype']))
+                    rows &= ~np.isnan(values)
+                    step['total'] += float(values[rows].sum(dtype=np.float64))
+                    step['count'] += int(rows.sum())
+                elif step['kind'] == 'string':
+                    rows &= _value_kinds(series) == _TEXT
+                    step['vocabulary'].update(pd.unique(series.to_numpy(dtype=object)[rows]))
+                step['entry']['seconds'] += time.perf_counter() - started
+                step['entry']['rows_dropped'] += int(rows_before - rows.sum())
+            report.rows_out += int(rows.sum())
+        if steps is None:
+            raise ValueError("No chunks to fit on")
+
+        for step in steps:
+            entry = step.pop('entry')
+            entry['seconds'] = round(entry['seconds'], 6)
+            if step['kind'] == 'numeric':
+                total, count = step.pop('total'), step.pop('count')
+                step['mean'] = total / count if count else float('nan')
+            elif step['kind'] == 'string':
+                step['classes'] = sorted(step.pop('vocabulary'))
+        self.steps = steps
+        self.report = report.to_dict()
+        return self
+
+    def transform(self, df, drop_invalid=False) -> pd.DataFrame:
+        """
+        Clean <df>, which must have the fitted columns, with the fitted state.
+        Columns dropped at fit time are dropped, nothing is refitted.
+        """
+        if self.steps is None:
+            raise ValueError("DataWasher is not fitted")
+        rows = np.ones(len(df), dtype=bool)
+        kept = []
+        washed = {}
+        for step in self.steps:
+            if step['name'] not in df.columns:
+                raise ValueError(f"Column {step['name']!r} seen at fit time is missing")
+            position = df.columns.get_loc(step['name'])
+            series = df.iloc[:, position]
+            if step['kind'] == 'numeric':
+                values = _numeric_values(series, np.dtype(step['dtype']))
+                invalid = np.isnan(values)
+                if not drop_invalid:
+                    values = np.where(invalid, values.dtype.type(step['mean']), values)  # never writes into <df>
+                washed[position] = values
+            elif step['kind'] == 'string':
+                # Only non-blank strings were encoded, anything else is unseen
+                washed[position] = pd.Index(step['classes'], dtype=object).get_indexer(series.to_numpy(dtype=object))
+                invalid = washed[position] < 0
+            else:
+                invalid = None
+            if drop_invalid and invalid is not None:
+                rows &= ~invalid
+            kept.append(position)
+        return _assemble(df, rows, kept, washed)
+
+    def to_json(self) -> str:
+        return json.dumps({'version': WASHING_VERSION, 'steps': self.steps})
+
+    @classmethod
+    def from_json(cls, text):
+        washer = cls()
+        washer.steps = json.loads(text)['steps']
+        return washer
+
+
+def _assemble(df, rows, kept, washed) -> pd.DataFrame:
+    # The output frame: columns at <kept> positions, washed ones replaced, rows
+    # filtered by the combined row mask once
+    index = df.index if rows.all() else df.index[rows]
+    data = {}
+    for i, position in enumerate(kept):
+        if position in washed:
+            data[i] = washed[position][rows]
+        else:
+            # Raw columns keep their dtype, object columns are not re-inferred
+            raw = df.iloc[:, position]
+            data[i] = pd.Series(raw.array[rows], index=index, dtype=raw.dtype, copy=False)
+    clean_data_set = pd.DataFrame(data, index=index)
+    clean_data_set.columns = df.columns[kept]
+    return clean_data_set
+
+
+def DataWashing(df, profile=None) -> pd.DataFrame:
+    # Fit the washing rules on <df> (a DataFrame or a CSV path) and return the
+    # washed frame, see DataWasher for the fitted state
+    if not isinstance(df, pd.DataFrame):
         try:
-            clean_data_set = pd.read_csv(df)
+            df = pd.read_csv(df)
         except Exception as e:
             print(f"Data washing process crushed down with error: {e}")
             return None
-    
-    for column in clean_data_set.columns:
-        # Check for too much missing values (over 50%)
-        missing_ratio = clean_data_set[column].isna().mean()
-        if missing_ratio > 0.5:
-            clean_data_set.drop(column, axis=1, inplace=True)
-            continue
-            
-        # Check column type
-        numeric_count = clean_data_set[column].apply(lambda x: isinstance(x, (int, float)) and not pd.isna(x)).sum()
-        string_count = clean_data_set[column].apply(lambda x: isinstance(x, str) and x.strip() != '').sum()
-        total = len(clean_data_set[column])
-        
-        # Numeric feature handling
-        if numeric_count / total > 0.5:
-            # Convert to numeric, coerce errors to NaN
-            clean_data_set[column] = pd.to_numeric(clean_data_set[column], errors='coerce')
-            # Drop rows with non-numeric values
-            clean_data_set = clean_data_set[clean_data_set[column].notna()]
-            # Fill missing values
-            imputer = SimpleImputer(strategy='mean')
-            clean_data_set[column] = imputer.fit_transform(clean_data_set[[column]])
-            
-        # String feature handling
-        elif string_count / total > 0.5:
-            # Drop rows with non-string values
-            clean_data_set = clean_data_set[clean_data_set[column].apply(lambda x: isinstance(x, str) and x.strip() != '')]
-            # Encode string values
-            le = LabelEncoder()
-            clean_data_set[column] = le.fit_transform(clean_data_set[column])
-            
-        # Date feature handling (drop column)
-        elif clean_data_set[column].apply(lambda x: isinstance(x, pd.Timestamp)).sum() / total > 0.5:
-            clean_data_set.drop(column, axis=1, inplace=True)
-            
-    return clean_data_set
+    return DataWasher(profile).fit_transform(df)
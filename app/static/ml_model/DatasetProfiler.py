@@ -0,0 +1,192 @@
+"""
+DatasetProfiler.py
+
+One-pass, bounded-memory column profiler.
+
+The profiler consumes a dataset chunk by chunk (the record batches of the
+Arrow copy built at upload time) and keeps only running aggregates per
+column: null / numeric / string / datetime counts, min, max, sum, a capped
+set of distinct values and a fixed-size reservoir sample that the
+histogram is drawn from at the end. The result is a list of plain dicts
+that is stored as JSON on DatasetProfile and read back by DataWashing, the
+target-column suggestion and the select_model page.
+"""
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.static.ml_model.ColumnarCache import build_columnar_cache, columnar_path
+
+CARDINALITY_LIMIT = 10_000  # distinct values tracked per column before giving up
+HISTOGRAM_BINS = 10
+RESERVOIR_SIZE = 10_000     # numeric values kept per column for the histogram
+TOP_VALUES = 10             # most frequent values reported for string columns
+
+# Same 50% thresholds as DataWashing
+TYPE_THRESHOLD = 0.5
+MISSING_THRESHOLD = 0.5
+
+
+class _ColumnStats:
+
+    def __init__(self, name, position, seed):
+        self.name = name
+        self.position = position
+        self.storage_dtype = None
+        self.total = 0
+        self.nulls = 0
+        self.numeric = 0
+        self.strings = 0
+        self.datetimes = 0
+        self.minimum = None
+        self.maximum = None
+        self.sum = 0.0
+        self.values = Counter()
+        self.capped = False
+        self.reservoir = np.empty(0)
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, series):
+        self.storage_dtype = str(series.dtype)
+        self.total += len(series)
+        non_null = series.dropna()
+        self.nulls += len(series) - len(non_null)
+
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            # DataWashing counts bools as numbers too (isinstance(True, int))
+            self._update_numbers(non_null.to_numpy(dtype=np.float64))
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            self.datetimes += len(non_null)
+        elif pd.api.types.infer_dtype(non_null, skipna=True) in ('string', 'empty'):
+            # Text columns straight from the CSV: only str values, no per-value checks needed
+            self.strings += int(non_null.str.strip().ne('').sum())
+        else:
+            is_string = non_null.map(type).eq(str)
+            self.strings += int(non_null[is_string].str.strip().ne('').sum())
+            others = non_null[~is_string]
+            is_number = others.map(lambda x: isinstance(x, (int, float)))
+            self._update_numbers(others[is_number].to_numpy(dtype=np.float64))
+            self.datetimes += int(others.map(lambda x: isinstance(x, pd.Timestamp)).sum())
+
+        self._update_values(non_null)
+
+    def _update_numbers(self, values):
+        self.numeric += len(values)
+        if len(values):
+            self._update_range(values)
+            self._update_reservoir(values)
+
+    def _update_range(self, values):
+        low, high = float(values.min()), float(values.max())
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+        self.sum += float(values.sum())
+
+    def _update_reservoir(self, values):
+        # Vectorised algorithm R: item i of the stream replaces a random slot
+        # with probability RESERVOIR_SIZE / (i + 1)
+        free = RESERVOIR_SIZE - len(self.reservoir)
+        if free > 0:
+            self.reservoir = np.concatenate([self.reservoir, values[:free]])
+            self.seen += len(values[:free])
+            values = values[free:]
+        if len(values):
+            slots = self.rng.integers(0, self.seen + np.arange(len(values)) + 1)
+            keep = slots < RESERVOIR_SIZE
+            self.reservoir[slots[keep]] = values[keep]
+            self.seen += len(values)
+
+    def _update_values(self, non_null):
+        if self.capped:
+            return
+        self.values.update(non_null.value_counts().to_dict())
+        if len(self.values) > CARDINALITY_LIMIT:
+            self.capped = True
+            self.values = Counter()
+
+    def _histogram(self):
+        if self.numeric and len(self.reservoir):
+            counts, edges = np.histogram(self.reservoir, bins=HISTOGRAM_BINS,
+                                         range=(self.minimum, self.maximum))
+            # Scale the reservoir counts back up to the whole column
+            scale = self.numeric / len(self.reservoir)
+            return {'edges': edges.tolist(), 'counts': np.round(counts * scale).astype(int).tolist()}
+        if self.values:
+            top = self.values.most_common(TOP_VALUES)
+            return {'values': [str(value) for value, _ in top], 'counts': [int(count) for _, count in top]}
+        return None
+
+    def to_dict(self):
+        total = self.total or 1
+        null_ratio = self.nulls / total
+        numeric_ratio = self.numeric / total
+        string_ratio = self.strings / total
+        datetime_ratio = self.datetimes / total
+
+        if null_ratio > MISSING_THRESHOLD:
+            dtype_guess = 'empty'
+        elif numeric_ratio > TYPE_THRESHOLD:
+            dtype_guess = 'numeric'
+        elif string_ratio > TYPE_THRESHOLD:
+            dtype_guess = 'string'
+        elif datetime_ratio > TYPE_THRESHOLD:
+            dtype_guess = 'datetime'
+        else:
+            dtype_guess = 'mixed'
+
+        return {
+            'name': self.name,
+            'position': self.position,
+            'storage_dtype': self.storage_dtype,
+            'count': self.total,
+            'dtype_guess': dtype_guess,
+            'null_ratio': null_ratio,
+            'numeric_ratio': numeric_ratio,
+            'string_ratio': string_ratio,
+            'datetime_ratio': datetime_ratio,
+            'cardinality': CARDINALITY_LIMIT if self.capped else len(self.values),
+            'cardinality_capped': self.capped,
+            'min': self.minimum,
+            'max': self.maximum,
+            'mean': self.sum / self.numeric if self.numeric else None,
+            'histogram': self._histogram(),
+        }
+
+
+def profile_chunks(chunks, seed=42) -> list:
+    """
+    Profile an iterable of DataFrame chunks that share the same columns.
+    Each chunk is seen exactly once.
+    """
+    stats = None
+    for chunk in chunks:
+        if stats is None:
+            stats = [_ColumnStats(name, position, seed + position)
+                     for position, name in enumerate(chunk.columns)]
+        for column_stats, (_, series) in zip(stats, chunk.items()):
+            column_stats.update(series)
+    return [column_stats.to_dict() for column_stats in stats or []]
+
+
+def _arrow_batches(path, has_header):
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            chunk = reader.get_batch(i).to_pandas()
+            if not has_header:
+                chunk.columns = [int(column) for column in chunk.columns]
+            yield chunk
+
+
+def profile_dataset(csv_path, has_header=True) -> list:
+    """
+    Profile an uploaded CSV from its Arrow copy, batch by batch.
+    """
+    path = columnar_path(csv_path, has_header)
+    if not os.path.exists(path):
+        build_columnar_cache(csv_path, has_header)
+    return profile_chunks(_arrow_batches(path, has_header))
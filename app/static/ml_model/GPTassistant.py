@@ -42,8 +42,11 @@ def GPT_column_suggestion(input:str):
         "You are given an input JSON object that represents a slice of a larger tabular dataset.\n\n"
         "{\n"
         '  "data": [...],\n'
-        '  "label_column": <int>\n'
+        '  "label_column": <int>,\n'
+        '  "columns": [...]\n'
         "}\n\n"
+        "\"columns\" is optional. When present it profiles every column of the full dataset, in the same order "
+        "as the inner lists (dtype_guess, null_ratio, cardinality, min, max, mean); use it together with the rows.\n\n"
         "Task:\n"
         "1. Treat each position in the inner lists as a separate feature column (0‑based indexing).\n"
         "2. Using only the information provided, identify the single feature column that is most valuable "
@@ -7,13 +7,23 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from flask import current_app
-from sklearn.cluster import KMeans
-from sklearn.metrics import mean_squared_error, silhouette_score
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
+from app.static.ml_model.ClusterSelection import K_SELECTION_MODES, select_k
+from app.static.ml_model.MiniBatchClustering import fit_minibatch, kmeans_backend
+from app.static.ml_model.Silhouette import silhouette, silhouette_sample_size
+from app.static.ml_model.WashingCache import WashedChunks
 
-def kmeans_function(clean_content, type):
+
+def kmeans_function(clean_content, type, progress=None, time_budget=None, silhouette_sizes=None,
+                    minibatch_rows=None):
+    # <progress> is called as the cluster count sweep goes, which stops
+    # after <time_budget> seconds, see ClusterSelection; <silhouette_sizes>
+    # replaces Silhouette.SILHOUETTE_SAMPLE_SIZES and <minibatch_rows>
+    # MiniBatchClustering.MINIBATCH_ROWS. <clean_content> may also be the
+    # WashedChunks of a washed dataset too large to load.
     result = {
         'model_name': 'KMeans',
         'MSE': None,
@@ -22,78 +32,42 @@ def kmeans_function(clean_content, type):
     flag = False
     
     try:
-        if isinstance(clean_content, pd.DataFrame):
+        if isinstance(clean_content, (pd.DataFrame, WashedChunks)):
             data = clean_content
         else:
             raise TypeError("The input data should be a pandas.DataFrame variable")
             
-        # Standardize the data
-        scaler = StandardScaler()
-        X = scaler.fit_transform(data)
-        
-        # Split data into training and validation sets (80/20)
-        X_train, X_val = train_test_split(X, test_size=0.2, random_state=42)
-        
-        # Define parameter grids based on type
-        if type == "Fast":
-            param_grid = {
-                'n_clusters': [3, 5, 7, 9, 11]
-            }
-            grid_search = False
-        elif type == "Balance":
-            param_grid = {
-                'n_clusters': np.linspace(1, 20, num=20, dtype=np.int32).tolist(),
-                'init': ['k-means++', 'random'],
-                'n_init': np.linspace(5, 30, num=25, dtype=np.int32).tolist(),
-                'max_iter': [100, 300, 500],
-                'tol': [1e-4, 1e-5]
-            }
-            grid_search = True
-        elif type == "High Precision":
-            param_grid = {
-                'n_clusters': np.linspace(1, 50, num=25, dtype=np.int32).tolist(),
-                'init': ['k-means++', 'random'],
-                'n_init': np.linspace(5, 50, num=45, dtype=np.int32).tolist(),
-                'max_iter': np.linspace(100, 1000, num=9, dtype=np.int32).tolist(),
-                'tol': [1e-5, 1e-6]
-            }
-            grid_search = True
-        else:
+        if type not in K_SELECTION_MODES:
             return result, flag
-            
-        # Create and train model
-        if grid_search:
-            kmeans = KMeans()
-            model = GridSearchCV(kmeans, param_grid, cv=5, n_jobs=-1)
+
+        if kmeans_backend(type, len(data), minibatch_rows) == 'minibatch':
+            # Streamed a batch of rows at a time, see MiniBatchClustering
+            best_model, X_val, search_info = fit_minibatch(data, type, progress, time_budget)
         else:
-            # For Fast mode, we'll just try all n_clusters values and pick the best
-            best_score = -1
-            best_model = None
-            for n_clusters in param_grid['n_clusters']:
-                model = KMeans(n_clusters=n_clusters, n_init=10)
-                model.fit(X_train)
-                score = silhouette_score(X_train, model.labels_)
-                if score > best_score:
-                    best_score = score
-                    best_model = model
-            model = best_model
+            # Standardize the data
+            scaler = StandardScaler()
+            X = scaler.fit_transform(data)
             
-        if grid_search:
-            model.fit(X_train)
-            best_model = model.best_estimator_
-        else:
-            best_model = model
+            # Split data into training and validation sets (80/20)
+            X_train, X_val = train_test_split(X, test_size=0.2, random_state=42)
+            
+            # Sweep the number of clusters, see ClusterSelection.select_k
+            best_model, search_info = select_k(X_train, type, progress=progress, time_budget=time_budget)
+            search_info.update({'kmeans_backend': 'kmeans', 'kmeans_batch_size': None})
             
         # Predict on validation set
         val_labels = best_model.predict(X_val)
         
         # Calculate metrics
         inertia = best_model.inertia_
-        silhouette = silhouette_score(X_val, val_labels)
+        # Sampled on large validation sets, see Silhouette
+        score, silhouette_info = silhouette(X_val, val_labels, silhouette_sample_size(type, silhouette_sizes))
         
         # Store results
         result['MSE'] = inertia
-        result['precision'] = float(silhouette)
+        result['precision'] = score
+        result.update(search_info)
+        result.update(silhouette_info)
         
         # Plot radar chart
         plot_path = plot_radar_chart(X_val, val_labels, best_model.n_clusters)
@@ -8,12 +8,20 @@ import pandas as pd
 from flask import current_app
 from sklearn.linear_model import SGDRegressor
 from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
+from app.static.ml_model.ModelSearch import make_search, search_summary
+from app.static.ml_model.RegularizationPath import (fit_regularization_path,
+                                                    regression_solver)
 
-def LinearRegressionTraining(clean_data, label_column, type):
+
+def LinearRegressionTraining(clean_data, label_column, type, progress=None, time_budget=None, path_max_bytes=None):
+    # <progress> is called as the hyperparameter search goes, which stops
+    # after <time_budget> seconds, see ModelSearch. Training sets above
+    # <path_max_bytes> (RegularizationPath.PATH_MAX_BYTES by default) fall
+    # back from the regularization path solvers to SGD.
     try:
         if isinstance(clean_data, pd.DataFrame):
             df = clean_data
@@ -39,8 +47,13 @@ def LinearRegressionTraining(clean_data, label_column, type):
             ('sgdregressor', SGDRegressor(early_stopping=True, random_state=42))
         ])
         
-        # Different parameters based on type
-        if type == "Fast":
+        solver = regression_solver(type, X_train, path_max_bytes)
+        if solver != 'sgd':
+            # The whole alpha path at once, see RegularizationPath
+            pipeline, search_info = fit_regularization_path(X_train, y_train, type, progress, time_budget)
+            
+        # SGD, different parameters based on type
+        elif type == "Fast":
             params = {
                 'sgdregressor__learning_rate': 'constant',
                 'sgdregressor__eta0': 0.001,
@@ -49,6 +62,7 @@ def LinearRegressionTraining(clean_data, label_column, type):
             }
             pipeline.set_params(**params)
             pipeline.fit(X_train, y_train)
+            search_info = {**search_summary(), 'regression_solver': solver}
             
         elif type == "Balance":
             param_grid = {
@@ -58,16 +72,20 @@ def LinearRegressionTraining(clean_data, label_column, type):
                 
                 'sgdregressor__tol': [1e-4]
             }
-            grid_search = GridSearchCV(
+            grid_search = make_search(
                 estimator=pipeline,
                 param_grid=param_grid,
+                precision_mode=type,
                 cv=5,
                 scoring='neg_mean_squared_error',
                 n_jobs=-1,
-                verbose=2
+                verbose=2,
+                progress=progress,
+                time_budget=time_budget
             )
             grid_search.fit(X_train, y_train)
             pipeline = grid_search.best_estimator_
+            search_info = {**search_summary(grid_search), 'regression_solver': solver}
             
         elif type == "High Precision":
             param_grid = {
@@ -77,16 +95,20 @@ def LinearRegressionTraining(clean_data, label_column, type):
                 
                 'sgdregressor__tol': [1e-5, 1e-6]
             }
-            grid_search = GridSearchCV(
+            grid_search = make_search(
                 estimator=pipeline,
                 param_grid=param_grid,
+                precision_mode=type,
                 cv=5,
                 scoring='neg_mean_squared_error',
                 n_jobs=-1,
-                verbose=2
+                verbose=2,
+                progress=progress,
+                time_budget=time_budget
             )
             grid_search.fit(X_train, y_train)
             pipeline = grid_search.best_estimator_
+            search_info = {**search_summary(grid_search), 'regression_solver': solver}
         
         # Predict and calculate metrics
         y_pred = pipeline.predict(X_val)
@@ -130,6 +152,7 @@ def LinearRegressionTraining(clean_data, label_column, type):
             'precision_value': r2,
             'plot_path': graph_path
         }
+        result.update(search_info)
         
         return result, True
     
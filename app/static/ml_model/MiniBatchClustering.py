@@ -0,0 +1,163 @@
+"""
+MiniBatchClustering.py
+
+KMeans for uploads too large for full-batch KMeans.
+
+Every KMeans iteration assigns every row, all of them standardized in
+memory. Above MINIBATCH_ROWS rows kmeans_function trains MiniBatchKMeans
+instead, with partial_fit on a batch of rows at a time. The rows come in
+chunks from a DataFrame or from a washed cache entry read off disk
+(WashingCache.WashedChunks), and MINIBATCH_MEMORY_BYTES bounds what is
+held at once, however many rows there are:
+
+- a quarter for a uniform sample the cluster count is chosen on
+- a quarter for the validation rows held out of training
+- the rest for the chunk being read and its standardized copies
+
+fit_minibatch reads the chunks once to fit the StandardScaler and draw
+both samples, chooses k on the selection sample (ClusterSelection.select_k)
+and starts MiniBatchKMeans from those centroids. The training passes then
+visit the rows of every chunk in random order, a batch at a time. A last
+pass sums the inertia of the training rows around the final centroids, as
+full-batch KMeans reports it: MiniBatchKMeans only keeps that of its last
+batch, before the centroids moved.
+"""
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from app.static.ml_model.ClusterSelection import select_k
+from app.static.ml_model.Sampling import reservoir_positions
+
+MINIBATCH_ROWS = 1_000_000  # more rows than this always train on mini-batches
+MINIBATCH_MEMORY_BYTES = 256 * 1024 ** 2  # rows held in memory at once, see the module docstring
+MINIBATCH_SELECTION_ROWS = 100_000  # most rows the cluster count is chosen on
+MINIBATCH_RANDOM_STATE = 42  # samples and batch order drawn the same way every run
+VALIDATION_FRACTION = 0.2  # rows held out, as the split of full-batch KMeans
+
+# Precision mode -> rows per batch and passes over the training rows
+MINIBATCH_MODES = {
+    'Fast': {'batch_size': 2048, 'passes': 1},
+    'Balance': {'batch_size': 4096, 'passes': 2},
+    'High Precision': {'batch_size': 8192, 'passes': 3},
+}
+
+
+def kmeans_backend(precision_mode, rows, minibatch_rows=None) -> str:
+    """
+    'minibatch' when <precision_mode> clusters <rows> rows with
+    MiniBatchKMeans, 'kmeans' otherwise. <minibatch_rows> (the
+    KMEANS_MINIBATCH_ROWS config) replaces MINIBATCH_ROWS.
+    """
+    mode = MINIBATCH_MODES.get(precision_mode)
+    threshold = MINIBATCH_ROWS if minibatch_rows is None else minibatch_rows
+    return 'minibatch' if mode and rows > threshold else 'kmeans'
+
+
+def _chunks(data, chunk_rows):
+    # Float arrays of about <chunk_rows> rows of <data> (a DataFrame or
+    # WashedChunks), a record batch larger than that coming whole
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunk_rows):
+            yield data.iloc[start:start + chunk_rows].to_numpy(dtype=float)
+        return
+    pending, size = [], 0
+    for frame in data:
+        pending.append(frame.to_numpy(dtype=float))
+        size += len(frame)
+        if size >= chunk_rows:
+            yield np.concatenate(pending)
+            pending, size = [], 0
+    if pending:
+        yield np.concatenate(pending)
+
+
+def _in_chunk(positions, start, stop):
+    # Offsets into the chunk of rows start..stop of the sorted <positions>
+    return positions[np.searchsorted(positions, start):np.searchsorted(positions, stop)] - start
+
+
+def _training_chunks(data, chunk_rows, validation, scaler, rng=None):
+    # The standardized training rows of every chunk of <data>, the
+    # <validation> positions left out, shuffled with <rng> when given
+    start = 0
+    for X in _chunks(data, chunk_rows):
+        stop = start + len(X)
+        train = np.setdiff1d(np.arange(len(X)), _in_chunk(validation, start, stop))
+        start = stop
+        yield scaler.transform(X[rng.permutation(train) if rng is not None else train], copy=False)
+
+
+def fit_minibatch(data, precision_mode, progress=None, time_budget=None, memory_bytes=MINIBATCH_MEMORY_BYTES):
+    """
+    Cluster the rows of <data> (a DataFrame or WashedChunks) with
+    MiniBatchKMeans, holding at most about <memory_bytes> of rows, see the
+    module docstring. <progress> and <time_budget> are those of select_k;
+    the training passes stop too once the budget is spent.
+
+    Returns (model, X_val, info): model's inertia_ is summed over the
+    training rows around its final centroids, X_val holds the standardized
+    validation rows and info the keys recorded in result_json, select_k's
+    and kmeans_backend, kmeans_batch_size, kmeans_passes and
+    kmeans_selection_rows.
+    """
+    mode = MINIBATCH_MODES[precision_mode]
+    rows = len(data)
+    row_bytes = 8 * max(len(data.columns), 1)
+    held_rows = max(memory_bytes // 4 // row_bytes, mode['batch_size'])
+    chunk_rows = max(memory_bytes // 2 // 3 // row_bytes, mode['batch_size'])  # raw, float and scaled copies
+    started = time.perf_counter()
+
+    validation = reservoir_positions(rows, min(math.ceil(VALIDATION_FRACTION * rows), held_rows),
+                                     MINIBATCH_RANDOM_STATE)
+    selection = np.setdiff1d(reservoir_positions(rows, min(MINIBATCH_SELECTION_ROWS, held_rows),
+                                                 MINIBATCH_RANDOM_STATE + 1), validation)
+
+    # First pass: scaler and samples, filled in place so they are held once
+    scaler = StandardScaler()
+    X_val = np.empty((len(validation), len(data.columns)))
+    X_selection = np.empty((len(selection), len(data.columns)))
+    start = 0
+    for X in _chunks(data, chunk_rows):
+        scaler.partial_fit(X)
+        stop = start + len(X)
+        for sample, positions in ((X_val, validation), (X_selection, selection)):
+            first, last = np.searchsorted(positions, [start, stop])
+            sample[first:last] = X[positions[first:last] - start]
+        start = stop
+    X_val = scaler.transform(X_val, copy=False)
+    selection_model, info = select_k(scaler.transform(X_selection, copy=False), precision_mode,
+                                     progress=progress, time_budget=time_budget)
+
+    model = MiniBatchKMeans(n_clusters=selection_model.n_clusters, init=selection_model.cluster_centers_, n_init=1,
+                            batch_size=mode['batch_size'], random_state=MINIBATCH_RANDOM_STATE)
+    rng = np.random.default_rng(MINIBATCH_RANDOM_STATE)
+    passes = 0
+    stopped_early = False
+    while passes < mode['passes'] and not stopped_early:
+        for X in _training_chunks(data, chunk_rows, validation, scaler, rng):
+            for batch in np.array_split(X, max(len(X) // mode['batch_size'], 1)):
+                if len(batch) >= model.n_clusters:  # fewer rows are too few for a step
+                    model.partial_fit(batch)
+            if time_budget is not None and time.perf_counter() - started >= time_budget:
+                stopped_early = True
+                break
+        passes += 1
+    if not hasattr(model, 'cluster_centers_'):
+        model = selection_model  # no training rows enough for a step
+    # Inertia of every training row around the final centroids
+    model.inertia_ = float(sum(-model.score(X) for X in _training_chunks(data, chunk_rows, validation, scaler)
+                               if len(X)))
+
+    info.update({
+        'search_stopped_early': info['search_stopped_early'] or stopped_early,
+        'kmeans_backend': 'minibatch',
+        'kmeans_batch_size': mode['batch_size'],
+        'kmeans_passes': passes,
+        'kmeans_selection_rows': int(len(selection)),
+    })
+    return model, X_val, info
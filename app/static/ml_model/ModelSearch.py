@@ -0,0 +1,298 @@
+"""
+ModelSearch.py
+
+Hyperparameter search that reports how far along it is, with a search
+strategy per precision mode.
+
+GridSearchCV evaluates its whole grid in one parallel call and only
+prints its progress (verbose). The searches here hand their candidates
+to that same machinery in batches instead and, after every batch, call
+progress(candidates done, candidates in total, best score so far, ETA in
+seconds), so a training job can show where a search with thousands of
+candidates stands. Each batch still keeps all n_jobs workers busy, and
+the results (cv_results_, best_params_, ...) are those of the sklearn
+search they extend.
+
+The grids of the slower precision modes have tens of thousands of
+candidates, far too many to try them all. make_search picks the search
+of a mode (SEARCH_MODES):
+
+- exhaustive: every candidate of the grid (GridSearchCV)
+- randomized: n_iter candidates drawn from the grid (RandomizedSearchCV)
+- halving: successive halving over the sample size
+  (HalvingRandomSearchCV): many candidates are scored on a small sample
+  of the rows, the best third of them on three times as many, and so on
+  until the last few candidates are scored on all the rows.
+
+A grid no larger than the candidates a strategy would draw is searched
+exhaustively.
+
+Each precision mode also has a wall-clock time budget (TIME_BUDGETS).
+A search checks it between batches: once the budget is spent it
+evaluates no more candidates and refits the best one found so far (for
+successive halving, the best of the latest iteration, scored on the most
+rows). search_summary tells which strategy ran, how many fits and how
+much time it took and whether the budget stopped it, for the run's
+result_json.
+"""
+import math
+import time
+from numbers import Real
+
+import numpy as np
+from joblib import effective_n_jobs
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (GridSearchCV, HalvingRandomSearchCV,
+                                     ParameterGrid, RandomizedSearchCV)
+
+PROGRESS_UPDATES = 50  # about this many progress calls per search
+SEARCH_RANDOM_STATE = 42  # candidates drawn and rows subsampled the same way every run
+HALVING_MIN_ROWS = 500  # fewest rows successive halving scores candidates on, SGD with early stopping stalls on small samples
+
+# Wall-clock seconds a search may take per precision mode, None is no limit
+TIME_BUDGETS = {
+    'Fast': 10,
+    'Balance': 2 * 60,
+    'High Precision': 15 * 60,
+}
+# Precision mode -> (strategy, its settings), modes not listed search exhaustively
+SEARCH_MODES = {
+    'Balance': ('randomized', {'n_iter': 60}),
+    'High Precision': ('halving', {'n_candidates': 729, 'factor': 3, 'min_resources': 'exhaust'}),
+}
+
+
+def search_time_budget(precision_mode, budgets=None):
+    # Seconds the search of <precision_mode> may take, <budgets> (the
+    # TRAINING_TIME_BUDGETS config) replacing TIME_BUDGETS
+    return (budgets or TIME_BUDGETS).get(precision_mode)
+
+
+def search_batches(candidates, n_jobs, updates=PROGRESS_UPDATES) -> list:
+    # Split the candidate list in about <updates> batches, each at least one
+    # candidate per worker
+    size = max(math.ceil(len(candidates) / updates), effective_n_jobs(n_jobs))
+    return [candidates[start:start + size] for start in range(0, len(candidates), size)]
+
+
+class _OutOfTime(Exception):
+    # Raised between two batches once the time budget of a search is spent
+    pass
+
+
+class SearchProgress:
+    """
+    Running totals of a search, passed to the progress callback (if any)
+    after every batch of candidates.
+    """
+
+    def __init__(self, total, progress=None, time_budget=None):
+        self.total = total
+        self.progress = progress
+        self.time_budget = time_budget
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def out_of_time(self) -> bool:
+        return self.time_budget is not None and self.elapsed() >= self.time_budget
+
+    def update(self, done, results):
+        # <done> candidates evaluated, <results> the cv_results of those that did not fail
+        self.done = done
+        if self.progress is None or results is None:
+            return
+        scores = np.asarray(results['mean_test_score'], dtype=float)
+        best = float(np.nanmax(scores)) if np.isfinite(scores).any() else None
+        elapsed = self.elapsed()
+        eta = elapsed / self.done * (self.total - self.done) if self.done else None
+        if eta is not None and self.time_budget is not None:
+            eta = max(min(eta, self.time_budget - elapsed), 0.0)
+        self.progress(self.done, self.total, best, eta)
+
+
+def _all_fits_failed(error) -> bool:
+    # Whether <error> is the ValueError sklearn raises when every fit of an
+    # evaluation failed
+    return str(error).lstrip().startswith('All the') and 'fits failed' in str(error)
+
+
+class _ProgressSearch:
+    # Mixin evaluating the candidates of an sklearn search in batches, see
+    # the module docstring. Sets search_seconds_, stopped_early_ (the time
+    # budget ran out) and failed_candidates_ on the fitted search.
+    #
+    # sklearn gives up when every fit of an evaluation fails. Of a whole
+    # search that means the model is misconfigured, of a batch only that its
+    # candidates are (l1 penalty with hinge loss, more clusters than rows):
+    # they are left out of cv_results_ and the search goes on.
+
+    strategy = None  # name in search_summary
+
+    def _expected_candidates(self, candidates):
+        # Candidates still to be evaluated, <candidates> being evaluated next
+        return len(candidates)
+
+    def _run_search(self, evaluate_candidates):
+        tracker = SearchProgress(0, self.progress, self.time_budget)
+        results = failure = None
+        self.failed_candidates_ = 0
+
+        def evaluate_in_batches(candidate_params, cv=None, more_results=None):
+            nonlocal results, failure
+            candidate_params = list(candidate_params)
+            tracker.total = tracker.done + self._expected_candidates(candidate_params)
+            start = 0
+            for batch in search_batches(candidate_params, self.n_jobs):
+                if results is not None and tracker.out_of_time():
+                    raise _OutOfTime()
+                stop = start + len(batch)
+                batch_results = {key: values[start:stop] for key, values in more_results.items()} \
+                    if more_results else None
+                try:
+                    results = evaluate_candidates(batch, cv, more_results=batch_results)
+                except ValueError as error:
+                    if not _all_fits_failed(error):
+                        raise
+                    failure = error
+                    self.failed_candidates_ += len(batch)
+                tracker.update(tracker.done + len(batch), results)
+                start = stop
+            if results is None:
+                raise failure  # no candidate could be fitted at all
+            return results
+
+        self.stopped_early_ = False
+        try:
+            super()._run_search(evaluate_in_batches)
+        except _OutOfTime:
+            self.stopped_early_ = True
+        self.search_seconds_ = tracker.elapsed()
+
+
+class ProgressGridSearchCV(_ProgressSearch, GridSearchCV):
+    """
+    GridSearchCV calling <progress> (see the module docstring) after every
+    batch of candidates and stopping once <time_budget> seconds are spent;
+    without either it is GridSearchCV.
+    """
+
+    strategy = 'exhaustive'
+    _parameter_constraints = {**GridSearchCV._parameter_constraints, 'progress': [callable, None],
+                              'time_budget': [Real, None]}
+
+    def __init__(self, estimator, param_grid, *, scoring=None, n_jobs=None, refit=True, cv=None, verbose=0,
+                 pre_dispatch='2*n_jobs', error_score=np.nan, return_train_score=False, progress=None,
+                 time_budget=None):
+        super().__init__(estimator, param_grid, scoring=scoring, n_jobs=n_jobs, refit=refit, cv=cv,
+                         verbose=verbose, pre_dispatch=pre_dispatch, error_score=error_score,
+                         return_train_score=return_train_score)
+        self.progress = progress
+        self.time_budget = time_budget
+
+
+class ProgressRandomizedSearchCV(_ProgressSearch, RandomizedSearchCV):
+    """
+    RandomizedSearchCV calling <progress> after every batch of candidates
+    and stopping once <time_budget> seconds are spent.
+    """
+
+    strategy = 'randomized'
+    _parameter_constraints = {**RandomizedSearchCV._parameter_constraints, 'progress': [callable, None],
+                              'time_budget': [Real, None]}
+
+    def __init__(self, estimator, param_distributions, *, n_iter=10, scoring=None, n_jobs=None, refit=True,
+                 cv=None, verbose=0, pre_dispatch='2*n_jobs', random_state=None, error_score=np.nan,
+                 return_train_score=False, progress=None, time_budget=None):
+        super().__init__(estimator, param_distributions, n_iter=n_iter, scoring=scoring, n_jobs=n_jobs,
+                         refit=refit, cv=cv, verbose=verbose, pre_dispatch=pre_dispatch,
+                         random_state=random_state, error_score=error_score,
+                         return_train_score=return_train_score)
+        self.progress = progress
+        self.time_budget = time_budget
+
+
+class ProgressHalvingRandomSearchCV(_ProgressSearch, HalvingRandomSearchCV):
+    """
+    HalvingRandomSearchCV calling <progress> after every batch of
+    candidates and stopping once <time_budget> seconds are spent. The total
+    is an estimate until the last iteration, as the iterations run out when
+    either the candidates or the rows do.
+    """
+
+    strategy = 'halving'
+    _parameter_constraints = {**HalvingRandomSearchCV._parameter_constraints, 'progress': [callable, None],
+                              'time_budget': [Real, None]}
+
+    def __init__(self, estimator, param_distributions, *, n_candidates='exhaust', factor=3, resource='n_samples',
+                 max_resources='auto', min_resources='smallest', aggressive_elimination=False, cv=5,
+                 scoring=None, refit=True, error_score=np.nan, return_train_score=True, random_state=None,
+                 n_jobs=None, verbose=0, progress=None, time_budget=None):
+        super().__init__(estimator, param_distributions, n_candidates=n_candidates, factor=factor,
+                         resource=resource, max_resources=max_resources, min_resources=min_resources,
+                         aggressive_elimination=aggressive_elimination, cv=cv, scoring=scoring, refit=refit,
+                         error_score=error_score, return_train_score=return_train_score,
+                         random_state=random_state, n_jobs=n_jobs, verbose=verbose)
+        self.progress = progress
+        self.time_budget = time_budget
+
+    def _run_search(self, evaluate_candidates):
+        self.min_resources_ = max(self.min_resources_, min(HALVING_MIN_ROWS, self.max_resources_)) \
+            if self.resource == 'n_samples' else self.min_resources_
+        return super()._run_search(evaluate_candidates)
+
+    def _expected_candidates(self, candidates):
+        # This iteration's candidates and the shrinking lists of the
+        # iterations the resources allow after it
+        n_resources = self.n_resources_[-1] if self.n_resources_ else self.min_resources_
+        expected = remaining = len(candidates)
+        while remaining >= self.factor and n_resources * self.factor <= self.max_resources_:
+            n_resources *= self.factor
+            remaining = math.ceil(remaining / self.factor)
+            expected += remaining
+        return expected
+
+
+SEARCH_STRATEGIES = {
+    'exhaustive': (ProgressGridSearchCV, None),
+    'randomized': (ProgressRandomizedSearchCV, 'n_iter'),
+    'halving': (ProgressHalvingRandomSearchCV, 'n_candidates'),
+}  # strategy -> (search class, setting limiting the candidates drawn)
+
+
+def make_search(estimator, param_grid, precision_mode, **options):
+    """
+    The search of <precision_mode> (see SEARCH_MODES) over <param_grid> for
+    <estimator>. <options> go to the search class as they are (scoring, cv,
+    n_jobs, progress, time_budget, ...).
+    """
+    strategy, settings = SEARCH_MODES.get(precision_mode, ('exhaustive', {}))
+    search_class, limit = SEARCH_STRATEGIES[strategy]
+    if limit is not None and len(ParameterGrid(param_grid)) <= settings[limit]:
+        # Drawing would only try the whole grid in another order
+        search_class, settings = ProgressGridSearchCV, {}
+    if search_class is not ProgressGridSearchCV:
+        settings = {'random_state': SEARCH_RANDOM_STATE, **settings}
+    return search_class(estimator, param_grid, **settings, **options)
+
+
+def search_summary(search=None, candidates=1) -> dict:
+    """
+    The strategy of the fitted <search>, the candidates it evaluated (failed
+    ones included), the fits and seconds that took (the final refit not
+    counted) and whether its time budget stopped it, for result_json. Without <search>: the
+    <candidates> models a Fast mode fits without a search.
+    """
+    if search is None:
+        return {'search_strategy': 'none', 'search_candidates': candidates, 'search_fits': candidates}
+    candidates = len(search.cv_results_['params']) + search.failed_candidates_
+    return {
+        'search_strategy': search.strategy,
+        'search_candidates': candidates,
+        'search_fits': candidates * search.n_splits_,
+        'search_seconds': round(search.search_seconds_, 1),
+        'search_time_budget': search.time_budget,
+        'search_stopped_early': search.stopped_early_,
+    }
@@ -0,0 +1,119 @@
+"""
+RegularizationPath.py
+
+Linear regression fitted along its regularization path.
+
+A grid search of SGDRegressor fits every alpha from scratch, once per
+cross-validation fold, with SGD's own step size and tolerance multiplying
+the grid. The penalized least squares solvers of sklearn get the whole
+alpha range far cheaper (PATH_MODES):
+
+    ridge_gcv         RidgeCV: every alpha of a ridge penalty scored by
+                      leave-one-out error from one decomposition of the
+                      data (generalized cross-validation)
+    elastic_net_path  ElasticNetCV per l1_ratio: coordinate descent walks
+                      the alphas from the largest down, each fit starting
+                      from the previous coefficients, once per fold
+
+Both hold copies of the training matrix, one per fold for the elastic
+net. Above PATH_MAX_BYTES, LinearRegressionTraining falls back to the
+SGDRegressor search (ModelSearch) it used before.
+"""
+import numpy as np
+from sklearn.linear_model import ElasticNetCV, RidgeCV
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from app.static.ml_model.ModelSearch import SearchProgress
+
+PATH_MAX_BYTES = 256 * 1024 ** 2  # larger training matrices train with the SGD search
+PATH_RANDOM_STATE = 42  # coordinate descent visits features the same way every run
+
+# Precision mode -> (solver, its settings), modes not listed use the SGD search
+PATH_MODES = {
+    'Fast': ('ridge_gcv', {'alphas': np.logspace(-3, 3, num=13).tolist()}),
+    'Balance': ('elastic_net_path', {'l1_ratios': [0.1, 0.5, 0.7, 0.9, 0.95, 0.99, 1.0], 'n_alphas': 100,
+                                     'eps': 1e-3, 'cv': 5}),
+    'High Precision': ('elastic_net_path', {'l1_ratios': np.linspace(0.1, 0.9, num=9).tolist() + [0.95, 0.99, 1.0],
+                                            'n_alphas': 200, 'eps': 1e-4, 'cv': 5}),
+}
+
+
+def regression_solver(precision_mode, X, path_max_bytes=None) -> str:
+    """
+    The solver <precision_mode> fits the training matrix <X> with: its
+    PATH_MODES one, or 'sgd' when it has none or <X> is larger than
+    <path_max_bytes> (the LINEAR_PATH_MAX_BYTES config, PATH_MAX_BYTES by
+    default) as float64.
+    """
+    limit = PATH_MAX_BYTES if path_max_bytes is None else path_max_bytes
+    if precision_mode not in PATH_MODES or 8 * X.shape[0] * max(X.shape[1], 1) > limit:
+        return 'sgd'
+    return PATH_MODES[precision_mode][0]
+
+
+def _ridge_gcv(X, y, settings, tracker):
+    # (estimator, candidates, fits, stopped early)
+    estimator = RidgeCV(alphas=settings['alphas']).fit(X, y)
+    tracker.update(1, {'mean_test_score': [estimator.best_score_]})
+    return estimator, len(settings['alphas']), 1, False
+
+
+def _elastic_net_path(X, y, settings, tracker):
+    # (estimator, candidates, fits, stopped early): the path of every
+    # l1_ratio until the time budget runs out, the one with the lowest
+    # cross-validated error kept
+    best = best_error = None
+    scores = []
+    done = 0
+    for l1_ratio in settings['l1_ratios']:
+        if best is not None and tracker.out_of_time():
+            break
+        estimator = ElasticNetCV(l1_ratio=l1_ratio, n_alphas=settings['n_alphas'], eps=settings['eps'],
+                                 cv=settings['cv'], n_jobs=-1, random_state=PATH_RANDOM_STATE).fit(X, y)
+        errors = estimator.mse_path_.mean(axis=-1)
+        scores.extend(-errors)
+        if best is None or errors.min() < best_error:
+            best, best_error = estimator, errors.min()
+        done += 1
+        tracker.update(done, {'mean_test_score': scores})
+    # One path per fold and the refit at the chosen alpha, per l1_ratio
+    return best, done * settings['n_alphas'], done * (settings['cv'] + 1), done < len(settings['l1_ratios'])
+
+
+PATH_SOLVERS = {
+    'ridge_gcv': (_ridge_gcv, 'gcv'),
+    'elastic_net_path': (_elastic_net_path, 'regularization_path'),
+}  # solver -> (fitting function, search_strategy in result_json)
+
+
+def fit_regularization_path(X, y, precision_mode, progress=None, time_budget=None):
+    """
+    Fit the PATH_MODES solver of <precision_mode> on standardized <X> and
+    <y>. <progress> is called like a ModelSearch progress callback after
+    every path (every l1_ratio), and no new path starts once <time_budget>
+    seconds are spent.
+
+    Returns (pipeline, info): the fitted scaler and estimator, and the keys
+    recorded in result_json, the ModelSearch summary ones and
+    regression_solver, alpha and l1_ratio.
+    """
+    solver, settings = PATH_MODES[precision_mode]
+    fit, strategy = PATH_SOLVERS[solver]
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    tracker = SearchProgress(len(settings.get('l1_ratios', [None])), progress, time_budget)
+    estimator, candidates, fits, stopped_early = fit(X_scaled, y, settings, tracker)
+
+    pipeline = Pipeline([('scaler', scaler), (solver, estimator)])
+    return pipeline, {
+        'search_strategy': strategy,
+        'search_candidates': candidates,
+        'search_fits': fits,
+        'search_seconds': round(tracker.elapsed(), 1),
+        'search_time_budget': time_budget,
+        'search_stopped_early': stopped_early,
+        'regression_solver': solver,
+        'alpha': float(estimator.alpha_),
+        'l1_ratio': float(estimator.l1_ratio_) if solver == 'elastic_net_path' else None,
+    }
@@ -0,0 +1,175 @@
+"""
+SVMPath.py
+
+Linear SVM tuned along its C path.
+
+A grid search of LinearSVC fits every C from scratch, once per
+cross-validation fold and penalty/loss pair, lets the pairs liblinear
+cannot solve fail inside the search and leaves the primal/dual choice to
+liblinear's default. fit_svm_path instead:
+
+- leaves out the pairs liblinear has no solver for (l1 penalty with hinge
+  loss) before any fit
+- walks the C values of every pair (SVM_PATH_MODES) in increasing order,
+  each fold in parallel. liblinear cannot start from an earlier solution,
+  but LinearSVC's default pair, l2 penalty with squared hinge loss, is
+  smooth: its path is solved in the primal with L-BFGS, every C starting
+  from the coefficients of the previous one, which the weaker
+  regularization only moves a little. The other pairs are fitted by
+  LinearSVC C by C.
+- refits the best C, penalty and loss with LinearSVC on all the training
+  rows, in the dual when there are fewer rows than features and in the
+  primal otherwise, as far as the pair allows (svm_dual)
+"""
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.optimize import minimize
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import LinearSVC
+
+from app.static.ml_model.ModelSearch import SearchProgress
+
+SVM_RANDOM_STATE = 42  # folds and liblinear shuffling drawn the same way every run
+WARM_PATH = ('l2', 'squared_hinge')  # the pair whose C path is warm-started
+
+# (penalty, loss) -> formulations liblinear solves it in, dual (True) or
+# primal (False), the only one first; pairs not listed (l1 with hinge)
+# have none
+SVM_FORMULATIONS = {
+    ('l2', 'hinge'): (True,),
+    ('l2', 'squared_hinge'): (True, False),
+    ('l1', 'squared_hinge'): (False,),
+}
+# Precision mode -> C values, penalties and losses searched, folds and
+# tolerance and iteration limit of the fits
+SVM_PATH_MODES = {
+    'Balance': {'C': [0.1, 1, 10], 'penalty': ['l1', 'l2'], 'loss': ['hinge', 'squared_hinge'], 'cv': 5,
+                'tol': 1e-3, 'max_iter': 1000},
+    'High Precision': {'C': np.linspace(0.1, 10, num=50).tolist(), 'penalty': ['l1', 'l2'],
+                       'loss': ['hinge', 'squared_hinge'], 'cv': 5, 'tol': 1e-4, 'max_iter': 2000},
+}
+
+
+def svm_dual(penalty, loss, n_samples, n_features) -> bool:
+    """
+    Whether LinearSVC should solve <penalty> with <loss> in the dual: with
+    fewer samples than features, where the dual is the smaller problem, or
+    when the pair has no primal formulation.
+    """
+    formulations = SVM_FORMULATIONS[(penalty, loss)]
+    preferred = n_samples < n_features
+    return preferred if preferred in formulations else formulations[0]
+
+
+def svm_pairs(penalties, losses) -> list:
+    # The (penalty, loss) pairs of <penalties> x <losses> liblinear can solve
+    return [(penalty, loss) for penalty in penalties for loss in losses if (penalty, loss) in SVM_FORMULATIONS]
+
+
+def _squared_hinge(w, X, signs, C):
+    # liblinear's primal objective of the l2 penalty with squared hinge
+    # loss, the intercept a regularized weight on a column of ones, and its
+    # gradient
+    margins = 1 - signs * (X @ w)
+    active = margins > 0
+    violations = margins[active]
+    return 0.5 * w @ w + C * violations @ violations, w - 2 * C * (X[active].T @ (signs[active] * violations))
+
+
+def _with_intercept(X):
+    return np.hstack([X, np.ones((len(X), 1))])
+
+
+def _warm_path(X_train, y_train, X_test, y_test, C_values, tol, max_iter):
+    # Accuracy on the test rows of every C, one-vs-rest as liblinear, each
+    # class's fit starting from its coefficients of the previous C
+    classes = np.unique(y_train)
+    X_train, X_test = _with_intercept(X_train), _with_intercept(X_test)
+    targets = classes[1:] if len(classes) == 2 else classes
+    weights = np.zeros((len(targets), X_train.shape[1]))
+    scores = []
+    for C in C_values:
+        for k, target in enumerate(targets):
+            signs = np.where(y_train == target, 1.0, -1.0)
+            # Converged once the gradient is <tol> of its size at zero, as liblinear
+            gtol = tol * np.abs(_squared_hinge(np.zeros_like(weights[k]), X_train, signs, C)[1]).max()
+            weights[k] = minimize(_squared_hinge, weights[k], args=(X_train, signs, C), jac=True, method='L-BFGS-B',
+                                  options={'gtol': gtol, 'maxiter': max_iter}).x
+        decision = X_test @ weights.T
+        predicted = classes[(decision[:, 0] > 0).astype(int)] if len(classes) == 2 else classes[decision.argmax(axis=1)]
+        scores.append(float(np.mean(predicted == y_test)))
+    return scores
+
+
+def _liblinear_path(X_train, y_train, X_test, y_test, C_values, tol, max_iter, penalty, loss):
+    # Accuracy on the test rows of every C, each fitted by LinearSVC from scratch
+    dual = svm_dual(penalty, loss, *X_train.shape)
+    return [LinearSVC(C=C, penalty=penalty, loss=loss, dual=dual, tol=tol, max_iter=max_iter,
+                      random_state=SVM_RANDOM_STATE).fit(X_train, y_train).score(X_test, y_test)
+            for C in C_values]
+
+
+def _fold_path(X, y, train, test, penalty, loss, C_values, tol, max_iter):
+    path = _warm_path if (penalty, loss) == WARM_PATH else _liblinear_path
+    options = {} if (penalty, loss) == WARM_PATH else {'penalty': penalty, 'loss': loss}
+    return path(X[train], y[train], X[test], y[test], C_values, tol, max_iter, **options)
+
+
+def fit_svm_path(X, y, precision_mode, progress=None, time_budget=None, n_jobs=-1):
+    """
+    Choose C, penalty and loss for a LinearSVC on <X> and <y> along the C
+    paths of <precision_mode> (see SVM_PATH_MODES) and fit it. <progress> is
+    called like a ModelSearch progress callback after every penalty/loss
+    pair, and no new pair starts once <time_budget> seconds are spent.
+
+    Returns (pipeline, info): the fitted scaler and LinearSVC, and the keys
+    recorded in result_json, the ModelSearch summary ones and svm_C,
+    svm_penalty, svm_loss and svm_dual.
+    """
+    mode = SVM_PATH_MODES[precision_mode]
+    C_values = sorted(mode['C'])
+    # The warm-started pair first, the cheapest
+    pairs = sorted(svm_pairs(mode['penalty'], mode['loss']), key=lambda pair: pair != WARM_PATH)
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    y = np.asarray(y)
+    folds = StratifiedKFold(n_splits=mode['cv'], shuffle=True, random_state=SVM_RANDOM_STATE)
+    folds = list(folds.split(X_scaled, y))
+
+    tracker = SearchProgress(len(pairs) * len(C_values), progress, time_budget)
+    best = best_score = None
+    scores = []
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for penalty, loss in pairs:
+            if best is not None and tracker.out_of_time():
+                break
+            fold_scores = parallel(delayed(_fold_path)(X_scaled, y, train, test, penalty, loss, C_values,
+                                                       mode['tol'], mode['max_iter'])
+                                   for train, test in folds)
+            mean_scores = np.mean(fold_scores, axis=0)
+            scores.extend(mean_scores)
+            # Ties go to the smallest C, the most regularized
+            index = int(np.argmax(mean_scores))
+            if best is None or mean_scores[index] > best_score:
+                best, best_score = (C_values[index], penalty, loss), mean_scores[index]
+            tracker.update(tracker.done + len(C_values), {'mean_test_score': scores})
+
+    C, penalty, loss = best
+    dual = svm_dual(penalty, loss, *X_scaled.shape)
+    estimator = LinearSVC(C=C, penalty=penalty, loss=loss, dual=dual, tol=mode['tol'], max_iter=mode['max_iter'],
+                          random_state=SVM_RANDOM_STATE).fit(X_scaled, y)
+    candidates = len(scores)
+    return Pipeline([('scaler', scaler), ('linearsvc', estimator)]), {
+        'search_strategy': 'c_path',
+        'search_candidates': candidates,
+        'search_fits': candidates * mode['cv'],
+        'search_seconds': round(tracker.elapsed(), 1),
+        'search_time_budget': time_budget,
+        'search_stopped_early': candidates < len(pairs) * len(C_values),
+        'svm_C': float(C),
+        'svm_penalty': penalty,
+        'svm_loss': loss,
+        'svm_dual': dual,
+    }
@@ -3,18 +3,22 @@ import os
 import uuid
 
 import matplotlib.pyplot as plt
-import numpy as np
 import pandas as pd
 from flask import current_app
 from sklearn.metrics import (accuracy_score, f1_score, precision_score,
                              recall_score)
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.svm import LinearSVC
 
+from app.static.ml_model.ModelSearch import search_summary
+from app.static.ml_model.SVMPath import SVM_PATH_MODES, fit_svm_path, svm_dual
 
-def SVMClassifier(clean_data, label_column, type):
+
+def SVMClassifier(clean_data, label_column, type, progress=None, time_budget=None):
+    # <progress> is called as the hyperparameter search goes, which stops
+    # after <time_budget> seconds, see SVMPath
     try:
         if isinstance(clean_data, pd.DataFrame):
             df = clean_data
@@ -46,46 +50,15 @@ def SVMClassifier(clean_data, label_column, type):
                 'linearsvc__max_iter': 500,
                 'linearsvc__tol': 1e-3
             }
+            # Primal or dual from the shape of the data, as far as hinge loss allows
+            params['linearsvc__dual'] = svm_dual('l2', params['linearsvc__loss'], *X_train.shape)
             pipeline.set_params(**params)
             pipeline.fit(X_train, y_train)
+            search_info = {**search_summary(), 'svm_dual': params['linearsvc__dual']}
             
-        elif type == "Balance":
-            param_grid = {
-                'linearsvc__C': [0.1, 1, 10],
-                'linearsvc__penalty': ['l1', 'l2'],
-                'linearsvc__loss': ['hinge', 'squared_hinge'],
-                'linearsvc__max_iter': [1000],
-                'linearsvc__tol': [1e-3, 1e-4]
-            }
-            grid_search = GridSearchCV(
-                estimator=pipeline,
-                param_grid=param_grid,
-                cv=5,
-                scoring='accuracy',
-                n_jobs=-1,
-                verbose=2
-            )
-            grid_search.fit(X_train, y_train)
-            pipeline = grid_search.best_estimator_
-            
-        elif type == "High Precision":
-            param_grid = {
-                'linearsvc__C': np.linspace(0.1, 10, num=50).tolist(),
-                'linearsvc__penalty': ['l1', 'l2'],
-                'linearsvc__loss': ['hinge', 'squared_hinge'],
-                'linearsvc__max_iter': [2000],
-                'linearsvc__tol': [1e-4, 1e-5]
-            }
-            grid_search = GridSearchCV(
-                estimator=pipeline,
-                param_grid=param_grid,
-                cv=5,
-                scoring='accuracy',
-                n_jobs=-1,
-                verbose=2
-            )
-            grid_search.fit(X_train, y_train)
-            pipeline = grid_search.best_estimator_
+        elif type in SVM_PATH_MODES:
+            # C walked in increasing order per penalty/loss pair, see SVMPath
+            pipeline, search_info = fit_svm_path(X_train, y_train, type, progress, time_budget)
         
         # Predict and calculate metrics
         y_pred = pipeline.predict(X_val)
@@ -126,6 +99,7 @@ def SVMClassifier(clean_data, label_column, type):
             'F1_score_value': f1,
             'plot_path': graph_path
         }
+        result.update(search_info)
         
         return result, True
     
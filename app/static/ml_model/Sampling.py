@@ -0,0 +1,146 @@
+"""
+Sampling.py
+
+Row sampling before training, so the size of an upload no longer decides
+how long a run takes.
+
+The sample size depends on the precision mode (SAMPLE_SIZES, None means
+the whole file) and the method on the model:
+
+    reservoir   uniform sample, used for linear regression
+    stratified  per-class quotas on the target, used for SVM, so rare
+                classes keep enough rows for the stratified split
+    cluster     a larger uniform pilot sample is clustered and the final
+                sample is drawn with per-cluster quotas, used for KMeans,
+                so small clusters are not lost
+
+Only row positions are chosen here. select_model then reads just those
+rows from the Arrow copy, so neither loading nor washing ever sees the
+rest of the file.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+from app.static.ml_model.ColumnarCache import load_dataset
+from app.static.ml_model.DataWashing import profile_kept_columns
+from app.static.ml_model.TargetSuggester import standardized_features
+
+# Rows trained on per precision mode, None trains on every row
+SAMPLE_SIZES = {
+    'Fast': 50_000,
+    'Balance': 500_000,
+    'High Precision': None,
+}
+MODEL_METHODS = {
+    'linear_regression': 'reservoir',
+    'SVM': 'stratified',
+    'KMeans': 'cluster',
+}
+MIN_PER_STRATUM = 10  # rows kept from every class / cluster that has them
+PILOT_FACTOR = 5      # the cluster pilot sample is this many times the final sample
+CLUSTER_STRATA = 16   # clusters found in the pilot sample
+RESERVOIR_BLOCK = 4096  # reservoir steps drawn per vectorised block
+
+
+def reservoir_positions(population, n, seed=42) -> np.ndarray:
+    """
+    Uniform sample of <n> positions out of range(<population>), drawn with
+    reservoir sampling (Li's algorithm L): the stream is walked with random
+    skips, so the cost grows with n * log(population / n) rather than with
+    the population. Returns sorted positions.
+    """
+    if n >= population:
+        return np.arange(population)
+    rng = np.random.default_rng(seed)
+    reservoir = np.arange(n)
+    w = math.exp(math.log(rng.random()) / n)
+    i = n - 1
+    # The walk is drawn in vectorised blocks of steps: per step a skip length,
+    # a slot to overwrite and the factor that shrinks the acceptance weight
+    while i < population:
+        u_skip, u_weight = rng.random(RESERVOIR_BLOCK), rng.random(RESERVOIR_BLOCK)
+        weights = w * np.exp(np.cumsum(np.log(u_weight)) / n)
+        step_weights = np.concatenate(([w], weights[:-1]))
+        # Clipped so tiny weights late in the stream cannot overflow the integer cast
+        with np.errstate(divide='ignore', over='ignore'):
+            skips = np.minimum(np.floor(np.log(u_skip) / np.log1p(-step_weights)), population).astype(np.int64) + 1
+        positions = i + np.cumsum(skips)
+        inside = positions < population
+        # Later steps overwrite earlier ones in the same slot, as in the sequential walk
+        reservoir[rng.integers(n, size=int(inside.sum()))] = positions[inside]
+        i, w = positions[-1], weights[-1]
+    return np.sort(reservoir)
+
+
+def stratified_positions(labels, n, seed=42) -> np.ndarray:
+    """
+    About <n> positions of <labels> with each stratum (distinct label, missing
+    values included) sampled in proportion to its size, but never below
+    MIN_PER_STRATUM rows when it has them. Returns sorted positions.
+    """
+    labels = np.asarray(labels)
+    if n >= len(labels):
+        return np.arange(len(labels))
+    rng = np.random.default_rng(seed)
+    codes, _ = pd.factorize(labels, use_na_sentinel=False)
+    if codes.max() < np.iinfo(np.int16).max:
+        codes = codes.astype(np.int16)  # small integer keys get numpy's radix sort below
+    counts = np.bincount(codes)
+    quotas = np.maximum(np.floor(n * counts / len(labels)).astype(int), np.minimum(counts, MIN_PER_STRATUM))
+
+    # Group positions by stratum with one stable sort instead of one scan per stratum
+    order = np.argsort(codes, kind='stable')
+    groups = np.split(order, np.cumsum(counts)[:-1])
+    chosen = [rng.choice(group, size=quota, replace=False) for group, quota in zip(groups, quotas)]
+    return np.sort(np.concatenate(chosen))
+
+
+def cluster_positions(features, n, seed=42) -> np.ndarray:
+    """
+    About <n> positions of the rows of <features> (a 2-d array, usually a
+    pilot sample) with per-cluster quotas, see stratified_positions.
+    """
+    if n >= len(features):
+        return np.arange(len(features))
+    n_clusters = min(CLUSTER_STRATA, len(features))
+    labels = MiniBatchKMeans(n_clusters=n_clusters, n_init=3, random_state=seed).fit_predict(features)
+    return stratified_positions(labels, n, seed)
+
+
+def sample_dataset(csv_path, has_header, profile, model_type, precision_mode, target_index=None,
+                   sample_sizes=None, seed=42):
+    """
+    Choose the rows of <csv_path> a run trains on. <profile> is the stored
+    DatasetProfile of the file and <target_index> indexes the washed frame,
+    whose columns are profile_kept_columns(profile).
+
+    Returns (rows, info): rows is a sorted array of row positions for
+    load_dataset, or None for the whole file, and info the keys recorded in
+    result_json (sampling_method, sample_size, population_size).
+    """
+    population = profile[0]['count'] if profile else 0
+    size = (sample_sizes or SAMPLE_SIZES).get(precision_mode)
+    method = MODEL_METHODS.get(model_type, 'reservoir')
+    if size is None or population <= size:
+        return None, {'sampling_method': 'none', 'sample_size': population, 'population_size': population}
+
+    kept = profile_kept_columns(profile)
+    if method == 'stratified' and target_index is not None and 0 <= target_index < len(kept):
+        labels = load_dataset(csv_path, has_header, columns=[kept[target_index]]).iloc[:, 0]
+        rows = stratified_positions(labels.to_numpy(), size, seed)
+    elif method == 'cluster':
+        pilot = reservoir_positions(population, PILOT_FACTOR * size, seed)
+        numeric = [column['name'] for column in profile
+                   if column['name'] in kept and column['dtype_guess'] == 'numeric']
+        if numeric:
+            features = standardized_features(load_dataset(csv_path, has_header, columns=numeric, rows=pilot), numeric)
+            rows = pilot[cluster_positions(features, size, seed)]
+        else:
+            method, rows = 'reservoir', reservoir_positions(population, size, seed)
+    else:
+        method, rows = 'reservoir', reservoir_positions(population, size, seed)
+
+    return rows, {'sampling_method': method, 'sample_size': int(len(rows)), 'population_size': population}
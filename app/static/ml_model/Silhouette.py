@@ -0,0 +1,100 @@
+"""
+Silhouette.py
+
+Silhouette scores of a clustering without the full pairwise distance
+matrix.
+
+sklearn's silhouette_score compares every row with every other one: time
+grows with the square of the rows, and scoring all of a large upload is
+out of reach. silhouette scores the rows one of two ways:
+
+    exact    every row, distances computed a block of rows at a time
+             (pairwise_distances_chunked), so memory stays within
+             SILHOUETTE_WORKING_MEMORY whatever the row count
+    sampled  a sample with per-cluster quotas (Sampling.stratified_positions),
+             so small clusters are not lost, scored exactly; each row
+             weighs as many rows of its cluster as it stands for, so the
+             mean estimates that of all the rows
+
+Rows up to the sample size are scored exactly, larger inputs sampled.
+"""
+import numpy as np
+from sklearn.metrics import pairwise_distances_chunked
+
+from app.static.ml_model.Sampling import stratified_positions
+
+SILHOUETTE_RANDOM_STATE = 42  # rows sampled the same way every run
+SILHOUETTE_WORKING_MEMORY = 64  # MiB of distances held at a time
+
+# Rows the validation silhouette of a run is computed on per precision
+# mode, None scores every row exactly
+SILHOUETTE_SAMPLE_SIZES = {
+    'Fast': 2_000,
+    'Balance': 10_000,
+    'High Precision': 20_000,
+}
+
+
+def silhouette_sample_size(precision_mode, sizes=None):
+    # Rows the silhouette of <precision_mode> is computed on, <sizes> (the
+    # SILHOUETTE_SAMPLE_SIZES config) replacing SILHOUETTE_SAMPLE_SIZES
+    return (sizes or SILHOUETTE_SAMPLE_SIZES).get(precision_mode)
+
+
+def silhouette_values(X, labels, working_memory=SILHOUETTE_WORKING_MEMORY) -> np.ndarray:
+    """
+    The silhouette of every row of <X> clustered as <labels>, as sklearn's
+    silhouette_samples (0 for rows alone in their cluster) with at most
+    <working_memory> MiB of distances held at a time.
+    """
+    _, codes = np.unique(labels, return_inverse=True)
+    counts = np.bincount(codes)
+    # Distances summed per cluster with one product per block of rows
+    members = np.zeros((len(codes), len(counts)))
+    members[np.arange(len(codes)), codes] = 1.0
+
+    def reduce(distances, start):
+        sums = distances @ members
+        rows = np.arange(len(sums))
+        own = codes[start:start + len(sums)]
+        a = sums[rows, own] / np.maximum(counts[own] - 1, 1)
+        sums[rows, own] = np.inf
+        b = (sums / counts).min(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.nan_to_num((b - a) / np.maximum(a, b))
+        values[counts[own] == 1] = 0.0
+        return values
+
+    return np.concatenate(list(pairwise_distances_chunked(X, reduce_func=reduce, working_memory=working_memory)))
+
+
+def silhouette(X, labels, sample_size=None, seed=SILHOUETTE_RANDOM_STATE,
+               working_memory=SILHOUETTE_WORKING_MEMORY):
+    """
+    The mean silhouette of the rows of <X> clustered as <labels>: exact when
+    there are at most <sample_size> rows (or it is None), estimated from a
+    stratified sample of about <sample_size> rows otherwise, see the module
+    docstring.
+
+    Returns (score, info): score is None when it is undefined (a single
+    cluster, or one per row), info the keys recorded in result_json
+    (silhouette_method, silhouette_rows).
+    """
+    X = np.asarray(X)
+    labels = np.asarray(labels)
+    n_clusters = len(np.unique(labels))
+    if sample_size is None or len(X) <= sample_size:
+        method, rows = 'exact', np.arange(len(X))
+    else:
+        method, rows = 'sampled', stratified_positions(labels, sample_size, seed)
+    info = {'silhouette_method': method, 'silhouette_rows': int(len(rows))}
+    if not 1 < n_clusters < len(X):
+        return None, info
+
+    values = silhouette_values(X[rows], labels[rows], working_memory)
+    if method == 'exact':
+        return float(values.mean()), info
+    # Each sampled row stands for the rows of its cluster left out
+    _, codes = np.unique(labels, return_inverse=True)
+    weights = np.bincount(codes) / np.bincount(codes[rows], minlength=n_clusters)
+    return float(np.average(values, weights=weights[codes[rows]])), info
@@ -0,0 +1,175 @@
+"""
+TargetSuggester.py
+
+Local, statistical guess of the target column of an uploaded dataset.
+
+A target is usually the column the other columns explain best. On a row
+sample every candidate column is scored by how strongly the numeric
+features depend on it, all in a few matrix products:
+
+    numeric candidate      squared Pearson correlation (r^2) with each feature
+    categorical candidate  correlation ratio (eta^2), the share of each
+                           feature's variance explained by the classes
+
+A candidate's score is the mean of its TOP_FEATURES strongest dependencies.
+Identifier-like columns (one distinct value per row) and free text are never
+candidates. The confidence is the relative gap between the best and the
+runner-up score, so it is low whenever the choice is a close call; the
+upload path only asks GPT in that case.
+"""
+import numpy as np
+import pandas as pd
+
+from app.static.ml_model.ColumnarCache import load_dataset
+from app.static.ml_model.DataWashing import profile_kept_columns
+
+SAMPLE_ROWS = 5_000           # rows scored, drawn at random from the dataset
+CLASS_LIMIT = 20              # at most this many distinct values makes a column categorical
+TOP_FEATURES = 3              # strongest dependencies averaged into a candidate's score
+CONFIDENCE_THRESHOLD = 0.25   # below this the suggestion is handed to GPT
+NUMERIC_TARGET_WEIGHT = 0.5   # continuous columns are often just derived from each other
+ID_RATIO = 0.95               # distinct / non-null ratio above which a column is an identifier
+
+
+def _is_identifier(column_profile) -> bool:
+    non_null = column_profile['count'] * (1 - column_profile['null_ratio'])
+    return (not column_profile['cardinality_capped'] and non_null > CLASS_LIMIT
+            and column_profile['cardinality'] >= ID_RATIO * non_null
+            and (column_profile['dtype_guess'] == 'string'
+                 or (column_profile['min'] is not None and float(column_profile['min']).is_integer())))
+
+
+def _candidates(df, profile):
+    # (name, kind) of the columns that could be a target, kind is 'numeric' or 'categorical'
+    column_profiles = {column['name']: column for column in profile}
+    candidates = []
+    for name in df.columns:
+        column_profile = column_profiles.get(name)
+        if column_profile is None or _is_identifier(column_profile):
+            continue
+        categorical = not column_profile['cardinality_capped'] and 2 <= column_profile['cardinality'] <= CLASS_LIMIT
+        if categorical:
+            candidates.append((name, 'categorical'))
+        elif column_profile['dtype_guess'] == 'numeric':
+            candidates.append((name, 'numeric'))
+    return candidates
+
+
+def standardized_features(df, names) -> np.ndarray:
+    # Column-standardised float matrix, missing values at the column mean (i.e. 0)
+    values = df[names].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1.0
+    values = (values - mean) / std
+    values[np.isnan(values)] = 0.0
+    return values
+
+
+def _correlation_ratio(labels, features):
+    # eta^2 of every feature column for the classes in <labels>, vectorised over features
+    codes, classes = pd.factorize(labels)
+    known = codes >= 0
+    codes, features = codes[known], features[known]
+    if len(classes) < 2 or len(codes) == 0:
+        return np.zeros(features.shape[1])
+    one_hot = np.zeros((len(codes), len(classes)))
+    one_hot[np.arange(len(codes)), codes] = 1.0
+    counts = one_hot.sum(axis=0)
+    class_means = (one_hot.T @ features) / counts[:, None]
+    overall = features.mean(axis=0)
+    between = (counts[:, None] * (class_means - overall) ** 2).sum(axis=0)
+    total = ((features - overall) ** 2).sum(axis=0)
+    return np.divide(between, total, out=np.zeros_like(between), where=total > 0)
+
+
+def score_columns(df, profile, sample_rows=SAMPLE_ROWS, seed=42) -> dict:
+    """
+    Score every candidate target column of <df> (columns named as in <profile>,
+    the per-column list from DatasetProfiler). Returns {column name: score}.
+    """
+    if len(df) > sample_rows:
+        df = df.sample(n=sample_rows, random_state=seed)
+
+    candidates = _candidates(df, profile)
+    column_profiles = {column['name']: column for column in profile}
+    feature_names = [name for name in df.columns
+                     if column_profiles.get(name, {}).get('dtype_guess') == 'numeric'
+                     and not _is_identifier(column_profiles[name])]
+    if not candidates or not feature_names:
+        return {}
+
+    features = standardized_features(df, feature_names)
+    # Features are standardised, so their Gram matrix is the correlation matrix (constant columns give 0)
+    r_squared = (features.T @ features / len(features)) ** 2
+
+    scores = {}
+    for name, kind in candidates:
+        others = np.array([feature != name for feature in feature_names])
+        if not others.any():
+            continue
+        if kind == 'categorical':
+            dependence = _correlation_ratio(df[name].to_numpy(), features[:, others])
+            weight = 1.0
+        else:
+            dependence = r_squared[feature_names.index(name)][others]
+            weight = NUMERIC_TARGET_WEIGHT
+        top = np.sort(dependence)[::-1][:TOP_FEATURES]
+        scores[name] = float(weight * top.mean())
+    return scores
+
+
+def training_index(profile, name):
+    """
+    Index of the column <name> in the washed frame training reads, whose
+    columns are profile_kept_columns(profile). This is the "Training Index"
+    the select_model form asks for, not the column's position in the
+    uploaded file. None when washing drops the column.
+    """
+    kept = profile_kept_columns(profile)
+    return kept.index(name) if name in kept else None
+
+
+def position_to_training_index(profile, position):
+    """
+    training_index of the column at <position> of the uploaded file, the
+    index GPT_column_suggestion answers with. None when there is no such
+    column or washing drops it.
+    """
+    name = next((column['name'] for column in profile if column['position'] == position), None)
+    return None if name is None else training_index(profile, name)
+
+
+def suggest_target_column(df, profile, sample_rows=SAMPLE_ROWS, seed=42):
+    """
+    Suggest the target column of <df>. Returns (index, confidence) where
+    index is the column's training_index and confidence is in [0, 1].
+    Returns (None, 0.0) when no column qualifies or washing drops the best one.
+    """
+    scores = score_columns(df, profile, sample_rows, seed)
+    if not scores:
+        return None, 0.0
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best_name, best = ranked[0]
+    index = training_index(profile, best_name)
+    if index is None:
+        return None, 0.0
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    confidence = (best - runner_up) / best if best > 0 else 0.0
+    return index, round(confidence, 3)
+
+
+def suggest_for_upload(csv_path, profile, sample_rows=SAMPLE_ROWS, seed=42):
+    """
+    suggest_target_column for an uploaded CSV with a header, reading only a
+    random row sample of the kept columns from its Arrow copy.
+    """
+    row_count = profile[0]['count'] if profile else 0
+    if row_count == 0:
+        return None, 0.0
+    rows = None
+    if row_count > sample_rows:
+        rows = np.sort(np.random.default_rng(seed).choice(row_count, size=sample_rows, replace=False))
+    # Columns washing drops (mostly missing, dates) are never a target
+    df = load_dataset(csv_path, True, columns=profile_kept_columns(profile), rows=rows)
+    return suggest_target_column(df, profile, sample_rows, seed)
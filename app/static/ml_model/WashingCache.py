@@ -0,0 +1,279 @@
+"""
+WashingCache.py
+
+Content-addressed cache of washed datasets.
+
+Running several models on the same upload would load and wash the same
+rows every time. The washed frame is instead stored once as an Arrow IPC
+file (Feather v2, uncompressed) together with the fitted DataWasher state
+and its washing report, under a key made of the file content hash, the
+header flag, the washing version and the rows trained on (sampled runs
+wash a subset). A changed file, a different header setting or a new
+washing version therefore never hits an old entry.
+
+Files too large to wash in memory are washed out of core by
+wash_into_cache: chunks stream through a fitted DataWasher straight into
+their cache entry, which trainers that stream read back a record batch at
+a time through scan_washed. Washing out of core does not make the washed
+rows fit in memory, so the other trainers read entries through
+load_washed_sample: an entry above OUT_OF_CORE_LOAD_BYTES loads as a
+uniform sample of the rows that fit, taken from the memory map.
+
+The cache directory is capped at CACHE_MAX_BYTES. A hit touches its file,
+so the modification times order the entries by last use and the least
+recently used ones are evicted first.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from app.static.ml_model.DataWashing import WASHING_VERSION, DataWasher
+from app.static.ml_model.Sampling import reservoir_positions
+
+CACHE_DIR = os.path.join('data', 'cache', 'washed')
+CACHE_MAX_BYTES = 1024 ** 3  # washed copies kept before the least recently used are evicted
+OUT_OF_CORE_ROWS = 2_000_000  # whole files with more rows are washed chunk by chunk, see wash_into_cache
+OUT_OF_CORE_LOAD_BYTES = 512 * 1024 ** 2  # most of an entry loaded by trainers that do not stream
+_WASHER_KEY = b'washing'     # schema metadata entry holding the DataWasher JSON
+_REPORT_KEY = b'washing_report'  # schema metadata entry holding DataWasher.report
+
+
+def washed_cache_key(content_hash, has_header, rows=None) -> str:
+    """
+    Cache key of the washed rows <rows> (sorted positions, None for the
+    whole file) of the upload with SHA-256 <content_hash>.
+    """
+    key = hashlib.sha256(f"{content_hash}:{int(bool(has_header))}:{WASHING_VERSION}:".encode())
+    if rows is None:
+        key.update(b'all')
+    else:
+        key.update(np.asarray(rows, dtype=np.int64).tobytes())
+    return key.hexdigest()
+
+
+def _entry_path(key, cache_dir) -> str:
+    return os.path.join(cache_dir, key + '.arrow')
+
+
+def _partial_path(path) -> str:
+    # A partial file of its own next to <path>: jobs washing the same dataset
+    # write the same key, each to its file, the last one replacing the other
+    fd, partial_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.part',
+                                        dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    return partial_path
+
+
+def _washed_frame(table) -> pd.DataFrame:
+    df = table.to_pandas()
+    for field in table.schema:
+        # Arrow hands missing strings back as None, washing keeps NaN
+        if pa.types.is_string(field.type) and table.column(field.name).null_count:
+            df[field.name] = df[field.name].where(df[field.name].notna(), np.nan)
+    return df
+
+
+def _washing_state(metadata):
+    # (DataWasher JSON, washing report) kept in the schema metadata of an entry
+    report = json.loads(metadata[_REPORT_KEY]) if _REPORT_KEY in metadata else None
+    return metadata[_WASHER_KEY].decode(), report
+
+
+def load_washed(key, cache_dir=CACHE_DIR):
+    """
+    Return (washed frame, DataWasher JSON, washing report) stored under
+    <key>, or None on a miss. The report is None for entries stored without
+    one.
+    """
+    path = _entry_path(key, cache_dir)
+    try:
+        table = feather.read_table(path, memory_map=True)
+        os.utime(path)  # mark as recently used
+    except (FileNotFoundError, pa.ArrowException):
+        return None
+    return (_washed_frame(table), *_washing_state(table.schema.metadata))
+
+
+def load_washed_sample(key, cache_dir=CACHE_DIR, max_bytes=OUT_OF_CORE_LOAD_BYTES, seed=42):
+    """
+    load_washed for trainers that hold their rows in memory: an entry
+    larger than <max_bytes> loads as a uniform sample (reservoir_positions)
+    of as many rows as fit, the other rows staying in the memory map.
+
+    Return (washed frame, DataWasher JSON, washing report, rows in the
+    entry) or None on a miss.
+    """
+    path = _entry_path(key, cache_dir)
+    try:
+        table = feather.read_table(path, memory_map=True)
+        os.utime(path)  # mark as recently used
+    except (FileNotFoundError, pa.ArrowException):
+        return None
+    population = table.num_rows
+    if table.nbytes > max_bytes:
+        size = max(max_bytes * population // table.nbytes, 1)
+        table = table.take(pa.array(reservoir_positions(population, size, seed)))
+    return (_washed_frame(table), *_washing_state(table.schema.metadata), population)
+
+
+class WashedChunks:
+    """
+    The washed frame of a cache entry, read one record batch at a time from
+    the memory-mapped file on every iteration, so only the batch being read
+    is held in memory. len() is its row count. The file stays mapped while
+    the object lives, even if the entry is evicted meanwhile.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._reader = pa.ipc.open_file(pa.memory_map(path))
+        self.schema = self._reader.schema
+        # Stored index columns are not data columns
+        index_columns = (self.schema.pandas_metadata or {}).get('index_columns', [])
+        self.columns = [name for name in self.schema.names if name not in index_columns]
+        self.rows = sum(self._reader.get_batch(i).num_rows for i in range(self._reader.num_record_batches))
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        for i in range(self._reader.num_record_batches):
+            yield _washed_frame(pa.Table.from_batches([self._reader.get_batch(i)]))
+
+
+def scan_washed(key, cache_dir=CACHE_DIR):
+    """
+    Return (WashedChunks, DataWasher JSON, washing report) of the entry
+    <key> without loading its rows, or None on a miss.
+    """
+    path = _entry_path(key, cache_dir)
+    try:
+        chunks = WashedChunks(path)
+        os.utime(path)  # mark as recently used
+    except (FileNotFoundError, pa.ArrowException):
+        return None
+    return (chunks, *_washing_state(chunks.schema.metadata))
+
+
+def _washing_metadata(metadata, washing_json, report) -> dict:
+    metadata = {**(metadata or {}), _WASHER_KEY: washing_json.encode()}
+    if report is not None:
+        metadata[_REPORT_KEY] = json.dumps(report).encode()
+    return metadata
+
+
+def store_washed(key, df, washing_json, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, report=None) -> bool:
+    """
+    Store the washed frame <df>, its DataWasher JSON and optionally the
+    washing <report> of the fit under <key>, then
+    evict least recently used entries above <max_bytes>. Returns False when
+    the frame cannot be stored (columns Arrow cannot type, or larger than the
+    whole cache).
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except pa.ArrowException:
+        return False
+    if table.nbytes > max_bytes:
+        return False
+    table = table.replace_schema_metadata(_washing_metadata(table.schema.metadata, washing_json, report))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _entry_path(key, cache_dir)
+    partial_path = _partial_path(path)
+    try:
+        feather.write_feather(table, partial_path, compression='uncompressed')
+        os.replace(partial_path, path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    _evict(cache_dir, max_bytes)
+    return True
+
+
+def _washed_schema(washed, washing_json, report) -> pa.Schema:
+    # Arrow schema of every washed chunk, taken from the first one. A kept raw
+    # column that is all missing there is typed as string, the loader's type
+    # for text columns.
+    schema = pa.Table.from_pandas(washed, preserve_index=True).schema
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema.with_metadata(_washing_metadata(schema.metadata, washing_json, report))
+
+
+def wash_into_cache(key, make_chunks, profile, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    Wash a dataset too large for memory into the cache entry <key>, in two
+    streaming passes over the frames of make_chunks() (a callable returning
+    a fresh chunk iterator, e.g. over ColumnarCache.iter_dataset): the first
+    fits a DataWasher on <profile>, the second transforms every chunk and
+    appends it to the entry. Memory is bounded by the chunk size.
+
+    Returns the fitted DataWasher, its report completed with the washed
+    size and total time, or None when a chunk has columns Arrow cannot
+    type. The new entry is exempt from the eviction its own write
+    triggers, load it with load_washed.
+    """
+    started = time.perf_counter()
+    washer = DataWasher(profile).fit_chunks(make_chunks())
+    washing_json = washer.to_json()
+    memory_after = 0
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _entry_path(key, cache_dir)
+    partial_path = _partial_path(path)
+    try:
+        with pa.OSFile(partial_path, 'wb') as sink:
+            writer = None
+            for chunk in make_chunks():
+                washed = washer.transform(chunk, drop_invalid=True)
+                # Row positions are stored as a plain index column, a range index would only keep its bounds
+                washed.index = pd.Index(washed.index.to_numpy(dtype=np.int64))
+                memory_after += int(washed.memory_usage(deep=True, index=False).sum())
+                if writer is None:
+                    # The stored report lacks the washed size, known only after this pass
+                    schema = _washed_schema(washed, washing_json, washer.report)
+                    writer = pa.ipc.new_file(sink, schema)
+                writer.write_table(pa.Table.from_pandas(washed, schema=schema, preserve_index=True))
+            writer.close()
+        os.replace(partial_path, path)
+    except Exception as e:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        if isinstance(e, pa.ArrowException):
+            return None
+        raise
+    _evict(cache_dir, max_bytes, keep=os.path.basename(path))
+    washer.report['memory_after_bytes'] = memory_after
+    washer.report['seconds'] = round(time.perf_counter() - started, 6)
+    return washer
+
+
+def _evict(cache_dir, max_bytes, keep=None):
+    # Remove the least recently used entries until the directory fits <max_bytes>,
+    # never the entry named <keep>
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.arrow'):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if name == keep:
+            continue
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass  # evicted by a concurrent run
+        total -= size
@@ -0,0 +1,41 @@
+"""
+Background work that should not hold up a request.
+
+Tasks run on a small thread pool inside their own application context, so
+they can use the database like a view does. A task is responsible for
+recording its own outcome (e.g. a status column) since nobody waits on it.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from flask import current_app
+
+from app import db
+
+BACKGROUND_WORKERS = 2
+
+_executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix='background')
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) on the background pool and return its Future.
+    With BACKGROUND_TASKS_INLINE set in the config the task runs right away
+    in the calling thread, which keeps tests deterministic.
+    """
+    app = current_app._get_current_object()
+
+    def task():
+        with app.app_context():
+            try:
+                return func(*args, **kwargs)
+            finally:
+                db.session.remove()
+
+    if app.config.get('BACKGROUND_TASKS_INLINE'):
+        future = Future()
+        try:
+            future.set_result(task())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return _executor.submit(task)
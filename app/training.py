@@ -0,0 +1,297 @@
+"""
+Model training requested from select_model.
+
+select_model only records a TrainingJob; the worker pool (app/worker.py)
+claims queued jobs and trains each with run_training_job, which profiles,
+samples and washes the dataset, trains the model and saves the ModelRun.
+A job goes queued -> running -> succeeded or failed, and the results page
+shows where it is: hyperparameter searches report their progress into the job,
+streamed to the browser as Server-Sent Events. A cancelled job is stopped
+by the worker pool, queued ones never start.
+"""
+import json
+import os
+import time
+import traceback
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+from app.models import DatasetProfile, ModelRun, TrainingJob, UploadedData
+from app.static.ml_model.ColumnarCache import (iter_dataset,
+                                               load_compact_dataset,
+                                               load_dataset)
+from app.static.ml_model.DatasetProfiler import profile_dataset
+from app.static.ml_model.DataWashing import (WASHING_WORKERS, DataWasher,
+                                             profile_kept_columns)
+from app.static.ml_model.K_means import kmeans_function
+from app.static.ml_model.LinearRegression import LinearRegressionTraining
+from app.static.ml_model.MiniBatchClustering import kmeans_backend
+from app.static.ml_model.ModelSearch import search_time_budget
+from app.static.ml_model.Sampling import sample_dataset
+from app.static.ml_model.SVM_classifier import SVMClassifier
+from app.static.ml_model.WashingCache import (CACHE_DIR, CACHE_MAX_BYTES,
+                                              OUT_OF_CORE_LOAD_BYTES,
+                                              OUT_OF_CORE_ROWS,
+                                              load_washed_sample, scan_washed,
+                                              store_washed, wash_into_cache,
+                                              washed_cache_key)
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+
+def dataset_profile(dataset, has_header):
+    # Stored profile of an upload, computed and saved on first use for older uploads
+    # and for headerless reads
+    if dataset is None:
+        return None
+    record = DatasetProfile.query.filter_by(dataset_id=dataset.id, has_header=has_header).first()
+    if record is None:
+        if not os.path.exists(dataset.file_path):
+            return None
+        profile = profile_dataset(dataset.file_path, has_header)
+        record = DatasetProfile(
+            dataset_id=dataset.id,
+            has_header=has_header,
+            row_count=profile[0]['count'] if profile else 0,
+            columns_json=json.dumps(profile)
+        )
+        db.session.add(record)
+        db.session.commit()
+    return json.loads(record.columns_json)
+
+
+def _washed_dataset(filepath, has_header, dataset, profile, columns, rows, stream=False):
+    """
+    The washed training frame of <rows> (None for all) of the upload, with
+    the DataWasher JSON, the washing report and the keys recorded in
+    result_json about how it was obtained. Rows already washed for an
+    earlier run on the same content come from the washing cache; whole
+    files above OUT_OF_CORE_ROWS are washed chunk by chunk straight into it.
+    With <stream>, rows in the cache come as WashedChunks, read from disk
+    as they are used, instead of a frame; without it, a cache entry above
+    OUT_OF_CORE_LOAD_BYTES loads as a uniform sample of its rows.
+    """
+    cache_key = washed_cache_key(dataset.content_hash, has_header, rows) \
+        if dataset is not None and dataset.content_hash else None
+    cache_dir = current_app.config.get('WASHING_CACHE_DIR', CACHE_DIR)
+    max_bytes = current_app.config.get('WASHING_CACHE_MAX_BYTES', CACHE_MAX_BYTES)
+
+    cached = _read_washed(cache_key, cache_dir, stream) if cache_key else None
+    if cached is not None:
+        cleaned_df, washing_json, report, info = cached
+        return cleaned_df, washing_json, report, {'washing_cache': 'hit', **info}
+
+    if cache_key and rows is None and profile \
+            and profile[0]['count'] > current_app.config.get('OUT_OF_CORE_ROWS', OUT_OF_CORE_ROWS):
+        washer = wash_into_cache(cache_key, lambda: iter_dataset(filepath, has_header, columns),
+                                 profile, cache_dir, max_bytes)
+        if washer is not None:
+            cleaned_df, washing_json, _, info = _read_washed(cache_key, cache_dir, stream)
+            return cleaned_df, washing_json, washer.report, {'washing_cache': 'miss', 'washing_mode': 'out_of_core',
+                                                             **info}
+
+    # Arrow copy, no CSV parsing on repeat runs; the profile lets columns load in compact dtypes
+    if profile:
+        raw_df, memory = load_compact_dataset(filepath, has_header, profile, columns=columns, rows=rows)
+    else:
+        raw_df, memory = load_dataset(filepath, has_header, columns=columns, rows=rows), {}
+    # The fitted washing state is kept with the run, so new rows can be cleaned the same way
+    washer = DataWasher(profile)
+    cleaned_df = washer.fit_transform(raw_df, workers=current_app.config.get('WASHING_WORKERS', WASHING_WORKERS))
+    washing_json = washer.to_json()
+    if cache_key:
+        store_washed(cache_key, cleaned_df, washing_json, cache_dir, max_bytes, report=washer.report)
+    return cleaned_df, washing_json, washer.report, {'washing_cache': 'miss', 'washing_mode': 'in_memory', **memory}
+
+
+def _read_washed(cache_key, cache_dir, stream):
+    # (washed rows, DataWasher JSON, washing report, result_json keys) of a
+    # cache entry, or None on a miss. Trainers that do not stream get at most
+    # OUT_OF_CORE_LOAD_BYTES of it, a uniform sample when the entry is larger,
+    # recorded as the run's sampling.
+    if stream:
+        cached = scan_washed(cache_key, cache_dir)
+        return (*cached, {}) if cached is not None else None
+    cached = load_washed_sample(cache_key, cache_dir,
+                                current_app.config.get('OUT_OF_CORE_LOAD_BYTES', OUT_OF_CORE_LOAD_BYTES))
+    if cached is None:
+        return None
+    cleaned_df, washing_json, report, population = cached
+    if len(cleaned_df) == population:
+        return cleaned_df, washing_json, report, {}
+    return cleaned_df, washing_json, report, {'sampling_method': 'reservoir', 'sample_size': len(cleaned_df),
+                                              'population_size': population, 'sampled_after_washing': True}
+
+
+def enqueue_training(user_id, filename, file_path, model_type, precision_mode, target_index, has_header):
+    """
+    Record a queued TrainingJob and return it. With TRAINING_JOBS_INLINE set
+    in the config the job is trained right away in the calling thread,
+    which keeps tests deterministic.
+    """
+    job = TrainingJob(
+        user_id=user_id,
+        filename=filename,
+        file_path=file_path,
+        model_type=model_type,
+        precision_mode=precision_mode,
+        target_index=target_index,
+        has_header=has_header,
+        status='queued',
+        created_at=datetime.now()
+    )
+    db.session.add(job)
+    db.session.commit()
+    if current_app.config.get('TRAINING_JOBS_INLINE') and claim_job(job.id, os.getpid()):
+        run_training_job(job.id)
+    return job
+
+
+def claim_job(job_id, worker_pid=None) -> bool:
+    # Move a queued job to running. The conditional update makes the claim
+    # atomic, so two workers never train the same job.
+    claimed = TrainingJob.query.filter_by(id=job_id, status='queued').update(
+        {'status': 'running', 'started_at': datetime.now(), 'worker_pid': worker_pid},
+        synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+
+def claim_next_job():
+    """
+    Claim the oldest queued job and return it, or None when the queue is
+    empty.
+    """
+    while True:
+        job = TrainingJob.query.filter_by(status='queued').order_by(TrainingJob.id).first()
+        if job is None:
+            return None
+        if claim_job(job.id):
+            db.session.refresh(job)
+            return job
+
+
+def cancel_job(job):
+    """
+    Cancel <job>: a queued one right away, a running one is marked for the
+    worker pool, which stops its process. Returns the job.
+    """
+    cancelled = TrainingJob.query.filter_by(id=job.id, status='queued').update(
+        {'status': 'cancelled', 'finished_at': datetime.now()}, synchronize_session=False)
+    if not cancelled and job.status == 'running':
+        job.cancel_requested = True
+    db.session.commit()
+    db.session.refresh(job)
+    return job
+
+
+def job_state(job) -> dict:
+    # What the results page shows of a job, sent by the status and event routes
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'error': job.error,
+        'run_id': job.modelrun_id,
+        'cancel_requested': bool(job.cancel_requested),
+        'progress': json.loads(job.progress_json) if job.progress_json else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _progress_recorder(job):
+    # Progress callback of the job's hyperparameter search (see ModelSearch)
+    def record(done, total, best_score, eta_seconds):
+        job.progress_json = json.dumps({
+            'candidates_done': done,
+            'candidates_total': total,
+            'best_score': best_score,
+            'eta_seconds': round(eta_seconds, 1) if eta_seconds is not None else None,
+        })
+        db.session.commit()
+    return record
+
+
+def finish_job(job, status, error=None, modelrun=None):
+    job.status = status
+    job.error = error
+    job.modelrun = modelrun
+    job.finished_at = datetime.now()
+    db.session.commit()
+
+
+def _train(job):
+    # The training pipeline of one job: (result, success, washing JSON, washing report)
+    dataset = UploadedData.query.filter_by(user_id=job.user_id, filename=job.filename) \
+        .order_by(UploadedData.upload_date.desc()).first()
+    profile = dataset_profile(dataset, job.has_header)
+    # Columns the profile already marks for dropping are never loaded
+    columns = profile_kept_columns(profile) if profile else None
+    # Large files are sampled per precision mode, only the chosen rows are read and washed
+    rows, sampling = sample_dataset(job.file_path, job.has_header, profile, job.model_type, job.precision_mode,
+                                    job.target_index, current_app.config.get('TRAINING_SAMPLE_SIZES')) \
+        if profile else (None, {})
+    # Mini-batch KMeans on a whole file streams its washed rows instead of loading them
+    stream = job.model_type == 'KMeans' and rows is None and bool(profile) \
+        and kmeans_backend(job.precision_mode, profile[0]['count'],
+                           current_app.config.get('KMEANS_MINIBATCH_ROWS')) == 'minibatch'
+    # Washed rows come from the cache when an earlier run on the same content washed them
+    cleaned_df, washing_json, washing_report, washing = _washed_dataset(job.file_path, job.has_header, dataset,
+                                                                        profile, columns, rows, stream)
+
+    progress = _progress_recorder(job)
+    # The hyperparameter search stops when the precision mode's time budget runs out
+    time_budget = search_time_budget(job.precision_mode, current_app.config.get('TRAINING_TIME_BUDGETS'))
+    started = time.perf_counter()
+    if job.model_type == 'SVM':
+        result, success = SVMClassifier(cleaned_df, job.target_index, job.precision_mode, progress, time_budget)
+    elif job.model_type == 'linear_regression':
+        result, success = LinearRegressionTraining(cleaned_df, job.target_index, job.precision_mode, progress,
+                                                   time_budget, current_app.config.get('LINEAR_PATH_MAX_BYTES'))
+    elif job.model_type == 'KMeans':
+        result, success = kmeans_function(cleaned_df, job.precision_mode, progress, time_budget,
+                                          current_app.config.get('SILHOUETTE_SAMPLE_SIZES'),
+                                          current_app.config.get('KMEANS_MINIBATCH_ROWS'))
+    else:
+        result, success = {'error': 'Unsupported model type'}, False
+    if success:
+        result['training_seconds'] = round(time.perf_counter() - started, 1)
+        result.update(sampling)
+        result.update(washing)
+    return result, success, washing_json, washing_report
+
+
+def run_training_job(job_id):
+    """
+    Train the claimed (running) job <job_id> and record its outcome: the
+    saved ModelRun when it succeeded, the error when it failed.
+    """
+    job = db.session.get(TrainingJob, job_id)
+    try:
+        result, success, washing_json, washing_report = _train(job)
+    except Exception as e:
+        traceback.print_exc()
+        finish_job(job, 'failed', error=f"{type(e).__name__}: {e}")
+        return job
+
+    if not success:
+        finish_job(job, 'failed', error=str(result))
+        return job
+    model_run = ModelRun(
+        user_id=job.user_id,
+        filename=job.filename,
+        model_type=job.model_type,
+        precision_mode=job.precision_mode,
+        target_index=job.target_index,
+        has_header=job.has_header,
+        graph_path=result.get('plot_path'),
+        result_json=json.dumps(result),
+        washing_json=washing_json,
+        washing_report=json.dumps(washing_report) if washing_report is not None else None,
+        created_at=datetime.now()
+    )
+    db.session.add(model_run)
+    finish_job(job, 'succeeded', modelrun=model_run)
+    return job
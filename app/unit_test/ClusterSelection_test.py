@@ -0,0 +1,53 @@
+import os
+import sys
+import unittest
+
+from sklearn.datasets import make_blobs
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.ClusterSelection import elbow_k, select_k
+
+
+class TestClusterSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.X, _ = make_blobs(n_samples=600, centers=3, n_features=4, cluster_std=0.5, random_state=0)
+
+    def test_elbow_k(self):
+        self.assertEqual(elbow_k([1, 2, 3, 4, 5], [100, 40, 10, 8, 7]), 3)
+        self.assertEqual(elbow_k([2, 3], [10, 5]), 2)
+
+    def test_finds_separated_clusters(self):
+        for mode in ['Fast', 'Balance', 'High Precision']:
+            with self.subTest(mode=mode):
+                model, info = select_k(self.X, mode)
+                self.assertEqual(model.n_clusters, 3)
+                self.assertEqual(info['selected_k'], 3)
+                self.assertEqual(info['search_strategy'], 'k_sweep')
+                self.assertFalse(info['search_stopped_early'])
+        self.assertEqual(select_k(self.X, 'Fast')[1]['k_selection_method'], 'elbow')
+        self.assertEqual(select_k(self.X, 'Balance')[1]['k_selection_method'], 'silhouette')
+
+    def test_progress_and_time_budget(self):
+        calls = []
+        model, info = select_k(self.X, 'Balance', n_jobs=1, progress=lambda *args: calls.append(args))
+        self.assertEqual([call[0] for call in calls], list(range(1, 20)))
+        self.assertEqual(calls[-1][1], 19)
+        self.assertEqual(info['search_candidates'], 19)
+
+        # The first round always runs, then the budget stops the sweep
+        model, info = select_k(self.X, 'Balance', n_jobs=1, time_budget=1e-6)
+        self.assertTrue(info['search_stopped_early'])
+        self.assertEqual(info['search_candidates'], 1)
+        self.assertEqual(model.n_clusters, 2)
+
+    def test_small_input(self):
+        model, info = select_k(self.X[:5], 'High Precision')
+        self.assertLess(info['selected_k'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.ColumnarCache import (build_columnar_cache,
+                                               columnar_path, iter_dataset,
+                                               load_compact_dataset,
+                                               load_dataset,
+                                               remove_columnar_cache)
+from app.static.ml_model.DatasetProfiler import profile_dataset
+
+
+class TestColumnarCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.temp_dir, 'data.csv')
+        # Types only become clear late in the file: 'late_float' gets a NaN and
+        # 'late_string' a text value in the last rows
+        n = 50
+        df = pd.DataFrame({
+            'int_col': np.arange(n),
+            'float_col': np.linspace(0, 1, n),
+            'late_float': list(range(n - 1)) + [np.nan],
+            'late_string': [str(i) for i in range(n - 1)] + ['text'],
+            'text': [f"name_{i}" for i in range(n)],
+            'flag': [i % 2 == 0 for i in range(n)],
+        })
+        df.to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_read_csv_with_header(self):
+        # Chunks much smaller than the file force the dtype merging logic
+        build_columnar_cache(self.csv_path, True, chunk_rows=8)
+        expected = pd.read_csv(self.csv_path)
+        pd.testing.assert_frame_equal(load_dataset(self.csv_path, True), expected)
+
+    def test_matches_read_csv_without_header(self):
+        build_columnar_cache(self.csv_path, False, chunk_rows=8)
+        expected = pd.read_csv(self.csv_path, header=None)
+        pd.testing.assert_frame_equal(load_dataset(self.csv_path, False), expected)
+
+    def test_booleans_with_missing_values_across_chunks(self):
+        # Chunks of 8 rows: 'flag' is bool in all but the last, 'late_bool' has no value in the first
+        pd.DataFrame({
+            'flag': [i % 2 == 0 for i in range(49)] + [np.nan],
+            'late_bool': [np.nan] * 8 + [i % 3 == 0 for i in range(42)],
+            'late_int': [np.nan] * 8 + list(range(42)),
+        }).to_csv(self.csv_path, index=False)
+        build_columnar_cache(self.csv_path, True, chunk_rows=8)
+        expected = pd.read_csv(self.csv_path)
+        df = load_dataset(self.csv_path, True)
+        pd.testing.assert_frame_equal(df, expected)
+        self.assertIs(df['flag'].iloc[0], True)
+        pd.testing.assert_frame_equal(pd.concat(iter_dataset(self.csv_path, True, chunk_rows=16)), expected)
+
+    def test_column_pruning(self):
+        df = load_dataset(self.csv_path, True, columns=['text', 'int_col'])
+        self.assertEqual(list(df.columns), ['text', 'int_col'])
+
+        df = load_dataset(self.csv_path, False, columns=[1])
+        self.assertEqual(list(df.columns), [1])
+
+    def test_row_selection(self):
+        df = load_dataset(self.csv_path, True, columns=['int_col', 'late_string'], rows=[3, 49, 0])
+        expected = pd.read_csv(self.csv_path)[['int_col', 'late_string']].iloc[[3, 49, 0]].reset_index(drop=True)
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_chunked_iteration(self):
+        chunks = list(iter_dataset(self.csv_path, True, columns=['int_col', 'late_string'], chunk_rows=16))
+        self.assertEqual([len(chunk) for chunk in chunks], [16, 16, 16, 2])
+        expected = pd.read_csv(self.csv_path)[['int_col', 'late_string']]
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+    def test_compact_load(self):
+        df = pd.DataFrame({
+            'small_int': np.arange(300) % 100,
+            'wide_int': np.arange(300) * 100_000,
+            'float_col': np.linspace(0, 1, 300),
+            'gappy_int': [np.nan if i % 7 == 0 else i for i in range(300)],
+            'category': ['red', 'green', 'blue'] * 100,
+            'unique_text': [f"row_{i}" for i in range(300)],
+        })
+        df.to_csv(self.csv_path, index=False)
+        profile = profile_dataset(self.csv_path)
+
+        compact, report = load_compact_dataset(self.csv_path, True, profile)
+        self.assertEqual(compact['small_int'].dtype, np.int8)
+        self.assertEqual(compact['wide_int'].dtype, np.int32)
+        self.assertEqual(compact['float_col'].dtype, np.float32)
+        self.assertEqual(compact['gappy_int'].dtype, np.float32)
+        self.assertIsInstance(compact['category'].dtype, pd.CategoricalDtype)
+        self.assertEqual(compact['unique_text'].dtype, object)
+
+        # Same values as the plain load, floats up to float32 precision
+        plain = load_dataset(self.csv_path, True)
+        pd.testing.assert_frame_equal(compact, plain, check_dtype=False, check_categorical=False, rtol=1e-6)
+        self.assertGreater(report['memory_saved_bytes'], 0)
+        self.assertEqual(report['memory_bytes'] + report['memory_saved_bytes'],
+                         int(plain.memory_usage(deep=True, index=False).sum()))
+
+    def test_cache_is_built_once_and_refreshed(self):
+        load_dataset(self.csv_path, True)
+        path = columnar_path(self.csv_path, True)
+        built_at = os.path.getmtime(path)
+
+        load_dataset(self.csv_path, True)
+        self.assertEqual(os.path.getmtime(path), built_at)
+
+        # A newer CSV invalidates the Arrow copy
+        time.sleep(0.01)
+        pd.DataFrame({'a': [1, 2]}).to_csv(self.csv_path, index=False)
+        os.utime(self.csv_path, (built_at + 10, built_at + 10))
+        self.assertEqual(list(load_dataset(self.csv_path, True).columns), ['a'])
+
+    def test_compressed_csv(self):
+        gz_path = self.csv_path + '.gz'
+        pd.read_csv(self.csv_path).to_csv(gz_path, index=False, compression='gzip')
+        build_columnar_cache(gz_path, True, chunk_rows=8)
+        pd.testing.assert_frame_equal(load_dataset(gz_path, True), pd.read_csv(self.csv_path))
+        chunks = list(iter_dataset(gz_path, True, columns=['int_col', 'text'], chunk_rows=20))
+        self.assertEqual([len(chunk) for chunk in chunks], [20, 20, 10])
+        pd.testing.assert_frame_equal(pd.concat(chunks), pd.read_csv(self.csv_path)[['int_col', 'text']])
+
+        # The copy of a compressed upload is compressed too, that of a plain one is not
+        df = pd.DataFrame({'value': np.arange(20_000) % 10, 'label': ['repeated text'] * 20_000})
+        df.to_csv(self.csv_path, index=False)
+        df.to_csv(gz_path, index=False, compression='gzip')
+        plain_size = os.path.getsize(build_columnar_cache(self.csv_path))
+        self.assertLess(os.path.getsize(build_columnar_cache(gz_path)), plain_size / 2)
+        pd.testing.assert_frame_equal(load_dataset(gz_path, True), df)
+
+    def test_remove_columnar_cache(self):
+        load_dataset(self.csv_path, True)
+        load_dataset(self.csv_path, False)
+        remove_columnar_cache(self.csv_path)
+        self.assertEqual(os.listdir(self.temp_dir), ['data.csv'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+import zstandard
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.DataIngestion import (append_chunk, compression_of,
+                                               ingest_csv_file,
+                                               ingest_csv_stream,
+                                               is_supported_upload, open_csv,
+                                               save_upload, staged_size)
+
+
+class TestDataIngestion(unittest.TestCase):
+
+    def setUp(self):
+        lines = ["name,age,score"]
+        for i in range(25):
+            lines.append(f"Person_{i},{20 + i},{i * 1.5}")
+        self.content = ("\n".join(lines) + "\n").encode('utf-8')
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.temp_dir):
+            os.remove(os.path.join(self.temp_dir, name))
+        os.rmdir(self.temp_dir)
+
+    def test_stream_is_copied_and_hashed(self):
+        destination = os.path.join(self.temp_dir, 'copy.csv')
+        # A tiny chunk size makes sure rows are split across reads
+        stats = ingest_csv_stream(io.BytesIO(self.content), destination, chunk_size=7)
+
+        with open(destination, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(stats['file_size'], len(self.content))
+        self.assertEqual(stats['content_hash'], hashlib.sha256(self.content).hexdigest())
+
+    def test_rows_schema_and_sample(self):
+        stats = ingest_csv_stream(io.BytesIO(self.content))
+
+        self.assertEqual(stats['row_count'], 25)
+        self.assertEqual(stats['columns'], ['name', 'age', 'score'])
+        self.assertEqual(stats['schema'], [['name', 'object'], ['age', 'int64'], ['score', 'float64']])
+        self.assertEqual(len(stats['sample']), 10)
+        self.assertEqual(stats['sample'][0], ['Person_0', 20, 0.0])
+
+    def test_quoted_newlines_and_blank_lines(self):
+        content = b'a,b\n1,"multi\nline"\n\n2,plain\n'
+        stats = ingest_csv_stream(io.BytesIO(content))
+
+        # The quoted newline belongs to one row and blank lines are skipped
+        self.assertEqual(stats['row_count'], 2)
+        self.assertEqual(stats['sample'][0], [1, 'multi\nline'])
+
+    def test_empty_stream(self):
+        with self.assertRaises(ValueError):
+            ingest_csv_stream(io.BytesIO(b''))
+
+    def test_save_upload_leaves_no_partial_file(self):
+        filepath = os.path.join(self.temp_dir, 'data.csv')
+        stats = save_upload(io.BytesIO(self.content), filepath)
+
+        self.assertTrue(os.path.exists(filepath))
+        self.assertFalse(os.path.exists(filepath + '.part'))
+        self.assertEqual(ingest_csv_file(filepath), stats)
+
+        with self.assertRaises(ValueError):
+            save_upload(io.BytesIO(b''), os.path.join(self.temp_dir, 'empty.csv'))
+        self.assertEqual(os.listdir(self.temp_dir), ['data.csv'])
+
+    def test_resumable_chunks(self):
+        staging_path = os.path.join(self.temp_dir, 'upload.part')
+        open(staging_path, 'wb').close()
+        total_size = len(self.content)
+        middle = total_size // 2
+
+        offset = append_chunk(io.BytesIO(self.content[:middle]), staging_path, 0, total_size, chunk_size=5)
+        self.assertEqual(offset, middle)
+        self.assertEqual(staged_size(staging_path), middle)
+
+        # A chunk that would overflow the declared size is rejected and leaves no trace
+        with self.assertRaises(ValueError):
+            append_chunk(io.BytesIO(self.content[middle:] + b'extra'), staging_path, middle, total_size)
+        self.assertEqual(staged_size(staging_path), middle)
+
+        # Resume from the acknowledged offset
+        offset = append_chunk(io.BytesIO(self.content[middle:]), staging_path, middle, total_size)
+        self.assertEqual(offset, total_size)
+        self.assertEqual(ingest_csv_file(staging_path)['content_hash'],
+                         hashlib.sha256(self.content).hexdigest())
+
+    def test_supported_names(self):
+        self.assertTrue(is_supported_upload('data.csv'))
+        self.assertTrue(is_supported_upload('DATA.CSV.GZ'))
+        self.assertFalse(is_supported_upload('data.csv.arrow'))
+        self.assertFalse(is_supported_upload('data.txt'))
+        self.assertEqual(compression_of('data.csv.zst'), 'zstd')
+        self.assertIsNone(compression_of('data.csv'))
+
+    def test_compressed_uploads(self):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w') as archive:
+            archive.writestr('data.csv', self.content)
+        compressed = {
+            'data.csv.gz': gzip.compress(self.content),
+            'data.csv.zst': zstandard.ZstdCompressor().compress(self.content),
+            'data.zip': zip_buffer.getvalue(),
+        }
+        plain = ingest_csv_stream(io.BytesIO(self.content))
+
+        for filename, payload in compressed.items():
+            with self.subTest(filename=filename):
+                filepath = os.path.join(self.temp_dir, filename)
+                stats = save_upload(io.BytesIO(payload), filepath)
+
+                # Stored and hashed as uploaded, parsed as the plain CSV
+                with open(filepath, 'rb') as f:
+                    self.assertEqual(f.read(), payload)
+                self.assertEqual(stats['content_hash'], hashlib.sha256(payload).hexdigest())
+                self.assertEqual(stats['file_size'], len(payload))
+                for key in ('row_count', 'columns', 'schema', 'sample'):
+                    self.assertEqual(stats[key], plain[key])
+                self.assertEqual(ingest_csv_file(filepath), stats)
+                with open_csv(filepath) as f:
+                    self.assertEqual(f.read(), self.content)
+
+    def test_corrupt_compressed_upload(self):
+        for filename in ('bad.csv.gz', 'bad.csv.zst', 'bad.zip'):
+            with self.subTest(filename=filename):
+                with self.assertRaises(ValueError):
+                    save_upload(io.BytesIO(b'not compressed at all'), os.path.join(self.temp_dir, filename))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,11 +4,14 @@ import numpy as np
 import tempfile
 import os
 import sys
+from unittest.mock import patch
 # Add root directory into test program
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
-from app.static.ml_model.DataWashing import DataWashing
+from app.static.ml_model.DataWashing import DataWasher, DataWashing
+from app.static.ml_model.DatasetProfiler import profile_chunks
+from benchmarks.legacy_washing import legacy_data_washing
 
 
 class TestDataWashing(unittest.TestCase):
@@ -99,6 +102,143 @@ class TestDataWashing(unittest.TestCase):
         
         # Check that column B is treated as string and encoded
         self.assertTrue(all(isinstance(x, int) for x in result['B']))
+
+    def test_compact_dtypes_are_kept(self):
+        df = pd.DataFrame({
+            'small': np.array([1, 2, 3, 4], dtype=np.int8),
+            'single': np.array([0.5, 1.5, 2.5, 3.5], dtype=np.float32),
+            'wide': np.array([1, 2, 3, 4], dtype=np.int64),
+            'colour': pd.Categorical(['red', 'blue', 'red', 'blue']),
+        })
+
+        result = DataWashing(df)
+
+        self.assertEqual(result['small'].dtype, np.float32)
+        self.assertEqual(result['single'].dtype, np.float32)
+        self.assertEqual(result['wide'].dtype, np.float64)
+        self.assertEqual(sorted(result['colour']), [0, 0, 1, 1])
+        # Same values as washing the plain frame
+        plain = DataWashing(df.astype({'small': np.int64, 'single': np.float64, 'colour': object}))
+        pd.testing.assert_frame_equal(result, plain, check_dtype=False)
+
+    def test_matches_legacy_engine(self):
+        rng = np.random.default_rng(0)
+        n = 200
+        mixed = [1, '2', 3.5, 'x', '', ' ', None, np.nan, True, pd.Timestamp('2020-01-01')]
+        df = pd.DataFrame({
+            'num': np.where(rng.random(n) < 0.1, np.nan, rng.normal(size=n)),
+            'small': rng.integers(0, 5, n).astype(np.int8),
+            'text': rng.choice(['a', 'b', 'c', ' ', None], n),
+            'mixed': [mixed[i] for i in rng.integers(0, len(mixed), n)],
+            'mostly_num': [str(v) if v % 5 else 'bad' for v in rng.integers(0, 100, n)],
+            'date': pd.date_range('2020-01-01', periods=n),
+            'flag': rng.random(n) < 0.5,
+        })
+        # Same rows, columns, values and dtypes as the row-by-row engine, with and without a profile
+        for profile in (None, profile_chunks([df])):
+            pd.testing.assert_frame_equal(DataWashing(df, profile), legacy_data_washing(df, profile))
+
+    def test_fitted_state_is_reused(self):
+        train = pd.DataFrame({
+            'A': [1.0, 2.0, 3.0, 'bad', 6.0],
+            'B': ['x', 'y', 'x', 'z', 'y'],
+            'C': [10, 20, 30, 40, 50],
+        })
+        washer = DataWasher()
+        washed = washer.fit_transform(train)
+        # A serialised washer cleans the training rows exactly as fitting did
+        restored = DataWasher.from_json(washer.to_json())
+        pd.testing.assert_frame_equal(restored.transform(train, drop_invalid=True), washed)
+
+        # New rows keep the fitted mean and classes instead of refitting
+        new = pd.DataFrame({'A': [None, 4.0], 'B': ['y', 'w'], 'C': [60, 70]})
+        result = restored.transform(new)
+        self.assertEqual(result['A'].tolist(), [3.0, 4.0])
+        self.assertEqual(result['B'].tolist(), [1, -1])
+        self.assertEqual(len(restored.transform(new, drop_invalid=True)), 0)
+
+        with self.assertRaises(ValueError):
+            restored.transform(new[['A', 'B']])
+        with self.assertRaises(ValueError):
+            DataWasher().transform(new)
+
+    def test_fit_in_chunks(self):
+        rng = np.random.default_rng(1)
+        n = 300
+        df = pd.DataFrame({
+            'amount': np.where(rng.random(n) < 0.1, np.nan, rng.normal(size=n)),
+            'colour': rng.choice(['red', 'green', 'blue', None], n),
+            'code': [str(v) if v % 9 else 'bad' for v in rng.integers(0, 50, n)],
+            'count': rng.integers(0, 5, n),
+        })
+        profile = profile_chunks([df])
+        washer = DataWasher(profile)
+        expected = washer.fit_transform(df)
+
+        # Chunk by chunk gives the same state, up to the summation order of the means
+        chunked = DataWasher(profile).fit_chunks(df.iloc[start:start + 64] for start in range(0, n, 64))
+        for step, chunked_step in zip(washer.steps, chunked.steps):
+            if step['kind'] == 'numeric':
+                self.assertAlmostEqual(chunked_step.pop('mean'), step['mean'])
+                step = {key: value for key, value in step.items() if key != 'mean'}
+            self.assertEqual(chunked_step, step)
+        pieces = [chunked.transform(df.iloc[start:start + 64], drop_invalid=True) for start in range(0, n, 64)]
+        pd.testing.assert_frame_equal(pd.concat(pieces), expected)
+
+        with self.assertRaises(ValueError):
+            DataWasher().fit_chunks([df])
+
+    def test_parallel_matches_serial(self):
+        rng = np.random.default_rng(2)
+        n = 120
+        mixed = [1, '2', 3.5, 'x', '', None, pd.Timestamp('2020-01-01')]
+        df = pd.DataFrame({
+            'num': np.where(rng.random(n) < 0.1, np.nan, rng.normal(size=n)),
+            'text': rng.choice(['a', 'b', 'c', ' ', None], n),
+            'numeric_text': [str(v) if v % 6 else 'bad' for v in rng.integers(0, 100, n)],
+            'mixed': [mixed[i] for i in rng.integers(0, len(mixed), n)],
+            'colour': pd.Categorical(rng.choice(['red', 'blue'], n)),
+            'flag': rng.random(n) < 0.5,
+        })
+        # Every column block goes to the workers, shared through Arrow or pickled ('mixed')
+        with patch('app.static.ml_model.DataWashing.PARALLEL_MIN_COLUMNS', 1):
+            for profile in (None, profile_chunks([df.astype({'colour': object})])):
+                serial, parallel = DataWasher(profile), DataWasher(profile)
+                expected = serial.fit_transform(df, workers=1)
+                pd.testing.assert_frame_equal(parallel.fit_transform(df, workers=2), expected)
+                self.assertEqual(parallel.to_json(), serial.to_json())
+
+            # Blocks that cannot be handed over (shared memory full) leave washing serial
+            with patch('app.static.ml_model.DataWashing._share_block', side_effect=OSError(28, 'No space left')):
+                pd.testing.assert_frame_equal(DataWasher(profile).fit_transform(df, workers=2), expected)
+
+    def test_washing_report(self):
+        df = pd.DataFrame({
+            'amount': [1.5, 'bad', 3.5, None, 5.5, 6.5],
+            'colour': ['red', 'blue', ' ', 'red', 'green', 'blue'],
+            'empty': [None, None, None, None, 1.0, None],
+            'date': pd.date_range('2023-01-01', periods=6),
+        })
+        washer = DataWasher()
+        washed = washer.fit_transform(df)
+        report = washer.report
+
+        self.assertEqual((report['rows_in'], report['rows_out']), (6, len(washed)))
+        self.assertEqual(report['rows_dropped'], {'non_numeric': 2, 'non_text': 1})
+        self.assertEqual(report['columns_dropped'], {'mostly_missing': ['empty'], 'datetime': ['date']})
+        self.assertEqual((report['columns_in'], report['columns_out']), (4, 2))
+        self.assertEqual([(c['name'], c['type'], c['rows_dropped']) for c in report['columns']],
+                         [('amount', 'numeric', 2), ('colour', 'string', 1), ('empty', 'dropped', 0),
+                          ('date', 'dropped', 0)])
+        self.assertGreater(report['memory_before_bytes'], report['memory_after_bytes'])
+        self.assertTrue(all(column['seconds'] >= 0 for column in report['columns']))
+
+        # Fitting in chunks reports the same rows and columns, memory after is left to the caller
+        chunked = DataWasher(profile_chunks([df])).fit_chunks([df.iloc[:3], df.iloc[3:]]).report
+        for key in ('rows_in', 'rows_out', 'rows_dropped', 'columns_dropped'):
+            self.assertEqual(chunked[key], report[key])
+        self.assertIsNone(chunked['memory_after_bytes'])
+
     def ten_columns_testing(self):
         num_rows = 1000  # A extreme large value for instances
         num_cols = 9   # A medium value for features
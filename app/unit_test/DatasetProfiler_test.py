@@ -0,0 +1,78 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.DatasetProfiler import (CARDINALITY_LIMIT,
+                                                 profile_chunks,
+                                                 profile_dataset)
+from app.static.ml_model.DataWashing import DataWashing, profile_kept_columns
+
+
+class TestDatasetProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'A': [1, 2, np.nan, 4, 5],
+            'B': ['a', 'b', 'c', np.nan, 'e'],
+            'C': [np.nan] * 5,
+            'D': [1, '2', 3, 4, 5],
+            'E': pd.date_range('2023-01-01', periods=5)
+        })
+
+    def test_profile_matches_whole_frame(self):
+        # Profiling in chunks must give the same answer as one big chunk
+        chunked = profile_chunks([self.df.iloc[:2], self.df.iloc[2:4], self.df.iloc[4:]])
+        whole = profile_chunks([self.df])
+        self.assertEqual(chunked, whole)
+
+        columns = {column['name']: column for column in chunked}
+        self.assertEqual(columns['A']['dtype_guess'], 'numeric')
+        self.assertAlmostEqual(columns['A']['null_ratio'], 0.2)
+        self.assertEqual(columns['A']['min'], 1.0)
+        self.assertEqual(columns['A']['max'], 5.0)
+        self.assertEqual(columns['A']['mean'], 3.0)
+        self.assertEqual(sum(columns['A']['histogram']['counts']), 4)
+        self.assertEqual(columns['B']['dtype_guess'], 'string')
+        self.assertEqual(columns['B']['cardinality'], 4)
+        self.assertEqual(columns['C']['dtype_guess'], 'empty')
+        self.assertEqual(columns['D']['dtype_guess'], 'numeric')
+        self.assertEqual(columns['E']['dtype_guess'], 'datetime')
+
+    def test_cardinality_is_capped(self):
+        df = pd.DataFrame({'id': [f"id_{i}" for i in range(CARDINALITY_LIMIT + 5)]})
+        column = profile_chunks([df])[0]
+        self.assertTrue(column['cardinality_capped'])
+        self.assertEqual(column['cardinality'], CARDINALITY_LIMIT)
+
+    def test_profile_dataset_from_csv(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            csv_path = os.path.join(temp_dir, 'data.csv')
+            self.df.drop(columns='E').to_csv(csv_path, index=False)
+            profile = profile_dataset(csv_path)
+            self.assertEqual([column['name'] for column in profile], ['A', 'B', 'C', 'D'])
+            self.assertEqual(profile[0]['count'], 5)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_datawashing_follows_profile(self):
+        profile = profile_chunks([self.df])
+        self.assertEqual(profile_kept_columns(profile), ['A', 'B', 'D'])
+
+        result = DataWashing(self.df, profile)
+        self.assertEqual(list(result.columns), ['A', 'B', 'D'])
+        self.assertFalse(result['A'].isna().any())
+        self.assertTrue(all(isinstance(x, int) for x in result['B']))
+
+
+if __name__ == '__main__':
+    unittest.main()
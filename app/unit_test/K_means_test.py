@@ -47,6 +47,15 @@ class TestKMeansFunction(unittest.TestCase):
         _, flag = kmeans_function(self.clustered_df, "Balance")
         self.assertTrue(flag)
         
+    def test_backend(self):
+        """Test only data above the row threshold trains on mini-batches"""
+        result, _ = kmeans_function(self.df, "Fast")
+        self.assertEqual(result['kmeans_backend'], 'kmeans')
+        result, _ = kmeans_function(self.df, "Balance")
+        self.assertEqual(result['kmeans_backend'], 'kmeans')
+        result, _ = kmeans_function(self.df, "Balance", minibatch_rows=50)
+        self.assertEqual(result['kmeans_backend'], 'minibatch')
+        
     def test_reproducibility(self):
         """Test results are consistent across runs"""
         _, flag1 = kmeans_function(self.df, "Fast")
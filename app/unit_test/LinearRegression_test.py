@@ -68,6 +68,18 @@ class TestLinearRegression(unittest.TestCase):
             self.assertEqual(flag, False)
     
     
+    def test_solver_fallback(self):
+        """Test the regularization path solver, and SGD for training sets above the limit"""
+        app = Flask(__name__)
+        with app.app_context():
+            result, flag = LinearRegressionTraining(clean_data=self.test_data, label_column='target', type="Balance")
+            self.assertEqual(flag, True)
+            self.assertEqual(result['regression_solver'], 'elastic_net_path')
+            result, flag = LinearRegressionTraining(clean_data=self.test_data, label_column='target', type="Fast",
+                                                    path_max_bytes=0)
+            self.assertEqual(flag, True)
+            self.assertEqual(result['regression_solver'], 'sgd')
+    
     def test_ckech_invalid_datainput(self):
         """Test function with invalid input data"""
         app = Flask(__name__)
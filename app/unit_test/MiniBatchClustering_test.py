@@ -0,0 +1,67 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.datasets import make_blobs
+from sklearn.preprocessing import StandardScaler
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.MiniBatchClustering import fit_minibatch, kmeans_backend
+from app.static.ml_model.WashingCache import scan_washed, store_washed
+
+
+class TestMiniBatchClustering(unittest.TestCase):
+
+    def setUp(self):
+        X, _ = make_blobs(n_samples=6_000, centers=3, n_features=4, cluster_std=0.5, random_state=0)
+        self.df = pd.DataFrame(X, columns=['a', 'b', 'c', 'd'])
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_backend(self):
+        self.assertEqual(kmeans_backend('Fast', 10), 'kmeans')
+        self.assertEqual(kmeans_backend('Fast', 5_000_000), 'minibatch')
+        self.assertEqual(kmeans_backend('Balance', 10), 'kmeans')
+        self.assertEqual(kmeans_backend('Balance', 10, minibatch_rows=5), 'minibatch')
+        self.assertEqual(kmeans_backend('High Precision', 5_000_000), 'minibatch')
+        self.assertEqual(kmeans_backend('What', 5_000_000), 'kmeans')
+
+    def test_fit_in_chunks(self):
+        # A budget of a few thousand rows splits the data in chunks
+        model, X_val, info = fit_minibatch(self.df, 'Balance', memory_bytes=256 * 1024)
+        self.assertEqual(model.n_clusters, 3)
+        self.assertEqual(X_val.shape, (1_200, 4))
+        self.assertAlmostEqual(float(X_val.mean()), 0.0, delta=0.1)
+        self.assertEqual(info['kmeans_backend'], 'minibatch')
+        self.assertEqual(info['kmeans_batch_size'], 4096)
+        self.assertEqual(info['kmeans_passes'], 2)
+        # Summed over the training rows around the final centroids, as full-batch KMeans reports it
+        full = KMeans(n_clusters=3, n_init=10, random_state=0).fit(StandardScaler().fit_transform(self.df))
+        self.assertAlmostEqual(model.inertia_ / (0.8 * full.inertia_), 1.0, delta=0.05)
+
+    def test_fit_from_disk(self):
+        store_washed('blobs', self.df, '{}', self.cache_dir)
+        chunks, _, _ = scan_washed('blobs', self.cache_dir)
+        model, X_val, info = fit_minibatch(chunks, 'Balance', memory_bytes=256 * 1024)
+        expected, expected_val, _ = fit_minibatch(self.df, 'Balance', memory_bytes=256 * 1024)
+        np.testing.assert_allclose(model.cluster_centers_, expected.cluster_centers_)
+        np.testing.assert_allclose(X_val, expected_val)
+
+    def test_time_budget(self):
+        model, _, info = fit_minibatch(self.df, 'High Precision', time_budget=1e-6, memory_bytes=256 * 1024)
+        self.assertTrue(info['search_stopped_early'])
+        self.assertEqual(info['kmeans_passes'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.model_selection import GridSearchCV
+from sklearn.svm import LinearSVC
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.ModelSearch import (ProgressGridSearchCV,
+                                             ProgressHalvingRandomSearchCV,
+                                             ProgressRandomizedSearchCV,
+                                             make_search, search_batches,
+                                             search_summary)
+
+
+class TestProgressGridSearchCV(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = make_classification(n_samples=120, n_features=5, random_state=0)
+        self.param_grid = {'C': [0.01, 0.1, 1, 10], 'tol': [1e-3, 1e-4]}
+
+    def test_search_batches(self):
+        batches = search_batches(list(range(10)), n_jobs=1, updates=4)
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 3, 1])
+        self.assertEqual(sum(batches, []), list(range(10)))
+
+    def test_progress_calls(self):
+        calls = []
+        search = ProgressGridSearchCV(LinearSVC(random_state=0), self.param_grid, cv=3,
+                                      progress=lambda *args: calls.append(args))
+        search.fit(self.X, self.y)
+
+        done = [call[0] for call in calls]
+        self.assertEqual(done, sorted(done))
+        self.assertEqual(done[-1], 8)
+        self.assertTrue(all(call[1] == 8 for call in calls))
+        self.assertAlmostEqual(calls[-1][2], search.best_score_)
+        self.assertEqual(calls[-1][3], 0)
+
+    def test_same_results_as_grid_search(self):
+        search = ProgressGridSearchCV(LinearSVC(random_state=0), self.param_grid, cv=3, progress=lambda *args: None)
+        reference = GridSearchCV(LinearSVC(random_state=0), self.param_grid, cv=3)
+        search.fit(self.X, self.y)
+        reference.fit(self.X, self.y)
+        self.assertEqual(search.best_params_, reference.best_params_)
+        np.testing.assert_allclose(search.cv_results_['mean_test_score'], reference.cv_results_['mean_test_score'])
+
+    def test_failed_batches_are_skipped(self):
+        # l1 penalty with hinge loss cannot be fitted, one candidate per batch
+        param_grid = {'C': [0.1, 1], 'penalty': ['l1', 'l2'], 'loss': ['hinge', 'squared_hinge']}
+        search = ProgressGridSearchCV(LinearSVC(random_state=0), param_grid, cv=3, n_jobs=1,
+                                      progress=lambda *args: None)
+        search.fit(self.X, self.y)
+        self.assertEqual(search.failed_candidates_, 2)
+        self.assertEqual(len(search.cv_results_['params']), 6)
+        self.assertFalse(search.best_params_['penalty'] == 'l1' and search.best_params_['loss'] == 'hinge')
+
+        search = ProgressGridSearchCV(LinearSVC(), {'penalty': ['l1'], 'loss': ['hinge']}, cv=3)
+        with self.assertRaises(ValueError):
+            search.fit(self.X, self.y)
+
+
+class TestMakeSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = make_classification(n_samples=1600, n_features=5, random_state=0)
+        self.param_grid = {'C': np.logspace(-3, 3, num=300).tolist(), 'tol': [1e-3, 1e-4, 1e-5]}
+
+    def test_strategy_per_precision_mode(self):
+        self.assertIsInstance(make_search(LinearSVC(), self.param_grid, 'Fast'), ProgressGridSearchCV)
+        self.assertIsInstance(make_search(LinearSVC(), self.param_grid, 'Balance'), ProgressRandomizedSearchCV)
+        self.assertIsInstance(make_search(LinearSVC(), self.param_grid, 'High Precision'),
+                              ProgressHalvingRandomSearchCV)
+        # Small grids are searched exhaustively
+        self.assertIsInstance(make_search(LinearSVC(), {'C': [0.1, 1]}, 'Balance'), ProgressGridSearchCV)
+
+    def test_halving_summary_and_progress(self):
+        calls = []
+        search = make_search(LinearSVC(random_state=0), self.param_grid, 'High Precision', cv=3,
+                             progress=lambda *args: calls.append(args))
+        search.fit(self.X, self.y)
+
+        summary = search_summary(search)
+        self.assertEqual(summary['search_strategy'], 'halving')
+        self.assertEqual(summary['search_candidates'], sum(search.n_candidates_))
+        self.assertEqual(summary['search_fits'], 3 * sum(search.n_candidates_))
+        # Fewer fits than the grid, on larger samples as the candidates shrink
+        self.assertLess(search.n_candidates_[-1], search.n_candidates_[0])
+        self.assertLess(search.n_resources_[0], search.n_resources_[-1])
+        self.assertEqual(calls[-1][:2], (summary['search_candidates'], summary['search_candidates']))
+        self.assertGreater(search.best_score_, 0.8)
+
+    def test_time_budget_keeps_best_so_far(self):
+        search = make_search(LinearSVC(random_state=0), self.param_grid, 'High Precision', cv=3,
+                             time_budget=1e-6)
+        search.fit(self.X, self.y)
+
+        # One batch is evaluated before the budget is checked, then the best of it is refit
+        summary = search_summary(search)
+        self.assertTrue(summary['search_stopped_early'])
+        self.assertEqual(summary['search_time_budget'], 1e-6)
+        self.assertLess(summary['search_candidates'], 729)
+        self.assertEqual(search.best_params_, search.cv_results_['params'][search.best_index_])
+        self.assertGreater(search.score(self.X, self.y), 0.8)
+
+        search = make_search(LinearSVC(random_state=0), {'C': [0.1, 1]}, 'Balance', cv=3, time_budget=60)
+        search.fit(self.X, self.y)
+        self.assertFalse(search_summary(search)['search_stopped_early'])
+        self.assertEqual(search_summary(search)['search_candidates'], 2)
+
+    def test_summary_without_search(self):
+        self.assertEqual(search_summary(candidates=5),
+                         {'search_strategy': 'none', 'search_candidates': 5, 'search_fits': 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from sklearn.datasets import make_regression
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.RegularizationPath import (PATH_MODES,
+                                                    fit_regularization_path,
+                                                    regression_solver)
+
+
+class TestRegularizationPath(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y, self.coef = make_regression(n_samples=500, n_features=10, n_informative=3, noise=1.0,
+                                                    coef=True, random_state=0)
+
+    def test_solver(self):
+        self.assertEqual(regression_solver('Fast', self.X), 'ridge_gcv')
+        self.assertEqual(regression_solver('High Precision', self.X), 'elastic_net_path')
+        self.assertEqual(regression_solver('Balance', self.X, path_max_bytes=1024), 'sgd')
+        self.assertEqual(regression_solver('What', self.X), 'sgd')
+
+    def test_ridge_gcv(self):
+        pipeline, info = fit_regularization_path(self.X, self.y, 'Fast')
+        self.assertGreater(pipeline.score(self.X, self.y), 0.99)
+        self.assertEqual(info['search_strategy'], 'gcv')
+        self.assertEqual(info['search_candidates'], len(PATH_MODES['Fast'][1]['alphas']))
+        self.assertIsNone(info['l1_ratio'])
+
+    def test_elastic_net_path(self):
+        calls = []
+        pipeline, info = fit_regularization_path(self.X, self.y, 'Balance', progress=lambda *args: calls.append(args))
+        settings = PATH_MODES['Balance'][1]
+        self.assertGreater(pipeline.score(self.X, self.y), 0.99)
+        # The uninformative features are left out
+        coef = pipeline[-1].coef_
+        self.assertTrue(np.all(np.abs(coef[self.coef == 0]) < np.abs(coef[self.coef != 0]).min()))
+        self.assertEqual([call[0] for call in calls], list(range(1, len(settings['l1_ratios']) + 1)))
+        self.assertEqual(info['search_candidates'], len(settings['l1_ratios']) * settings['n_alphas'])
+        self.assertIn(info['l1_ratio'], settings['l1_ratios'])
+        self.assertFalse(info['search_stopped_early'])
+
+    def test_time_budget(self):
+        # The first path always runs, then the budget stops the search
+        pipeline, info = fit_regularization_path(self.X, self.y, 'High Precision', time_budget=1e-6)
+        self.assertTrue(info['search_stopped_early'])
+        self.assertEqual(info['search_candidates'], PATH_MODES['High Precision'][1]['n_alphas'])
+        self.assertEqual(info['l1_ratio'], PATH_MODES['High Precision'][1]['l1_ratios'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.svm import LinearSVC
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.SVMPath import (SVM_PATH_MODES, _warm_path,
+                                         fit_svm_path, svm_dual, svm_pairs)
+
+
+class TestSVMPath(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.y = make_classification(n_samples=300, n_features=8, n_informative=4, n_classes=3,
+                                             random_state=0)
+
+    def test_pairs_and_dual(self):
+        self.assertEqual(svm_pairs(['l1', 'l2'], ['hinge', 'squared_hinge']),
+                         [('l1', 'squared_hinge'), ('l2', 'hinge'), ('l2', 'squared_hinge')])
+        self.assertFalse(svm_dual('l2', 'squared_hinge', 1000, 10))
+        self.assertTrue(svm_dual('l2', 'squared_hinge', 10, 1000))
+        # Pairs with a single formulation keep it whatever the shape
+        self.assertTrue(svm_dual('l2', 'hinge', 1000, 10))
+        self.assertFalse(svm_dual('l1', 'squared_hinge', 10, 1000))
+
+    def test_warm_path_matches_liblinear(self):
+        C_values = [0.1, 1, 10]
+        train, test = np.arange(240), np.arange(240, 300)
+        scores = _warm_path(self.X[train], self.y[train], self.X[test], self.y[test], C_values, 1e-6, 1000)
+        expected = [LinearSVC(C=C, dual=False, tol=1e-6, max_iter=10000).fit(self.X[train], self.y[train])
+                    .score(self.X[test], self.y[test]) for C in C_values]
+        np.testing.assert_allclose(scores, expected, atol=1 / 60)
+
+    def test_fit_svm_path(self):
+        calls = []
+        pipeline, info = fit_svm_path(self.X, self.y, 'Balance', progress=lambda *args: calls.append(args))
+        self.assertGreater(pipeline.score(self.X, self.y), 0.6)
+        self.assertEqual([call[0] for call in calls], [3, 6, 9])
+        self.assertEqual(info['search_candidates'], 9)
+        self.assertEqual(info['search_fits'], 9 * SVM_PATH_MODES['Balance']['cv'])
+        self.assertIn(info['svm_C'], SVM_PATH_MODES['Balance']['C'])
+        self.assertNotEqual((info['svm_penalty'], info['svm_loss']), ('l1', 'hinge'))
+        self.assertEqual(info['svm_dual'], svm_dual(info['svm_penalty'], info['svm_loss'], *self.X.shape))
+        self.assertEqual(pipeline[-1].dual, info['svm_dual'])
+
+    def test_time_budget(self):
+        # The first pair, warm-started, always runs, then the budget stops the search
+        pipeline, info = fit_svm_path(self.X, self.y, 'High Precision', time_budget=1e-6)
+        self.assertTrue(info['search_stopped_early'])
+        self.assertEqual(info['search_candidates'], 50)
+        self.assertEqual((info['svm_penalty'], info['svm_loss']), ('l2', 'squared_hinge'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.ColumnarCache import load_dataset
+from app.static.ml_model.DatasetProfiler import profile_dataset
+from app.static.ml_model.Sampling import (MIN_PER_STRATUM, cluster_positions,
+                                          reservoir_positions, sample_dataset,
+                                          stratified_positions)
+
+
+class TestSampling(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.temp_dir, 'data.csv')
+        rng = np.random.default_rng(0)
+        n = 2000
+        # 'label' has a rare class of 1% of the rows
+        pd.DataFrame({
+            'x': rng.normal(size=n),
+            'y': rng.normal(size=n),
+            'label': np.where(np.arange(n) % 100 == 0, 'rare', 'common'),
+        }).to_csv(self.csv_path, index=False)
+        self.profile = profile_dataset(self.csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_reservoir_positions_are_uniform(self):
+        rows = reservoir_positions(100_000, 1000, seed=1)
+        self.assertEqual(len(np.unique(rows)), 1000)
+        self.assertTrue(np.all(np.diff(rows) > 0))
+        self.assertTrue(0 <= rows[0] and rows[-1] < 100_000)
+        # Each decile of the stream gets about a tenth of the sample
+        deciles = np.bincount(rows // 10_000, minlength=10)
+        self.assertTrue(np.all(np.abs(deciles - 100) < 40))
+
+        np.testing.assert_array_equal(reservoir_positions(10, 20), np.arange(10))
+
+    def test_stratified_positions_keep_rare_classes(self):
+        labels = np.array(['common'] * 9990 + ['rare'] * 10)
+        rows = stratified_positions(labels, 200)
+        self.assertEqual((labels[rows] == 'rare').sum(), MIN_PER_STRATUM)
+        self.assertEqual((labels[rows] == 'common').sum(), 199)
+
+    def test_cluster_positions_keep_small_clusters(self):
+        rng = np.random.default_rng(0)
+        features = np.vstack([rng.normal(0, 0.1, size=(5000, 2)), rng.normal(10, 0.1, size=(15, 2))])
+        rows = cluster_positions(features, 100)
+        self.assertGreaterEqual((rows >= 5000).sum(), MIN_PER_STRATUM)
+
+    def test_sample_dataset(self):
+        sizes = {'Fast': 100, 'High Precision': None}
+        rows, info = sample_dataset(self.csv_path, True, self.profile, 'SVM', 'Fast', 2, sizes)
+        self.assertEqual(info['sampling_method'], 'stratified')
+        self.assertEqual(info['population_size'], 2000)
+        self.assertEqual(info['sample_size'], len(rows))
+        labels = load_dataset(self.csv_path, True, columns=['label'], rows=rows)['label']
+        self.assertGreaterEqual((labels == 'rare').sum(), MIN_PER_STRATUM)
+
+        _, info = sample_dataset(self.csv_path, True, self.profile, 'KMeans', 'Fast', None, sizes)
+        self.assertEqual(info['sampling_method'], 'cluster')
+        _, info = sample_dataset(self.csv_path, True, self.profile, 'linear_regression', 'Fast', 0, sizes)
+        self.assertEqual(info['sampling_method'], 'reservoir')
+
+        rows, info = sample_dataset(self.csv_path, True, self.profile, 'SVM', 'High Precision', 2, sizes)
+        self.assertIsNone(rows)
+        self.assertEqual(info['sampling_method'], 'none')
+
+
+if __name__ == '__main__':
+    unittest.main()
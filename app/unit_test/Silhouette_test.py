@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from sklearn.datasets import make_blobs
+from sklearn.metrics import silhouette_samples, silhouette_score
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.Silhouette import silhouette, silhouette_values
+
+
+class TestSilhouette(unittest.TestCase):
+
+    def setUp(self):
+        self.X, self.labels = make_blobs(n_samples=1500, centers=4, n_features=3, random_state=0)
+        self.labels[0] = 9  # a cluster of one row
+
+    def test_values_match_sklearn(self):
+        # A tiny working memory splits the distances in blocks of a few rows
+        values = silhouette_values(self.X, self.labels, working_memory=0.1)
+        np.testing.assert_allclose(values, silhouette_samples(self.X, self.labels), atol=1e-12)
+
+    def test_exact(self):
+        score, info = silhouette(self.X, self.labels, sample_size=2000)
+        self.assertAlmostEqual(score, silhouette_score(self.X, self.labels))
+        self.assertEqual(info, {'silhouette_method': 'exact', 'silhouette_rows': 1500})
+        self.assertEqual(silhouette(self.X, self.labels)[1]['silhouette_method'], 'exact')
+
+    def test_sampled(self):
+        score, info = silhouette(self.X, self.labels, sample_size=300)
+        self.assertEqual(info['silhouette_method'], 'sampled')
+        self.assertLess(abs(info['silhouette_rows'] - 300), 20)
+        self.assertAlmostEqual(score, silhouette_score(self.X, self.labels), delta=0.02)
+
+    def test_undefined(self):
+        score, info = silhouette(self.X, np.zeros(len(self.X)))
+        self.assertIsNone(score)
+        self.assertEqual(info['silhouette_method'], 'exact')
+
+
+if __name__ == '__main__':
+    unittest.main()
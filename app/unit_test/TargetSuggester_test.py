@@ -0,0 +1,89 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.DatasetProfiler import profile_chunks, profile_dataset
+from app.static.ml_model.TargetSuggester import (position_to_training_index,
+                                                 score_columns,
+                                                 suggest_for_upload,
+                                                 suggest_target_column)
+
+
+class TestTargetSuggester(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 400
+        signal = rng.normal(size=n)
+        # 'label' is the class the features were drawn around, 'id' is unique per row
+        self.df = pd.DataFrame({
+            'id': np.arange(1000, 1000 + n),
+            'f1': signal + rng.normal(scale=0.3, size=n),
+            'f2': -signal + rng.normal(scale=0.3, size=n),
+            'f3': signal * 2 + rng.normal(scale=0.5, size=n),
+            'noise': rng.normal(size=n),
+            'label': np.where(signal > 0, 'yes', 'no'),
+        })
+        self.profile = profile_chunks([self.df])
+
+    def test_class_column_is_suggested(self):
+        position, confidence = suggest_target_column(self.df, self.profile)
+        self.assertEqual(position, 5)
+        self.assertGreater(confidence, 0)
+        self.assertLessEqual(confidence, 1)
+
+    def test_identifier_is_never_a_candidate(self):
+        scores = score_columns(self.df, self.profile)
+        self.assertNotIn('id', scores)
+        self.assertGreater(scores['label'], scores['noise'])
+
+    def test_no_candidate(self):
+        df = pd.DataFrame({'text': [f"row {i}" for i in range(50)]})
+        self.assertEqual(suggest_target_column(df, profile_chunks([df])), (None, 0.0))
+
+    def test_suggest_for_upload_samples_rows(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            csv_path = os.path.join(temp_dir, 'data.csv')
+            self.df.to_csv(csv_path, index=False)
+            profile = profile_dataset(csv_path)
+            # A sample smaller than the file still finds the class column
+            position, _ = suggest_for_upload(csv_path, profile, sample_rows=200)
+            self.assertEqual(position, 5)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_suggestion_is_a_training_index(self):
+        # 'notes' is mostly missing, washing drops it and every later column moves up one
+        df = self.df.copy()
+        df.insert(0, 'notes', [np.nan if i % 5 else 'checked' for i in range(len(df))])
+        temp_dir = tempfile.mkdtemp()
+        try:
+            csv_path = os.path.join(temp_dir, 'data.csv')
+            df.to_csv(csv_path, index=False)
+            profile = profile_dataset(csv_path)
+            index, _ = suggest_for_upload(csv_path, profile)
+            self.assertEqual(index, 5)
+            self.assertEqual(position_to_training_index(profile, 6), 5)
+            # A dropped or non-existent column has no training index
+            self.assertIsNone(position_to_training_index(profile, 0))
+            self.assertIsNone(position_to_training_index(profile, 7))
+            # The best column dropped by washing is no suggestion
+            label_dropped = [dict(column, dtype_guess='empty') if column['name'] == 'label' else column
+                             for column in profile]
+            self.assertEqual(suggest_target_column(df, label_dropped), (None, 0.0))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app.static.ml_model.DatasetProfiler import profile_chunks
+from app.static.ml_model.DataWashing import DataWasher
+from app.static.ml_model.WashingCache import (load_washed, load_washed_sample,
+                                              scan_washed, store_washed,
+                                              wash_into_cache,
+                                              washed_cache_key)
+
+
+class TestWashingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        raw = pd.DataFrame({
+            'amount': np.array([1.5, 2.5, None, 4.5], dtype=np.float32),
+            'colour': ['red', 'blue', 'red', 'green'],
+            'note': ['a', np.nan, 'b', 'c'],
+            'count': [3, 1, 2, 5],
+        })
+        self.washer = DataWasher()
+        self.washed = self.washer.fit_transform(raw)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_round_trip(self):
+        key = washed_cache_key('abc', True)
+        self.assertIsNone(load_washed(key, self.cache_dir))
+
+        self.assertTrue(store_washed(key, self.washed, self.washer.to_json(), self.cache_dir,
+                                     report=self.washer.report))
+        df, washing_json, report = load_washed(key, self.cache_dir)
+        pd.testing.assert_frame_equal(df, self.washed)
+        self.assertEqual(washing_json, self.washer.to_json())
+        self.assertEqual(report, self.washer.report)
+
+        store_washed('no_report', self.washed, '{}', self.cache_dir)
+        self.assertIsNone(load_washed('no_report', self.cache_dir)[2])
+
+    def test_key_covers_content_header_and_rows(self):
+        keys = {
+            washed_cache_key('abc', True),
+            washed_cache_key('abd', True),
+            washed_cache_key('abc', False),
+            washed_cache_key('abc', True, rows=np.array([0, 2])),
+            washed_cache_key('abc', True, rows=np.array([0, 3])),
+        }
+        self.assertEqual(len(keys), 5)
+        self.assertEqual(washed_cache_key('abc', True, [0, 2]), washed_cache_key('abc', True, np.array([0, 2])))
+
+    def test_least_recently_used_is_evicted(self):
+        store_washed('first', self.washed, '{}', self.cache_dir)
+        store_washed('second', self.washed, '{}', self.cache_dir)
+        entry_size = os.path.getsize(os.path.join(self.cache_dir, 'first.arrow'))
+        # 'first' is used after 'second' was written, so 'second' goes first
+        past = time.time() - 10
+        os.utime(os.path.join(self.cache_dir, 'first.arrow'), (past, past))
+        os.utime(os.path.join(self.cache_dir, 'second.arrow'), (past + 1, past + 1))
+        load_washed('first', self.cache_dir)
+
+        store_washed('third', self.washed, '{}', self.cache_dir, max_bytes=int(2.5 * entry_size))
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['first.arrow', 'third.arrow'])
+
+    def test_out_of_core_washing(self):
+        raw = pd.DataFrame({
+            'amount': [1.5, 'bad', 3.5, 4.5, None, 6.5, 7.5],
+            'colour': ['red', 'blue', ' ', 'red', 'green', 'blue', 'red'],
+            'empty_at_first': [None, None, 'a', 'b', 'c', 'd', 'e'],
+        })
+        profile = profile_chunks([raw])
+        expected = DataWasher(profile).fit_transform(raw)
+
+        def chunks():
+            return (raw.iloc[start:start + 3] for start in range(0, len(raw), 3))
+
+        washer = wash_into_cache('big', chunks, profile, self.cache_dir, max_bytes=1)
+        # Written chunk by chunk, loaded like any entry, and kept despite the cap
+        df, stored_json, report = load_washed('big', self.cache_dir)
+        pd.testing.assert_frame_equal(df, expected)
+        self.assertEqual(stored_json, washer.to_json())
+        self.assertEqual(report['rows_out'], len(expected))
+        self.assertGreater(washer.report['memory_after_bytes'], 0)
+
+        # Or read back batch by batch, as written
+        chunks, scanned_json, _ = scan_washed('big', self.cache_dir)
+        self.assertEqual(len(chunks), len(expected))
+        self.assertEqual(chunks.columns, list(expected.columns))
+        frames = list(chunks)
+        self.assertGreater(len(frames), 1)
+        pd.testing.assert_frame_equal(pd.concat(frames), expected)
+        self.assertEqual(scanned_json, stored_json)
+        self.assertIsNone(scan_washed('missing', self.cache_dir))
+
+        # Trainers that do not stream load at most max_bytes of it, a uniform sample
+        df, sampled_json, _, population = load_washed_sample('big', self.cache_dir)
+        pd.testing.assert_frame_equal(df, expected)
+        self.assertEqual((sampled_json, population), (stored_json, len(expected)))
+        df, _, _, population = load_washed_sample('big', self.cache_dir, max_bytes=1)
+        self.assertEqual((len(df), population), (1, len(expected)))
+        pd.testing.assert_frame_equal(df, expected.loc[df.index])
+        self.assertIsNone(load_washed_sample('missing', self.cache_dir))
+
+    def test_concurrent_writes_of_a_key(self):
+        raw = pd.DataFrame({'amount': [1.5, 2.5, 3.5, 4.5, 5.5, 6.5], 'colour': ['red', 'blue'] * 3})
+        profile = profile_chunks([raw])
+        expected = DataWasher(profile).fit_transform(raw)
+        passes = []
+
+        def chunks():
+            passes.append(None)
+            for start in range(0, len(raw), 2):
+                if len(passes) == 2 and start == 2:
+                    # Another job stores the same key while this one is halfway through
+                    store_washed('same', self.washed, self.washer.to_json(), self.cache_dir)
+                yield raw.iloc[start:start + 2]
+
+        wash_into_cache('same', chunks, profile, self.cache_dir)
+        pd.testing.assert_frame_equal(load_washed('same', self.cache_dir)[0], expected)
+        self.assertEqual(os.listdir(self.cache_dir), ['same.arrow'])
+
+        # A write failing halfway leaves neither its partial file nor a new entry
+        def failing():
+            passes.append(None)
+            yield raw.iloc[:2]
+            if len(passes) == 4:
+                raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            wash_into_cache('failed', failing, profile, self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), ['same.arrow'])
+
+    def test_unstorable_frames_are_skipped(self):
+        mixed = pd.DataFrame({'mixed': [1, 'x', 2.5]})
+        self.assertFalse(store_washed('mixed', mixed, '{}', self.cache_dir))
+        self.assertFalse(store_washed('large', self.washed, '{}', self.cache_dir, max_bytes=10))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import copy
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from benchmarks.pipeline_benchmark import (BASELINE_PATH, NOISE_SECONDS,
+                                           REGRESSION_TOLERANCE, compare,
+                                           run_case, write_dataset)
+
+
+class TestPipelineBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        with open(BASELINE_PATH) as f:
+            self.baseline = json.load(f)
+
+    def test_committed_baseline(self):
+        self.assertTrue(self.baseline['cases'])
+        for case in self.baseline['cases'].values():
+            self.assertEqual(list(case['stages']), ['read_csv', 'washing', 'split'])
+        self.assertEqual(compare(self.baseline, self.baseline), [])
+
+    def test_slowdown_is_flagged(self):
+        name, case = next((name, case) for name, case in self.baseline['cases'].items()
+                          if case['stages']['washing']['seconds'] >= NOISE_SECONDS)
+        results = copy.deepcopy(self.baseline)
+        stage = results['cases'][name]['stages']['washing']
+
+        stage['seconds'] = case['stages']['washing']['seconds'] * (REGRESSION_TOLERANCE - 0.05)
+        self.assertEqual(compare(results, self.baseline), [])
+        stage['seconds'] = case['stages']['washing']['seconds'] * (REGRESSION_TOLERANCE + 0.05)
+        regressions = compare(results, self.baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith(f"{name} washing: seconds"))
+
+        # Peak memory is compared the same way, times under NOISE_SECONDS are not
+        results = copy.deepcopy(self.baseline)
+        results['cases'][name]['stages']['split']['peak_memory_bytes'] *= 2
+        results['cases'][name]['stages']['split']['seconds'] = NOISE_SECONDS * 10
+        regressions = compare(results, self.baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith(f"{name} split: peak_memory_bytes"))
+        self.assertTrue(regressions[0].endswith("(2.00x)"))
+
+    def test_run_case(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'case.csv')
+            write_dataset(path, 500, 6, null_ratio=0.01, string_ratio=0.2)
+            stages = run_case(path, 500, repeats=1, memory=False)
+        self.assertEqual(list(stages), ['read_csv', 'washing', 'split'])
+        self.assertIsNone(stages['split']['peak_memory_bytes'])
+        self.assertGreater(stages['read_csv']['rows_per_second'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
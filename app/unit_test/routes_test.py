@@ -1,9 +1,15 @@
+import io
+import json
 import unittest
 import os
 import sys
 import tempfile
 import shutil
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
 from flask import url_for
+from werkzeug.exceptions import ClientDisconnected
 from dotenv import load_dotenv
 
 # Add project root to path
@@ -13,6 +19,22 @@ sys.path.append(project_root)
 
 from app import create_app
 from app.models import db, User, UploadedData
+from app.static.ml_model.DataIngestion import append_chunk
+from app.static.ml_model.DatasetProfiler import profile_chunks
+from app.static.ml_model.DataWashing import profile_kept_columns
+
+
+class DroppedStream:
+    """A request body whose connection drops once <data> is read."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, size):
+        if not self.data:
+            raise ClientDisconnected()
+        data, self.data = self.data, b''
+        return data
 
 
 class RoutesTestCase(unittest.TestCase):
@@ -145,6 +167,304 @@ class RoutesTestCase(unittest.TestCase):
 
         self.assertEqual(response.status_code, 200)
 
+    def test_training_job_queue(self):
+        """select_model only queues a job, which a worker claims and records the outcome of."""
+        from werkzeug.security import generate_password_hash
+        from app.models import TrainingJob
+        from app.training import claim_next_job, run_training_job
+
+        with self.app.app_context():
+            user = User.query.filter_by(username='testuser_Yanchen').first()
+            user.password = generate_password_hash('hashed_secret_password')
+            db.session.commit()
+        self.login_user()
+        response = self.client.post('/select_model', data=dict(
+            user_id=1,
+            model_type='linear_regression',
+            precision_mode='Fast',
+            target_index=1,
+            has_header=True,
+            file_select='missing.csv'
+        ))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/results', response.location)
+
+        response = self.client.get('/jobs/1')
+        self.assertEqual(response.get_json()['status'], 'queued')
+        self.assertIn(b'Training Jobs', self.client.get('/results').data)
+
+        with self.app.app_context():
+            job = claim_next_job()
+            self.assertEqual((job.id, job.status), (1, 'running'))
+            self.assertIsNone(claim_next_job())
+            # The file does not exist, so training fails and says why
+            run_training_job(job.id)
+            job = db.session.get(TrainingJob, 1)
+            self.assertEqual(job.status, 'failed')
+            self.assertIn('FileNotFoundError', job.error)
+            self.assertIsNotNone(job.finished_at)
+
+        response = self.client.get('/jobs/1')
+        self.assertEqual(response.get_json()['status'], 'failed')
+        self.assertIn(b'FileNotFoundError', self.client.get('/results').data)
+
+    def test_cancel_training_job(self):
+        """A queued job is cancelled right away, a running one is flagged for the worker pool."""
+        import json
+        from datetime import datetime
+        from werkzeug.security import generate_password_hash
+        from app.models import TrainingJob
+        from app.training import claim_next_job
+
+        with self.app.app_context():
+            user = User.query.filter_by(username='testuser_Yanchen').first()
+            user.password = generate_password_hash('hashed_secret_password')
+            for _ in range(2):
+                db.session.add(TrainingJob(user_id=user.id, filename='data.csv', file_path='data.csv',
+                                           model_type='SVM', precision_mode='Fast', target_index=1,
+                                           has_header=True, status='queued', created_at=datetime.now()))
+            db.session.commit()
+            self.assertEqual(claim_next_job().id, 1)
+        self.login_user()
+
+        self.client.post('/jobs/1/cancel')
+        self.client.post('/jobs/2/cancel')
+        state = self.client.get('/jobs/1').get_json()
+        self.assertEqual((state['status'], state['cancel_requested']), ('running', True))
+        self.assertEqual(self.client.get('/jobs/2').get_json()['status'], 'cancelled')
+        with self.app.app_context():
+            self.assertIsNone(claim_next_job())
+
+        # The event stream of a finished job sends its state once and ends
+        response = self.client.get('/jobs/2/events')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = response.get_data(as_text=True).strip().split('\n\n')
+        self.assertEqual(len(events), 1)
+        self.assertEqual(json.loads(events[0][len('data: '):])['status'], 'cancelled')
+
+    def test_target_suggestion_runs_in_background(self):
+        """The GPT suggestion is stored on the dataset by a background task."""
+        from app.routes import _suggest_target_column
+        from app.tasks import run_in_background
+
+        profile = profile_chunks([pd.DataFrame({'a': [1, 2], 'b': [3, 4], 'c': [5, 6], 'd': [7, 8]})])
+        with self.app.app_context():
+            uploaded_data = UploadedData(
+                filename='test.csv',
+                file_path='data.csv',
+                file_size=1024,
+                user_id=1,
+                suggestion_status='pending'
+            )
+            db.session.add(uploaded_data)
+            db.session.commit()
+            data_id = uploaded_data.id
+
+            with patch('app.routes.GPT_column_suggestion', return_value=3):
+                run_in_background(_suggest_target_column, data_id, '{}', profile).result(timeout=10)
+
+            db.session.expire_all()
+            uploaded_data = db.session.get(UploadedData, data_id)
+            self.assertEqual(uploaded_data.suggestion_status, 'ready')
+            self.assertEqual(uploaded_data.suggested_target, 3)
+            self.assertEqual(uploaded_data.suggestion_source, 'gpt')
+
+            # Without an answer from GPT the unsure local guess is kept
+            with patch('app.routes.GPT_column_suggestion', return_value=None):
+                run_in_background(_suggest_target_column, data_id, '{}', profile, 1).result(timeout=10)
+
+            db.session.expire_all()
+            uploaded_data = db.session.get(UploadedData, data_id)
+            self.assertEqual(uploaded_data.suggested_target, 1)
+            self.assertEqual(uploaded_data.suggestion_source, 'local')
+
+        response = self.client.get(f'/datasets/{data_id}/suggestion')
+        self.assertEqual(response.status_code, 302)
+
+    def test_gpt_suggestion_is_a_training_index(self):
+        """GPT's file position is prefilled as the index of the same column among the washed columns."""
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            'notes': [np.nan if i % 5 else 'checked' for i in range(100)],  # mostly missing, washing drops it
+            'x1': rng.normal(size=100),
+            'x2': rng.normal(size=100),
+            'x3': rng.normal(size=100),
+            'label': rng.integers(0, 2, size=100),
+        })
+        self.login_hashed_user()
+        self.app.config['BACKGROUND_TASKS_INLINE'] = True
+        cwd = os.getcwd()
+        os.chdir(self.app.config['UPLOAD_FOLDER'])
+        try:
+            # The local guess is never sure enough, GPT answers with the file position of 'label'
+            with patch('app.routes.CONFIDENCE_THRESHOLD', 2.0), \
+                    patch('app.routes.GPT_column_suggestion', return_value=4):
+                response = self.client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()),
+                                                                      'data.csv')})
+            with self.app.app_context():
+                dataset = UploadedData.query.one()
+                profile = json.loads(dataset.profiles[0].columns_json)
+                self.assertEqual((dataset.suggested_target, dataset.suggestion_source), (3, 'gpt'))
+                self.assertEqual(profile_kept_columns(profile)[dataset.suggested_target], 'label')
+            self.assertIn(b'data-suggested-col="3"', self.client.get(response.location).data)
+        finally:
+            os.chdir(cwd)
+
+    def test_chunked_upload(self):
+        """A chunked upload resumes from the acknowledged offset and becomes a dataset on complete."""
+        from app.models import UploadSession
+
+        content = b"a,b,c\n" + b"".join(f"{i},{i * 2},{i % 3}\n".encode() for i in range(200))
+        half = len(content) // 2
+        self.login_hashed_user()
+        self.app.config['BACKGROUND_TASKS_INLINE'] = True
+        cwd = os.getcwd()
+        os.chdir(self.app.config['UPLOAD_FOLDER'])  # uploads are written under data/uploads of the working directory
+        try:
+            response = self.client.post('/upload/chunked', json={'filename': 'big.csv', 'size': len(content)})
+            self.assertEqual(response.status_code, 201)
+            upload_id = response.get_json()['upload_id']
+            url = f'/upload/chunked/{upload_id}'
+
+            response = self.client.put(url + '?offset=0', data=content[:half])
+            self.assertEqual(response.get_json()['offset'], half)
+            # A chunk sent again after a lost acknowledgement is refused with the offset to resume from
+            response = self.client.put(url + '?offset=0', data=content[:half])
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.get_json()['offset'], half)
+            self.assertEqual(self.client.get(url).get_json()['offset'], half)
+
+            # A chunk going past the declared size is refused and the staging file cut back
+            response = self.client.put(url + f'?offset={half}', data=content[half:] + b"9,9,9\n")
+            self.assertEqual(response.status_code, 413)
+            self.assertEqual(response.get_json()['offset'], half)
+            self.assertEqual(self.client.get(url).get_json()['offset'], half)
+            response = self.client.post(url + '/complete')
+            self.assertEqual(response.status_code, 409)
+
+            # A connection dropped mid-chunk is refused with the offset to resume from, not a server error
+            def dropped(stream, *args):
+                return append_chunk(DroppedStream(stream.read(10)), *args)
+
+            with patch('app.routes.append_chunk', side_effect=dropped):
+                response = self.client.put(url + f'?offset={half}', data=content[half:])
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.get_json()['offset'], half)
+            self.assertEqual(self.client.get(url).get_json()['offset'], half)
+
+            response = self.client.put(url + f'?offset={half}', data=content[half:])
+            self.assertEqual(response.get_json()['offset'], len(content))
+            with patch('app.routes.GPT_column_suggestion', return_value=None):
+                response = self.client.post(url + '/complete')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('/select_model', response.get_json()['redirect'])
+
+            with self.app.app_context():
+                self.assertIsNone(db.session.get(UploadSession, upload_id))
+                dataset = UploadedData.query.filter_by(filename='big.csv').one()
+                self.assertEqual((dataset.file_size, dataset.row_count), (len(content), 200))
+                with open(dataset.file_path, 'rb') as f:
+                    self.assertEqual(f.read(), content)
+            self.assertEqual(self.client.get(url).status_code, 404)
+        finally:
+            os.chdir(cwd)
+
+    def test_upload_processing_runs_in_background(self):
+        """The upload is saved before its Arrow copy, profile and suggestion, which a background task adds."""
+        from app.models import DatasetProfile
+        from app.tasks import run_in_background
+
+        content = b"a,b,c\n" + b"".join(f"{i},{i * 2},{i % 3}\n".encode() for i in range(50))
+        self.login_hashed_user()
+        cwd = os.getcwd()
+        os.chdir(self.app.config['UPLOAD_FOLDER'])
+        try:
+            tasks = []
+            with patch('app.routes.run_in_background', side_effect=lambda *task: tasks.append(task)):
+                response = self.client.post('/upload', data={'file': (io.BytesIO(content), 'data.csv')})
+            self.assertIn('/select_model', response.location)
+            self.assertEqual(len(tasks), 1)
+            with self.app.app_context():
+                dataset = UploadedData.query.one()
+                self.assertEqual((dataset.processing_status, dataset.row_count), ('processing', 50))
+                self.assertIsNone(dataset.columnar_path)
+                self.assertEqual(DatasetProfile.query.count(), 0)
+            self.assertIn(b'Profiling the columns', self.client.get(response.location).data)
+            state = self.client.get(f'/datasets/{dataset.id}/suggestion').get_json()
+            self.assertEqual((state['processing'], state['status']), ('processing', 'pending'))
+
+            with self.app.app_context(), patch('app.routes.GPT_column_suggestion', return_value=None):
+                run_in_background(*tasks[0]).result(timeout=30)
+                dataset = UploadedData.query.one()
+                self.assertEqual(dataset.processing_status, 'ready')
+                self.assertTrue(os.path.exists(dataset.columnar_path))
+                self.assertEqual(DatasetProfile.query.filter_by(dataset_id=dataset.id).count(), 1)
+                self.assertNotEqual(dataset.suggestion_status, 'pending')
+            self.assertIn(b'Columns of data.csv', self.client.get(response.location).data)
+
+            # A file that turns out not to be a CSV is marked as failed, with the reason
+            with self.app.app_context():
+                dataset.processing_status = 'processing'
+                os.remove(dataset.columnar_path)
+                with open(dataset.file_path, 'wb') as f:
+                    f.write(b'\xff\xfe\x00binary')
+                run_in_background(tasks[0][0], dataset.id).result(timeout=30)
+                dataset = db.session.get(UploadedData, dataset.id)
+                self.assertEqual((dataset.processing_status, dataset.suggestion_status), ('failed', 'failed'))
+                self.assertTrue(dataset.processing_error)
+        finally:
+            os.chdir(cwd)
+
+    def test_chunked_upload_abort(self):
+        """An aborted chunked upload leaves neither its session nor its staging file."""
+        self.login_hashed_user()
+        cwd = os.getcwd()
+        os.chdir(self.app.config['UPLOAD_FOLDER'])
+        try:
+            response = self.client.post('/upload/chunked', json={'filename': 'notes.txt', 'size': 10})
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post('/upload/chunked', json={'filename': 'big.csv', 'size': True})
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post('/upload/chunked', json={'filename': 'big.csv', 'size': 10})
+            url = f"/upload/chunked/{response.get_json()['upload_id']}"
+            self.client.put(url + '?offset=0', data=b"a,b\n")
+            staging = os.listdir(os.path.join('data', 'uploads', '1', '.staging'))
+            self.assertEqual(len(staging), 1)
+
+            response = self.client.delete(url)
+            self.assertTrue(response.get_json()['aborted'])
+            self.assertEqual(os.listdir(os.path.join('data', 'uploads', '1', '.staging')), [])
+            self.assertEqual(self.client.get(url).status_code, 404)
+        finally:
+            os.chdir(cwd)
+
+    def test_results_follow_jobs_on_one_stream(self):
+        """The results page follows all its active jobs on a single event stream."""
+        from datetime import datetime
+        from app.models import TrainingJob
+
+        with self.app.app_context():
+            for status in ('running', 'cancelled'):
+                db.session.add(TrainingJob(user_id=1, filename='data.csv', file_path='data.csv', model_type='SVM',
+                                           precision_mode='Fast', target_index=1, has_header=True, status=status,
+                                           created_at=datetime.now()))
+            db.session.commit()
+        self.login_hashed_user()
+        self.assertIn(b'data-events-url="/jobs/events?job_id=1"', self.client.get('/results').data)
+
+        def worker_stops_job(seconds):
+            job = db.session.get(TrainingJob, 1)
+            job.status = 'cancelled'
+            db.session.commit()
+
+        with patch('app.routes.time.sleep', side_effect=worker_stops_job):
+            stream = self.client.get('/jobs/events?job_id=1&job_id=2').get_data(as_text=True)
+        events = [json.loads(event[len('data: '):]) for event in stream.strip().split('\n\n')]
+        self.assertEqual([(event['job_id'], event['status']) for event in events],
+                         [(2, 'cancelled'), (1, 'running'), (1, 'cancelled')])
+        # Without job ids it follows the queued and running ones, here none
+        self.assertEqual(self.client.get('/jobs/events').get_data(), b'')
+
     def test_username_autocomplete(self):
         self.login_user()
         response = self.client.get('/username_autocomplete?q=test')
@@ -156,6 +476,16 @@ class RoutesTestCase(unittest.TestCase):
             password='hashed_secret_password'
         ), follow_redirects=True)
 
+    def login_hashed_user(self):
+        # The test user is stored with a plain password, hash it so the login succeeds
+        from werkzeug.security import generate_password_hash
+
+        with self.app.app_context():
+            user = User.query.filter_by(username='testuser_Yanchen').first()
+            user.password = generate_password_hash('hashed_secret_password')
+            db.session.commit()
+        return self.login_user()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+# Add root directory into test program
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+from app import create_app, db
+from app.models import TrainingJob, User
+from app.worker import serve
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+
+        # Job processes open the database themselves, so it has to be a file
+        class Config:
+            TESTING = True
+            SECRET_KEY = 'test'
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(self.work_dir, 'jobs.db')
+
+        self.app = create_app(Config)
+        self.csv_path = os.path.join(self.work_dir, 'data.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write("a,b,label\n1,2,0\n3,4,1\n5,6,0\n7,8,1\n")
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(User(username='worker', email='worker@example.com', password='x'))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        shutil.rmtree(self.work_dir)
+
+    def _add_job(self, model_type, status='queued'):
+        job = TrainingJob(user_id=1, filename='data.csv', file_path=self.csv_path, model_type=model_type,
+                          precision_mode='Fast', target_index=2, has_header=True, status=status,
+                          created_at=datetime.now())
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+    def test_jobs_run_in_worker_processes(self):
+        with self.app.app_context():
+            left_over = self._add_job('SVM', status='running')
+            queued = self._add_job('unknown_model')
+
+        def queue_done():
+            with self.app.app_context():
+                db.session.remove()
+                return TrainingJob.query.filter(TrainingJob.status.in_(['queued', 'running'])).count() == 0
+
+        serve(self.app, workers=1, poll_seconds=0.1, stop=queue_done)
+
+        with self.app.app_context():
+            # Trained in its own process, which recorded the outcome
+            job = db.session.get(TrainingJob, queued)
+            self.assertEqual(job.status, 'failed')
+            self.assertIn('Unsupported model type', job.error)
+            self.assertNotEqual(job.worker_pid, os.getpid())
+            # A job left running by an earlier pool is not silently kept running
+            job = db.session.get(TrainingJob, left_over)
+            self.assertEqual(job.status, 'failed')
+            self.assertIn('worker pool stopped', job.error)
+
+    def test_cancelled_job_is_stopped(self):
+        with self.app.app_context():
+            job_id = self._add_job('SVM')
+
+        def cancel_when_running():
+            with self.app.app_context():
+                db.session.remove()
+                job = db.session.get(TrainingJob, job_id)
+                if job.status == 'running' and not job.cancel_requested:
+                    job.cancel_requested = True
+                    db.session.commit()
+                return job.status != 'running' and job.status != 'queued'
+
+        serve(self.app, workers=1, poll_seconds=0.1, stop=cancel_when_running)
+
+        with self.app.app_context():
+            job = db.session.get(TrainingJob, job_id)
+            self.assertEqual(job.status, 'cancelled')
+            self.assertIsNone(job.modelrun_id)
+            self.assertIsNotNone(job.finished_at)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Worker pool training the queued TrainingJobs, separate from the web server:
+
+    python -m app.worker [--workers N]
+
+A supervisor claims queued jobs and trains each in a process of its own,
+at most N at a time, so a long grid search never holds up a web worker
+and the memory of a finished training is given back to the system. Run
+one supervisor per database. Jobs left running by a supervisor that was
+killed are marked failed when the next one starts, as are jobs whose
+process died without recording an outcome.
+
+Every job process leads a process group of its own, which holds the
+joblib workers of its grid search too. Cancelling a running job
+terminates that whole group, so its CPUs are free again right away.
+"""
+import argparse
+import multiprocessing
+import os
+import pickle
+import signal
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from app import create_app, db
+from app.models import TrainingJob
+from app.training import claim_next_job, finish_job, run_training_job
+
+TRAINING_WORKERS = 2  # jobs trained at the same time
+POLL_SECONDS = 1.0    # queue polling interval while idle or busy
+STOP_GRACE_SECONDS = 5.0  # a cancelled job's processes are killed when still alive after this
+
+
+def _picklable_config(app) -> SimpleNamespace:
+    # The app config handed to job processes, which are spawned and build their own app
+    config = {}
+    for key, value in app.config.items():
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        config[key] = value
+    return SimpleNamespace(**config)
+
+
+def _train_job(job_id, config):
+    # Entry point of a job process
+    if hasattr(os, 'setsid'):
+        os.setsid()  # lead a new process group, see _stop_process
+    app = create_app(config)
+    with app.app_context():
+        run_training_job(job_id)
+
+
+def _stop_process(process):
+    # Terminate a job process with its whole process group (the grid search workers)
+    if not hasattr(os, 'killpg'):
+        process.terminate()
+        process.join()
+        return
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        # The process itself too, in case it has not called setsid yet
+        for kill in (os.killpg, os.kill):
+            try:
+                kill(process.pid, sig)
+            except ProcessLookupError:
+                pass
+        process.join(STOP_GRACE_SECONDS)
+        if not process.is_alive():
+            break
+    process.join()
+
+
+def _finish_running(job_ids, status, error=None):
+    # Record the outcome of jobs whose process is gone, unless it recorded one itself
+    for job in TrainingJob.query.filter(TrainingJob.id.in_(job_ids), TrainingJob.status == 'running').all():
+        finish_job(job, status, error=error)
+
+
+def serve(app, workers=TRAINING_WORKERS, poll_seconds=POLL_SECONDS, stop=None):
+    """
+    Train the queued jobs of <app>'s database on up to <workers> processes
+    until <stop>() returns true (never by default), then wait for the jobs
+    still running.
+    """
+    context = multiprocessing.get_context('spawn')
+    config = _picklable_config(app)
+    running = {}  # job id -> process
+    with app.app_context():
+        left_over = [job.id for job in TrainingJob.query.filter_by(status='running').all()]
+        _finish_running(left_over, 'failed', "The worker pool stopped while the job was running.")
+
+        try:
+            while True:
+                if running:
+                    cancelled = TrainingJob.query.filter(TrainingJob.id.in_(list(running)),
+                                                         TrainingJob.cancel_requested.is_(True)).all()
+                    for job in cancelled:
+                        _stop_process(running.pop(job.id))
+                        _finish_running([job.id], 'cancelled')
+                for job_id, process in list(running.items()):
+                    if not process.is_alive():
+                        process.join()
+                        del running[job_id]
+                        _finish_running([job_id], 'failed', f"The training process exited with code {process.exitcode}.")
+                if stop is not None and stop():
+                    break
+                while len(running) < workers:
+                    job = claim_next_job()
+                    if job is None:
+                        break
+                    process = context.Process(target=_train_job, args=(job.id, config),
+                                              name=f"training-job-{job.id}")
+                    process.start()
+                    job.worker_pid = process.pid
+                    db.session.commit()
+                    running[job.id] = process
+                db.session.remove()  # see the jobs queued meanwhile on the next poll
+                time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            # Job processes are in groups of their own and miss the interrupt
+            for process in running.values():
+                _stop_process(process)
+            _finish_running(list(running), 'failed', "The worker pool stopped while the job was running.")
+            raise
+
+        for job_id, process in running.items():
+            process.join()
+        _finish_running(list(running), 'failed', "The training process exited without a result.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train queued OneClickML jobs.")
+    parser.add_argument('--workers', type=int, default=TRAINING_WORKERS, help="jobs trained at the same time")
+    args = parser.parse_args(argv)
+    app = create_app()
+    print(f"{datetime.now():%Y-%m-%d %H:%M:%S} training worker pool started with {args.workers} workers")
+    try:
+        serve(app, args.workers)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+legacy_washing.py
+
+The row-by-row DataWashing engine as it was just before vectorisation,
+kept as the reference the vectorised engine is checked and timed against
+(see washing_benchmark.py and DataWashing_test.py). It is the original
+engine with the two changes made to it before then, which the vectorised
+engine reproduces: the missing ratio and type shares can come from the
+stored column profile, and imputed compact columns stay float32
+(_imputed_dtype).
+"""
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import LabelEncoder
+
+
+def _datetime_ratio(series, column_profile):
+    if column_profile is not None:
+        return column_profile['datetime_ratio']
+    return series.apply(lambda x: isinstance(x, pd.Timestamp)).sum() / len(series)
+
+
+def _imputed_dtype(dtype):
+    # Compact columns stay compact: float32 and small integers (exact in float32)
+    # come out of the imputer as float32, everything else as float64
+    if dtype == np.float32 or (np.issubdtype(dtype, np.integer) and dtype.itemsize <= 2):
+        return np.float32
+    return np.float64
+
+
+def legacy_data_washing(df, profile=None, copy=True) -> pd.DataFrame:
+    # <profile> is the per-column list from DatasetProfiler. When given, the
+    # missing ratio and type shares are read from it instead of being recomputed,
+    # so they describe the whole file rather than the rows left by earlier columns.
+    # Pass copy=False for a frame nobody else uses, e.g. one fresh from the loader,
+    # to skip the defensive copy of the whole input.
+    column_profiles = {column['name']: column for column in profile} if profile else {}
+
+    if isinstance(df, pd.DataFrame):
+        clean_data_set = df.copy() if copy else df
+    else:
+        try:
+            clean_data_set = pd.read_csv(df)
+        except Exception as e:
+            print(f"Data washing process crushed down with error: {e}")
+            return None
+    
+    for column in clean_data_set.columns:
+        column_profile = column_profiles.get(column)
+
+        # Check for too much missing values (over 50%)
+        if column_profile is not None:
+            missing_ratio = column_profile['null_ratio']
+        else:
+            missing_ratio = clean_data_set[column].isna().mean()
+        if missing_ratio > 0.5:
+            clean_data_set.drop(column, axis=1, inplace=True)
+            continue
+            
+        # Check column type
+        total = len(clean_data_set[column])
+        if column_profile is not None:
+            numeric_ratio = column_profile['numeric_ratio']
+            string_ratio = column_profile['string_ratio']
+        else:
+            numeric_count = clean_data_set[column].apply(lambda x: isinstance(x, (int, float)) and not pd.isna(x)).sum()
+            string_count = clean_data_set[column].apply(lambda x: isinstance(x, str) and x.strip() != '').sum()
+            numeric_ratio = numeric_count / total
+            string_ratio = string_count / total
+        
+        # Numeric feature handling
+        if numeric_ratio > 0.5:
+            # Convert to numeric, coerce errors to NaN
+            clean_data_set[column] = pd.to_numeric(clean_data_set[column], errors='coerce')
+            # Drop rows with non-numeric values
+            clean_data_set = clean_data_set[clean_data_set[column].notna()]
+            # Fill missing values
+            imputer = SimpleImputer(strategy='mean')
+            imputed_dtype = _imputed_dtype(clean_data_set[column].dtype)
+            clean_data_set[column] = imputer.fit_transform(clean_data_set[[column]]).astype(imputed_dtype)
+            
+        # String feature handling
+        elif string_ratio > 0.5:
+            # Drop rows with non-string values
+            clean_data_set = clean_data_set[clean_data_set[column].apply(lambda x: isinstance(x, str) and x.strip() != '')]
+            # Encode string values
+            le = LabelEncoder()
+            clean_data_set[column] = le.fit_transform(clean_data_set[column])
+            
+        # Date feature handling (drop column)
+        elif _datetime_ratio(clean_data_set[column], column_profile) > 0.5:
+            clean_data_set.drop(column, axis=1, inplace=True)
+            
+    return clean_data_set
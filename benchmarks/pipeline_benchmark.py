@@ -0,0 +1,270 @@
+"""
+pipeline_benchmark.py
+
+Reproducible benchmark of the data pipeline a run goes through: the CSV
+is read (pd.read_csv), washed (DataWashing) and split (train_test_split,
+as the models do). Synthetic datasets are generated for every
+combination of shape (narrow/wide), row count and mix of missing values
+and text columns, with a fixed seed, so two runs on the same machine
+time the same data.
+
+For every stage it reports the best time, the throughput in rows and MB
+per second, and the peak memory allocated (traced with tracemalloc in a
+separate run, tracing slows the stage down). Results are written to a
+JSON baseline; a later run compared against it fails when a stage got
+slower or hungrier than REGRESSION_TOLERANCE allows. Run from the
+repository root:
+
+    python -m benchmarks.pipeline_benchmark --rows 10000 --save baseline.json
+    python -m benchmarks.pipeline_benchmark --rows 10000 --compare baseline.json
+
+benchmarks/baselines/pipeline-10000.json is the committed baseline of the
+10,000 row cases (BASELINE_PATH); times only compare on the machine it was
+recorded on, its environment entry says which.
+
+Cases above MAX_CELLS cells (e.g. 10M rows of the wide shape) are
+skipped unless --max-cells is raised.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import sklearn
+from pyarrow import csv as pa_csv
+from sklearn.model_selection import train_test_split
+
+from app.static.ml_model.DataWashing import DataWashing
+
+SHAPES = {'narrow': 10, 'wide': 100}       # columns of each shape, target included
+ROW_COUNTS = [10_000, 1_000_000, 10_000_000]
+# Share of missing cells and of text columns. Washing drops every row with a
+# missing number, so more nulls would leave the wide shape without rows to split.
+MIXES = {
+    'clean': {'null_ratio': 0.0, 'string_ratio': 0.1},
+    'nulls': {'null_ratio': 0.01, 'string_ratio': 0.1},
+    'strings': {'null_ratio': 0.0, 'string_ratio': 0.5},
+}
+MAX_CELLS = 100_000_000      # larger cases are skipped, see --max-cells
+REPEATS = 3                  # best of this many runs is reported
+TEST_SIZE = 0.2              # train_test_split as in the model modules
+REGRESSION_TOLERANCE = 1.25  # a stage slower or larger than baseline times this is a regression
+NOISE_SECONDS = 0.05         # baseline times below this are too noisy to flag a regression
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines', 'pipeline-10000.json')
+_WORDS = np.array(['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta'], dtype=object)
+
+
+def case_name(shape, rows, mix) -> str:
+    return f"{shape}-{rows}-{mix}"
+
+
+def synthetic_frame(rows, columns, null_ratio, string_ratio, seed=0) -> pd.DataFrame:
+    """
+    A frame of <rows> rows: a binary 'target' column and <columns> - 1
+    features, <string_ratio> of them text and the others alternately float
+    and integer, each cell missing with probability <null_ratio>.
+    """
+    rng = np.random.default_rng(seed)
+    features = columns - 1
+    text_columns = round(features * string_ratio)
+    data = {'target': rng.integers(0, 2, rows)}
+    for i in range(features):
+        missing = rng.random(rows) < null_ratio if null_ratio else None
+        if i < text_columns:
+            values = _WORDS[rng.integers(0, len(_WORDS), rows)]
+            if missing is not None:
+                values[missing] = None
+            data[f"text_{i}"] = values
+        elif i % 2:
+            values = rng.integers(0, 10_000, rows).astype(np.float64 if missing is not None else np.int64)
+            if missing is not None:
+                values[missing] = np.nan
+            data[f"count_{i}"] = values
+        else:
+            values = rng.normal(size=rows)
+            if missing is not None:
+                values[missing] = np.nan
+            data[f"value_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def write_dataset(path, rows, columns, null_ratio, string_ratio, seed=0, chunk_rows=1_000_000):
+    # Written in chunks through Arrow, much faster than DataFrame.to_csv on large cases.
+    # Chunks use consecutive seeds, so a case is the same file on every run.
+    with open(path, 'wb') as sink:
+        for number, start in enumerate(range(0, rows, chunk_rows)):
+            chunk = synthetic_frame(min(chunk_rows, rows - start), columns, null_ratio, string_ratio,
+                                    seed=seed + number)
+            options = pa_csv.WriteOptions(include_header=number == 0)
+            pa_csv.write_csv(pa.Table.from_pandas(chunk, preserve_index=False), sink, options)
+
+
+def _split(df):
+    return train_test_split(df.drop(columns='target'), df['target'], test_size=TEST_SIZE, random_state=42)
+
+
+STAGES = {'read_csv': pd.read_csv, 'washing': DataWashing, 'split': _split}  # in pipeline order
+
+
+def _best_time(func, arg, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _peak_bytes(func, arg) -> int:
+    # Peak memory allocated by one call beyond what was allocated before it
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        func(arg)
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(path, rows, repeats=REPEATS, memory=True) -> dict:
+    """
+    Time every stage on the CSV at <path> of <rows> rows, each stage on the
+    output of the one before. Returns one dict per stage with seconds,
+    throughput in rows and MB of its input per second (washing drops rows,
+    the split gets fewer) and peak memory (None when <memory> is False).
+    """
+    results = {}
+    data = path
+    for stage, func in STAGES.items():
+        if stage == 'read_csv':
+            input_rows, input_bytes = rows, os.path.getsize(path)
+        else:
+            input_rows, input_bytes = len(data), int(data.memory_usage(deep=True).sum())
+        seconds, output = _best_time(func, data, repeats)
+        results[stage] = {
+            'seconds': round(seconds, 4),
+            'rows_per_second': round(input_rows / seconds),
+            'mb_per_second': round(input_bytes / 1024 ** 2 / seconds, 2),
+            'peak_memory_bytes': _peak_bytes(func, data) if memory else None,
+        }
+        data = output
+    return results
+
+
+def run(row_counts=ROW_COUNTS, shapes=SHAPES, mixes=MIXES, repeats=REPEATS, memory=True,
+        max_cells=MAX_CELLS, data_dir=None) -> dict:
+    """
+    Generate and benchmark every case of <shapes> x <row_counts> x <mixes>
+    with at most <max_cells> cells. Datasets are written to <data_dir> and
+    reused from there on later runs, or to a temporary directory removed
+    afterwards. Returns the baseline: environment and one entry per case.
+    """
+    baseline = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+        },
+        'repeats': repeats,
+        'cases': {},
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = data_dir or temp_dir
+        os.makedirs(directory, exist_ok=True)
+        for shape, columns in shapes.items():
+            for rows in row_counts:
+                if rows * columns > max_cells:
+                    print(f"skipped {shape} with {rows} rows: above {max_cells} cells", file=sys.stderr)
+                    continue
+                for mix, ratios in mixes.items():
+                    name = case_name(shape, rows, mix)
+                    path = os.path.join(directory, name + '.csv')
+                    if not os.path.exists(path):
+                        write_dataset(path, rows, columns, **ratios)
+                    baseline['cases'][name] = {
+                        'shape': shape, 'rows': rows, 'columns': columns, **ratios,
+                        'csv_bytes': os.path.getsize(path),
+                        'stages': run_case(path, rows, repeats, memory),
+                    }
+                    if data_dir is None:
+                        os.remove(path)
+    return baseline
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE) -> list:
+    """
+    Regressions of <results> against <baseline>: one message per stage of a
+    case present in both whose time or peak memory grew beyond <tolerance>
+    times the baseline. Times under NOISE_SECONDS are not compared.
+    """
+    regressions = []
+    for name, case in results['cases'].items():
+        if name not in baseline['cases']:
+            continue
+        for stage, measured in case['stages'].items():
+            reference = baseline['cases'][name]['stages'].get(stage)
+            if reference is None:
+                continue
+            for key in ('seconds', 'peak_memory_bytes'):
+                if key == 'seconds' and reference[key] < NOISE_SECONDS:
+                    continue
+                if measured[key] is not None and reference[key] and measured[key] > tolerance * reference[key]:
+                    regressions.append(f"{name} {stage}: {key} {reference[key]} -> {measured[key]} "
+                                       f"({measured[key] / reference[key]:.2f}x)")
+    return regressions
+
+
+def _print_results(results):
+    print(f"{'case':<26} {'stage':<9} {'seconds':>9} {'rows/s':>12} {'MB/s':>9} {'peak MB':>9}")
+    for name, case in results['cases'].items():
+        for stage, measured in case['stages'].items():
+            peak = measured['peak_memory_bytes']
+            peak = f"{peak / 1024 ** 2:.1f}" if peak is not None else '-'
+            print(f"{name:<26} {stage:<9} {measured['seconds']:>9} {measured['rows_per_second']:>12} "
+                  f"{measured['mb_per_second']:>9} {peak:>9}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark read_csv, DataWashing and train_test_split.")
+    parser.add_argument('--rows', type=int, nargs='+', default=ROW_COUNTS, help="row counts to generate")
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument('--mixes', nargs='+', choices=list(MIXES), default=list(MIXES))
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--max-cells', type=int, default=MAX_CELLS)
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced peak memory runs")
+    parser.add_argument('--data-dir', help="keep the generated CSV files here and reuse them")
+    parser.add_argument('--save', help="write the results as a JSON baseline to this path")
+    parser.add_argument('--compare', help="JSON baseline to check the results against")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, {shape: SHAPES[shape] for shape in args.shapes},
+                  {mix: MIXES[mix] for mix in args.mixes}, args.repeats, not args.no_memory,
+                  args.max_cells, args.data_dir)
+    _print_results(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
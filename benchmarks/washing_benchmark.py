@@ -0,0 +1,132 @@
+"""
+washing_benchmark.py
+
+Times the vectorised DataWashing against the row-by-row engine it replaced
+(legacy_washing.py) on synthetic mixed-type frames, checks both give the
+same output and prints the speedup. Run from the repository root:
+
+    python -m benchmarks.washing_benchmark [--rows N ...]
+
+With --wide it times serial against parallel column-wise washing of a
+frame with thousands of columns instead.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from app.static.ml_model.DataWashing import (PARALLEL_MIN_COLUMNS, DataWasher,
+                                             DataWashing)
+from app.static.ml_model.DatasetProfiler import profile_chunks
+from benchmarks.legacy_washing import legacy_data_washing
+
+ROW_COUNTS = [10_000, 100_000, 500_000]  # frame sizes timed by default
+REPEATS = 3                              # best of this many runs is reported
+WIDE_ROWS = 20_000                       # shape of the --wide frame
+WIDE_COLUMNS = 2_000
+WIDE_WORKERS = [1, 2, 4]                 # worker counts timed with --wide
+
+
+def synthetic_frame(rows, seed=0) -> pd.DataFrame:
+    # Numeric, text, mixed, date and mostly-missing columns, as found in uploads
+    rng = np.random.default_rng(seed)
+    mixed = np.array([1, '2', 3.5, 'x', '', None, np.nan], dtype=object)
+    return pd.DataFrame({
+        'num': np.where(rng.random(rows) < 0.05, np.nan, rng.normal(size=rows)),
+        'count': rng.integers(0, 1_000, rows),
+        'ratio': rng.random(rows).astype(np.float32),
+        'text': rng.choice(['red', 'green', 'blue', ' ', None], rows),
+        'numeric_text': rng.integers(0, 100, rows).astype(str),
+        'mixed': mixed[rng.integers(0, len(mixed), rows)],
+        'date': pd.date_range('2020-01-01', periods=rows, freq='min'),
+        'sparse': np.where(rng.random(rows) < 0.9, np.nan, 1.0),
+    })
+
+
+def _best_time(func, *args):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(row_counts=ROW_COUNTS) -> list:
+    """
+    Time both engines on a frame of every size in <row_counts>, with and
+    without a profile. Returns one dict per case.
+    """
+    results = []
+    for rows in row_counts:
+        df = synthetic_frame(rows)
+        for profile in (None, profile_chunks([df])):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                legacy_time, expected = _best_time(legacy_data_washing, df, profile)
+            vectorised_time, washed = _best_time(DataWashing, df, profile)
+            pd.testing.assert_frame_equal(washed, expected)
+            results.append({
+                'rows': rows,
+                'profile': profile is not None,
+                'legacy_seconds': round(legacy_time, 4),
+                'vectorised_seconds': round(vectorised_time, 4),
+                'speedup': round(legacy_time / vectorised_time, 1),
+            })
+    return results
+
+
+def wide_frame(rows, columns, seed=0) -> pd.DataFrame:
+    # Half numeric, a quarter repetitive text and a quarter numbers stored as text
+    rng = np.random.default_rng(seed)
+    words = np.array(['alpha', 'beta', 'gamma', 'delta'], dtype=object)
+    data = {}
+    for i in range(columns):
+        if i % 4 < 2:
+            data[f"number_{i}"] = rng.normal(size=rows)
+        elif i % 4 == 2:
+            data[f"word_{i}"] = words[rng.integers(0, len(words), rows)]
+        else:
+            data[f"code_{i}"] = rng.integers(0, 1_000, rows).astype(str).astype(object)
+    return pd.DataFrame(data)
+
+
+def run_wide(rows=WIDE_ROWS, columns=WIDE_COLUMNS, workers=WIDE_WORKERS) -> list:
+    """
+    Time serial against parallel column-wise washing of a wide frame, with
+    its profile as in select_model. Returns one dict per worker count.
+    """
+    df = wide_frame(rows, columns)
+    profile = profile_chunks([df])
+    expected = DataWasher(profile).fit_transform(df, workers=1)
+    results = []
+    for count in workers:
+        DataWasher(profile).fit_transform(df.iloc[:, :PARALLEL_MIN_COLUMNS], workers=count)  # start the pool
+        seconds, washed = _best_time(lambda: DataWasher(profile).fit_transform(df, workers=count))
+        pd.testing.assert_frame_equal(washed, expected)
+        results.append({'rows': rows, 'columns': columns, 'workers': count, 'seconds': round(seconds, 4)})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the vectorised DataWashing against the row-by-row engine.")
+    parser.add_argument('--rows', type=int, nargs='+', default=ROW_COUNTS, help="row counts to generate")
+    parser.add_argument('--wide', action='store_true',
+                        help="time serial against parallel washing of a wide frame instead")
+    args = parser.parse_args(argv)
+
+    if args.wide:
+        print(f"{'rows':>10} {'columns':>8} {'workers':>8} {'seconds':>10}")
+        for case in run_wide():
+            print(f"{case['rows']:>10} {case['columns']:>8} {case['workers']:>8} {case['seconds']:>10}")
+        return
+    print(f"{'rows':>10} {'profile':>8} {'legacy s':>10} {'vectorised s':>13} {'speedup':>8}")
+    for case in run(args.rows):
+        print(f"{case['rows']:>10} {str(case['profile']):>8} {case['legacy_seconds']:>10} "
+              f"{case['vectorised_seconds']:>13} {case['speedup']:>7}x")
+
+
+if __name__ == '__main__':
+    main()